@@ -8,15 +8,32 @@ Research Paper Integration:
 - Supports dynamic discount calculations
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
 from datetime import datetime, date
 from typing import Dict, Any, List
-import csv
-import io
+import os
+import tempfile
 
-from models import PerishableItem
-from database import Database
+from models import PerishableItem, create_perishable_item_from_db, serialize_db_items
+from database import get_database
+from sharding import CHANGE_LOG_UNAVAILABLE
+from scheduler import (
+    NightlyScheduler, DISCOUNT_JOB, ARCHIVE_JOB, SCHEDULER_ENV, run_discount_job, run_archive_job, worker_id
+)
+from archiver import archive_after_days, DEFAULT_ARCHIVE_AFTER_DAYS
+from importer import CSVImporter
+from changes import ChangeFeed, build_delta, CHANGE_PAGE_LIMIT, MAX_CHANGE_PAGE_LIMIT, STREAM_RETRY_MS
+from cache import cached_response, conditional_get, response_cache
+from snapshot import get_snapshot_store
+from expiry_index import get_expiry_index
+from metrics import metrics, gauge_lines, PROMETHEUS_CONTENT_TYPE
+from exporter import (
+    EXPORT_FORMATS, COLUMNAR_FORMATS, PYARROW_AVAILABLE, iter_csv, iter_ndjson, iter_columnar
+)
+from pagination import (
+    parse_page_args, page_metadata, is_stream_requested, stream_json_array, DEFAULT_PAGE_LIMIT
+)
 
 # Import route blueprints
 try:
@@ -33,13 +50,54 @@ app = Flask(__name__)
 CORS(app)  # Enable CORS for frontend communication
 
 # Initialize database
-db = Database('perishable_items.db')
+db = get_database('perishable_items.db')
+
+# Memory-mapped catalog snapshot shared by all workers; rebuilt after writes
+catalog_snapshot = get_snapshot_store(db)
+catalog_snapshot.install(app)
+
+# Expiry-day buckets of every item, kept current through the change log
+expiry_index = get_expiry_index(db)
 
 # Register blueprints if available
 if ROUTES_AVAILABLE:
     app.register_blueprint(seller_bp)
     app.register_blueprint(public_bp)
 
+# Per-request timing and SQL accounting (exposed at /api/metrics)
+metrics.install(app, db)
+
+
+def collect_gauges() -> List[str]:
+    """
+    Gauges of the response cache, connection pool, group commit and
+    snapshot for /api/metrics (each stats dictionary is read once).
+    
+    Returns:
+        Prometheus exposition lines
+    """
+    cache_stats = response_cache.stats()
+    pool_stats = db.pool_stats()
+    write_queue = pool_stats.get('write_queue', {})
+    snapshot_stats = catalog_snapshot.stats()
+    gauges = [
+        ('basketbuddy_response_cache_hits', 'Response cache hits', cache_stats['hits']),
+        ('basketbuddy_response_cache_misses', 'Response cache misses', cache_stats['misses']),
+        ('basketbuddy_response_cache_entries', 'Cached responses', cache_stats['size']),
+        ('basketbuddy_db_open_connections', 'Pooled SQLite connections', pool_stats['open_connections']),
+        ('basketbuddy_group_commit_operations', 'Writes applied by the group commit writer',
+         write_queue.get('operations', 0)),
+        ('basketbuddy_group_commit_transactions', 'Transactions committed by the group commit writer',
+         write_queue.get('transactions', 0)),
+        ('basketbuddy_snapshot_rows', 'Rows in the mapped catalog snapshot', snapshot_stats['rows']),
+        ('basketbuddy_snapshot_sql_fallbacks', 'Public reads served by SQL while the snapshot was stale',
+         snapshot_stats['sql_fallbacks']),
+    ]
+    return [line for name, help_text, value in gauges for line in gauge_lines(name, help_text, value)]
+
+
+metrics.add_collector(collect_gauges)
+
 
 # ============================================================================
 # UTILITY FUNCTIONS
@@ -89,27 +147,11 @@ def validate_item_data(data: Dict[str, Any], is_update: bool = False):
     return True, ""
 
 
-def create_perishable_item_from_db(db_item: Dict[str, Any]) -> PerishableItem:
-    """
-    Create PerishableItem instance from database record.
-    
-    Args:
-        db_item: Database record dictionary
-        
-    Returns:
-        PerishableItem instance
-    """
-    return PerishableItem(
-        id=db_item['id'],
-        item_name=db_item['item_name'],
-        category=db_item['category'],
-        quantity=db_item['quantity'],
-        base_price=db_item['base_price'],
-        expiry_date=db_item['expiry_date'],
-        discounted_price=db_item.get('discounted_price'),
-        created_at=datetime.fromisoformat(db_item['created_at']) if db_item.get('created_at') else None,
-        updated_at=datetime.fromisoformat(db_item['updated_at']) if db_item.get('updated_at') else None
-    )
+# Streaming CSV importer (runs large uploads as background jobs)
+csv_importer = CSVImporter(db, validate_item_data)
+
+# Live change feed shared by all server-sent-event clients
+change_feed = ChangeFeed(db)
 
 
 # ============================================================================
@@ -127,28 +169,48 @@ def health_check():
 
 
 @app.route('/api/perishables', methods=['GET'])
+@conditional_get(db.get_catalog_version)
+@cached_response(db.get_write_generation)
 def get_all_perishables():
     """
     GET /api/perishables
     Retrieve all perishable items with computed discount data.
     
+    Query Parameters:
+        limit: Page size for keyset pagination (optional)
+        cursor: next_cursor from the previous page (optional)
+        stream: Set to 1 to stream the full listing incrementally (optional)
+    
     Returns:
         JSON array of perishable items
     """
     try:
-        db_items = db.get_all_items()
-        items = []
+        if is_stream_requested():
+            return stream_json_array(db.iter_items(), serialize_db_items)
         
-        for db_item in db_items:
-            item = create_perishable_item_from_db(db_item)
-            items.append(item.to_dict())
+        page = parse_page_args()
+        if page:
+            db_items = db.get_items_page(page['limit'] + 1, page['after'])
+            page_info = page_metadata(db_items, page['limit'])
+        else:
+            db_items = db.get_all_items()
+            page_info = {}
+        
+        items = serialize_db_items(db_items)
         
         return jsonify({
             'success': True,
             'count': len(items),
-            'data': items
+            'data': items,
+            **page_info
         }), 200
         
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+        
     except Exception as e:
         return jsonify({
             'success': False,
@@ -377,30 +439,26 @@ def delete_perishable(item_id: int):
 def update_all_discounts():
     """
     PATCH /api/perishables/update_discounts
-    Recalculate discounts for all items.
-    Should be called daily via cron job or scheduled task.
+    Recalculate discounts for items whose discount can change today.
+    The built-in scheduler runs this at local midnight; this endpoint
+    triggers it manually. Both are recorded in the run history.
+    
+    Query Parameters:
+        full: Set to 1 to recompute every item instead of the discount window
     
     Returns:
         JSON with update statistics
     """
     try:
-        db_items = db.get_all_items()
-        updated_count = 0
-        
-        for db_item in db_items:
-            item = create_perishable_item_from_db(db_item)
-            item.update_discount()
-            
-            # Update in database
-            db.update_item(item.id, {
-                'discounted_price': item.discounted_price
-            })
-            updated_count += 1
+        full = request.args.get('full', '').lower() in ('1', 'true', 'yes')
+        run_id = db.start_job_run(DISCOUNT_JOB, date.today().isoformat(), worker_id())
+        stats = run_discount_job(db, run_id, full=full)
         
         return jsonify({
             'success': True,
-            'message': f'Updated discounts for {updated_count} items',
-            'updated_count': updated_count
+            'message': f"Updated discounts for {stats['rows_changed']} items",
+            'updated_count': stats['rows_changed'],
+            **stats
         }), 200
         
     except Exception as e:
@@ -424,11 +482,7 @@ def get_by_category(category: str):
     """
     try:
         db_items = db.get_items_by_category(category)
-        items = []
-        
-        for db_item in db_items:
-            item = create_perishable_item_from_db(db_item)
-            items.append(item.to_dict())
+        items = serialize_db_items(db_items)
         
         return jsonify({
             'success': True,
@@ -458,12 +512,8 @@ def get_expiring_items():
     """
     try:
         days = request.args.get('days', 2, type=int)
-        db_items = db.get_expiring_items(days)
-        items = []
-        
-        for db_item in db_items:
-            item = create_perishable_item_from_db(db_item)
-            items.append(item.to_dict())
+        db_items = expiry_index.get_expiring_items(days)
+        items = serialize_db_items(db_items)
         
         return jsonify({
             'success': True,
@@ -480,6 +530,7 @@ def get_expiring_items():
 
 
 @app.route('/api/stats/categories', methods=['GET'])
+@conditional_get(db.get_catalog_version)
 def get_category_stats():
     """
     GET /api/stats/categories
@@ -503,21 +554,123 @@ def get_category_stats():
         }), 500
 
 
+@app.route('/api/stats/expiry', methods=['GET'])
+def get_expiry_stats():
+    """
+    GET /api/stats/expiry
+    Count items by status color and expiry state from the expiry index.
+    
+    Query Parameters:
+        active_only: Set to 1 to count active items only (default: 0)
+        
+    Returns:
+        JSON object with expired, near_expiry, status_colors, per-day counts
+        and index metrics
+    """
+    try:
+        counts = expiry_index.breakdown(active_only=request.args.get('active_only') == '1')
+        
+        return jsonify({
+            'success': True,
+            'data': {**counts, 'index': expiry_index.stats()}
+        }), 200
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@app.route('/api/stats/db-pool', methods=['GET'])
+def get_db_pool_stats():
+    """
+    GET /api/stats/db-pool
+    Get connection pool statistics for monitoring.
+    
+    Returns:
+        JSON object of pool counters and SQLite settings
+    """
+    try:
+        return jsonify({
+            'success': True,
+            'data': db.pool_stats()
+        }), 200
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@app.route('/api/stats/cache', methods=['GET'])
+def get_cache_stats():
+    """
+    GET /api/stats/cache
+    Get response cache metrics (hits, misses, hit ratio, size).
+    
+    Returns:
+        JSON object of cache metrics
+    """
+    return jsonify({
+        'success': True,
+        'data': response_cache.stats()
+    }), 200
+
+
+@app.route('/api/stats/snapshot', methods=['GET'])
+def get_snapshot_stats():
+    """
+    GET /api/stats/snapshot
+    Get catalog snapshot metrics (mapped generation and day, rows, file
+    size, snapshot reads, SQL fallbacks and rebuilds of this worker).
+    
+    Returns:
+        JSON object of snapshot metrics
+    """
+    return jsonify({
+        'success': True,
+        'data': catalog_snapshot.stats()
+    }), 200
+
+
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """
+    GET /api/metrics
+    Prometheus metrics: per-route latency, SQL statements, SQL time, rows
+    hydrated and response size histograms, plus cache and pool gauges.
+    
+    Send the header X-Server-Timing: 1 on any request (or set
+    BASKETBUDDY_SERVER_TIMING=1) to get a Server-Timing header back.
+    
+    Returns:
+        Prometheus text exposition format
+    """
+    return Response(metrics.render(), mimetype=None, content_type=PROMETHEUS_CONTENT_TYPE)
+
+
 @app.route('/api/import/csv', methods=['POST'])
 def import_csv():
     """
     POST /api/import/csv
     Import items from CSV file.
+    The upload is spooled to disk and parsed incrementally, inserting
+    valid rows in fixed-size chunks.
     
     Request Body:
         Form data with 'file' field containing CSV
         
+    Query Parameters:
+        async: Set to 1 to run as a background job and return 202 with a job id
+        
     CSV Format:
         item_name,category,quantity,base_price,expiry_date
         Milk,Dairy,10,5.99,2024-10-28
         
     Returns:
-        JSON with import statistics
+        JSON with import statistics (or the queued job)
     """
     try:
         if 'file' not in request.files:
@@ -534,52 +687,49 @@ def import_csv():
                 'error': 'No file selected'
             }), 400
         
-        # Read CSV
-        stream = io.StringIO(file.stream.read().decode("UTF8"), newline=None)
-        csv_reader = csv.DictReader(stream)
-        
-        items_to_insert = []
-        errors = []
-        
-        for row_num, row in enumerate(csv_reader, start=2):
-            try:
-                # Validate row
-                is_valid, error_msg = validate_item_data(row)
-                if not is_valid:
-                    errors.append(f"Row {row_num}: {error_msg}")
-                    continue
-                
-                # Create temp item to calculate discount
-                temp_item = PerishableItem(
-                    id=0,
-                    item_name=row['item_name'],
-                    category=row['category'],
-                    quantity=int(row['quantity']),
-                    base_price=float(row['base_price']),
-                    expiry_date=row['expiry_date']
-                )
-                
-                items_to_insert.append({
-                    'item_name': row['item_name'],
-                    'category': row['category'],
-                    'quantity': int(row['quantity']),
-                    'base_price': float(row['base_price']),
-                    'expiry_date': row['expiry_date'],
-                    'discounted_price': temp_item.discounted_price
-                })
-                
-            except Exception as e:
-                errors.append(f"Row {row_num}: {str(e)}")
-        
-        # Bulk insert
-        inserted_count = db.bulk_insert(items_to_insert) if items_to_insert else 0
+        # Spool the upload to disk in chunks instead of reading it into memory
+        fd, path = tempfile.mkstemp(prefix='basketbuddy-import-', suffix='.csv')
+        submitted = False
+        try:
+            with os.fdopen(fd, 'wb') as spool:
+                file.save(spool)
+            
+            job = csv_importer.create_job(file.filename)
+            
+            if request.args.get('async', '').lower() in ('1', 'true', 'yes'):
+                # The background job deletes the file when it finishes
+                csv_importer.submit(path, job)
+                submitted = True
+                return jsonify({
+                    'success': True,
+                    'message': 'Import started',
+                    'job_id': job.id,
+                    'status_url': f'/api/import/jobs/{job.id}',
+                    'data': job.to_dict()
+                }), 202
+            
+            csv_importer.run(path, job)
+        finally:
+            if not submitted:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+        
+        if job.status == 'failed':
+            return jsonify({
+                'success': False,
+                'error': job.error,
+                'data': job.to_dict()
+            }), 500
         
         return jsonify({
             'success': True,
-            'message': f'Imported {inserted_count} items',
-            'inserted_count': inserted_count,
-            'error_count': len(errors),
-            'errors': errors
+            'message': f'Imported {job.rows_inserted} items',
+            'inserted_count': job.rows_inserted,
+            'error_count': job.rows_rejected,
+            'errors': job.errors,
+            'data': job.to_dict()
         }), 200
         
     except Exception as e:
@@ -589,39 +739,205 @@ def import_csv():
         }), 500
 
 
+@app.route('/api/import/jobs', methods=['GET'])
+def list_import_jobs():
+    """
+    GET /api/import/jobs
+    List recent CSV import jobs with their progress.
+    
+    Returns:
+        JSON array of import jobs
+    """
+    jobs = [job.to_dict() for job in csv_importer.list_jobs()]
+    return jsonify({
+        'success': True,
+        'count': len(jobs),
+        'data': jobs
+    }), 200
+
+
+@app.route('/api/import/jobs/<job_id>', methods=['GET'])
+def get_import_job(job_id: str):
+    """
+    GET /api/import/jobs/<job_id>
+    Get progress of a CSV import job (rows parsed, inserted, rejected, throughput).
+    
+    Args:
+        job_id: Import job ID
+        
+    Returns:
+        JSON object of the job
+    """
+    job = csv_importer.get_job(job_id)
+    
+    if not job:
+        return jsonify({
+            'success': False,
+            'error': 'Import job not found'
+        }), 404
+    
+    return jsonify({
+        'success': True,
+        'data': job.to_dict()
+    }), 200
+
+
 @app.route('/api/export/csv', methods=['GET'])
 def export_csv():
     """
     GET /api/export/csv
     Export all items to CSV format.
+    Rows are streamed from the database cursor as they are encoded.
     
     Returns:
         CSV file download
     """
+    return export_catalog('csv')
+
+
+@app.route('/api/export/<fmt>', methods=['GET'])
+def export_catalog(fmt: str):
+    """
+    GET /api/export/<fmt>
+    Stream the full catalog in an analytics-friendly format.
+    
+    Args:
+        fmt: 'csv', 'ndjson', 'arrow' (Arrow IPC stream) or 'parquet'
+        
+    Returns:
+        Streamed file download
+    """
     try:
-        db_items = db.get_all_items()
-        items = []
-        
-        for db_item in db_items:
-            item = create_perishable_item_from_db(db_item)
-            items.append(item.to_dict())
-        
-        # Create CSV
-        output = io.StringIO()
-        if items:
-            fieldnames = ['id', 'item_name', 'category', 'quantity', 'base_price', 
-                         'expiry_date', 'discounted_price', 'discount_percentage', 'days_to_expiry']
-            writer = csv.DictWriter(output, fieldnames=fieldnames)
-            writer.writeheader()
-            
-            for item in items:
-                writer.writerow({k: item[k] for k in fieldnames})
+        if fmt not in EXPORT_FORMATS:
+            return jsonify({
+                'success': False,
+                'error': f"Unsupported export format: {fmt}"
+            }), 400
+        
+        if fmt in COLUMNAR_FORMATS and not PYARROW_AVAILABLE:
+            return jsonify({
+                'success': False,
+                'error': 'pyarrow is required for columnar exports'
+            }), 501
+        
+        rows = db.iter_items()
+        if fmt == 'csv':
+            body = iter_csv(rows)
+        elif fmt == 'ndjson':
+            body = iter_ndjson(rows)
+        else:
+            body = iter_columnar(rows, fmt)
+        
+        mimetype, extension = EXPORT_FORMATS[fmt]
+        response = Response(stream_with_context(body), mimetype=mimetype)
+        response.headers["Content-Disposition"] = f"attachment; filename=perishable_items.{extension}"
+        
+        return response
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@app.route('/api/changes', methods=['GET'])
+def get_changes():
+    """
+    GET /api/changes?since=<seq>
+    Delta sync: changes logged after a sequence number, one entry per item.
+    
+    Query Parameters:
+        since: Last seq the client has applied (default: 0)
+        limit: Maximum change log entries per page (default: 1000, max: 5000)
+        seller_name: Only changes to this seller's items (optional)
+        
+    Returns:
+        JSON with changes, next_since and has_more. Responds 410 with
+        reset_required when the requested history was pruned; the client
+        should reload the full listing and continue from latest_seq.
+    """
+    try:
+        if not db.change_log_available:
+            return jsonify({
+                'success': False,
+                'error': CHANGE_LOG_UNAVAILABLE
+            }), 501
+        
+        since = request.args.get('since', 0, type=int)
+        limit = request.args.get('limit', CHANGE_PAGE_LIMIT, type=int)
+        if since is None or since < 0 or limit is None or limit < 1:
+            return jsonify({
+                'success': False,
+                'error': 'since must be a non-negative integer and limit a positive integer'
+            }), 400
+        
+        delta = build_delta(
+            db, since, serialize_db_items,
+            limit=min(limit, MAX_CHANGE_PAGE_LIMIT),
+            seller_name=request.args.get('seller_name')
+        )
+        
+        if delta['reset_required']:
+            return jsonify({'success': False, 'error': 'Change history was pruned', **delta}), 410
+        
+        return jsonify({'success': True, 'count': len(delta['changes']), **delta}), 200
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@app.route('/api/changes/stream', methods=['GET'])
+def stream_changes():
+    """
+    GET /api/changes/stream
+    Server-sent-event stream pushing changes as they are logged.
+    
+    Query Parameters:
+        since: Last seq the client has applied (default: now, i.e. live only)
+        seller_name: Only changes to this seller's items (optional)
+        
+    Headers:
+        Last-Event-ID: Resume point sent automatically by EventSource
+        
+    Returns:
+        text/event-stream response, or 503 while this worker already holds
+        BASKETBUDDY_MAX_STREAMS streams
+    """
+    try:
+        if not db.change_log_available:
+            return jsonify({
+                'success': False,
+                'error': CHANGE_LOG_UNAVAILABLE
+            }), 501
         
-        # Return as downloadable file
-        from flask import make_response
-        response = make_response(output.getvalue())
-        response.headers["Content-Disposition"] = "attachment; filename=perishable_items.csv"
-        response.headers["Content-Type"] = "text/csv"
+        since = request.headers.get('Last-Event-ID', type=int)
+        if since is None:
+            since = request.args.get('since', type=int)
+        if since is None:
+            since = db.get_change_log_bounds()[1]
+        
+        # Each stream holds a worker thread; keep some for regular requests
+        if not change_feed.acquire_stream():
+            response = jsonify({
+                'success': False,
+                'error': 'Too many open change streams; retry later or poll /api/changes'
+            })
+            response.headers['Retry-After'] = str(STREAM_RETRY_MS // 1000)
+            return response, 503
+        
+        try:
+            events = change_feed.stream(since, serialize_db_items, request.args.get('seller_name'))
+            response = Response(stream_with_context(events), mimetype='text/event-stream')
+        except Exception:
+            change_feed.release_stream()
+            raise
+        response.call_on_close(change_feed.release_stream)
+        response.headers['Cache-Control'] = 'no-cache'
+        response.headers['X-Accel-Buffering'] = 'no'  # Disable proxy buffering
         
         return response
         
@@ -632,6 +948,247 @@ def export_csv():
         }), 500
 
 
+@app.route('/api/scheduler/runs', methods=['GET'])
+def get_scheduler_runs():
+    """
+    GET /api/scheduler/runs
+    Get the run history of scheduled and manual maintenance jobs.
+    
+    Query Parameters:
+        job: Filter by job name (optional)
+        status: 'running', 'succeeded' or 'failed' (optional)
+        limit: Maximum number of runs (default: 50)
+        
+    Returns:
+        JSON with this worker's scheduler state and the most recent runs
+    """
+    try:
+        runs = db.get_job_runs(
+            job=request.args.get('job'),
+            status=request.args.get('status'),
+            limit=min(request.args.get('limit', 50, type=int) or 50, 1000)
+        )
+        
+        return jsonify({
+            'success': True,
+            'scheduler': scheduler.state(),
+            'count': len(runs),
+            'data': runs
+        }), 200
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@app.route('/api/admin/archive', methods=['GET'])
+def get_archive_partitions():
+    """
+    GET /api/admin/archive
+    List the monthly archive partitions of long-expired items.
+    
+    Returns:
+        JSON with the archival setting and each partition's month and row count
+    """
+    try:
+        partitions = db.get_archive_partitions()
+        
+        return jsonify({
+            'success': True,
+            'archive_after_days': archive_after_days(),
+            'total_items': sum(partition['item_count'] for partition in partitions),
+            'data': partitions
+        }), 200
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@app.route('/api/admin/archive/items', methods=['GET'])
+def get_archived_items():
+    """
+    GET /api/admin/archive/items
+    Query archived items in (expiry_date, id) order.
+    
+    Query Parameters:
+        month: Archive partition YYYY-MM (optional, default: all partitions)
+        seller_name: Filter by seller (optional)
+        category: Filter by category (optional)
+        limit, cursor: Keyset pagination (default limit: 100)
+        
+    Returns:
+        JSON array of archived items with archived_at and archive_month
+    """
+    try:
+        page = parse_page_args() or {'limit': DEFAULT_PAGE_LIMIT, 'after': None}
+        items = db.query_archive(
+            month=request.args.get('month'),
+            seller_name=request.args.get('seller_name'),
+            category=request.args.get('category'),
+            limit=page['limit'] + 1,
+            after=page['after']
+        )
+        page_info = page_metadata(items, page['limit'])
+        
+        return jsonify({
+            'success': True,
+            'count': len(items),
+            'data': items,
+            **page_info
+        }), 200
+        
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@app.route('/api/admin/archive/run', methods=['POST'])
+def run_archival():
+    """
+    POST /api/admin/archive/run
+    Archive long-expired items now. With BASKETBUDDY_ARCHIVE_AFTER_DAYS set,
+    the built-in scheduler also runs this after the nightly discount
+    rollover; both are recorded in the run history.
+    
+    Request Body (optional):
+        older_than_days: Archive items expired for more than this many days
+                         (default: BASKETBUDDY_ARCHIVE_AFTER_DAYS, else 30)
+        
+    Returns:
+        JSON with archival statistics
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        older_than_days = data.get('older_than_days', archive_after_days())
+        if older_than_days is None:
+            older_than_days = DEFAULT_ARCHIVE_AFTER_DAYS
+        if isinstance(older_than_days, bool) or not isinstance(older_than_days, int) or older_than_days < 0:
+            return jsonify({
+                'success': False,
+                'error': 'older_than_days must be a non-negative integer'
+            }), 400
+        
+        run_id = db.start_job_run(ARCHIVE_JOB, date.today().isoformat(), worker_id())
+        stats = run_archive_job(db, run_id, older_than_days)
+        
+        return jsonify({
+            'success': True,
+            'message': f"Archived {stats['rows_archived']} items",
+            **stats
+        }), 200
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@app.route('/api/admin/slow-queries', methods=['GET'])
+def get_slow_queries():
+    """
+    GET /api/admin/slow-queries
+    Get SQL statements that exceeded the slow-query threshold, with their
+    parameter types, elapsed time, rows returned and query plan.
+    
+    Query Parameters:
+        limit: Maximum number of entries (default: 100)
+        full_scan: If '1', only statements whose plan scans a whole table
+        
+    Returns:
+        JSON with the log settings, a per-statement summary and the most
+        recent entries
+    """
+    try:
+        entries = db.slow_queries.entries(
+            limit=min(request.args.get('limit', 100, type=int) or 100, 1000),
+            full_scan_only=request.args.get('full_scan') == '1'
+        )
+        
+        return jsonify({
+            'success': True,
+            'settings': db.slow_queries.stats(),
+            'summary': db.slow_queries.summary(),
+            'count': len(entries),
+            'data': entries
+        }), 200
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@app.route('/api/admin/slow-queries', methods=['PATCH'])
+def update_slow_query_threshold():
+    """
+    PATCH /api/admin/slow-queries
+    Change the slow-query threshold of this worker.
+    
+    Request Body:
+        threshold_ms: Minimum elapsed milliseconds to log (null disables)
+        
+    Returns:
+        JSON with the log settings
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        if 'threshold_ms' not in data:
+            return jsonify({
+                'success': False,
+                'error': 'Missing required field: threshold_ms'
+            }), 400
+        
+        threshold = data['threshold_ms']
+        if threshold is not None:
+            if isinstance(threshold, bool) or not isinstance(threshold, (int, float)) or threshold < 0:
+                return jsonify({
+                    'success': False,
+                    'error': 'threshold_ms must be a non-negative number or null'
+                }), 400
+        
+        db.set_slow_query_threshold(threshold)
+        return jsonify({
+            'success': True,
+            'settings': db.slow_queries.stats()
+        }), 200
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@app.route('/api/admin/slow-queries', methods=['DELETE'])
+def clear_slow_queries():
+    """
+    DELETE /api/admin/slow-queries
+    Clear the in-memory slow-query entries (the log file is kept).
+    
+    Returns:
+        JSON success message
+    """
+    db.slow_queries.clear()
+    return jsonify({
+        'success': True,
+        'message': 'Slow-query log cleared'
+    }), 200
+
+
 # ============================================================================
 # ERROR HANDLERS
 # ============================================================================
@@ -652,6 +1209,33 @@ def internal_error(error):
     }), 500
 
 
+# ============================================================================
+# NIGHTLY SCHEDULER
+# ============================================================================
+
+# Discount rollover and archival of long-expired items at local midnight;
+# one worker runs each and rebuilds the catalog snapshot, all remap it and
+# warm caches
+scheduler = NightlyScheduler(db, app, catalog_snapshot)
+
+
+def start_scheduler() -> bool:
+    """
+    Start this process's nightly scheduler unless BASKETBUDDY_SCHEDULER=0.
+
+    Called by the serving process only (below, and from gunicorn's
+    post_worker_init hook), never on import, so scripts and the debug
+    reloader's watcher process do not run one. Safe to call twice.
+
+    Returns:
+        True if the scheduler is running
+    """
+    if os.environ.get(SCHEDULER_ENV, '1') == '0':
+        return False
+    scheduler.start()
+    return True
+
+
 # ============================================================================
 # MAIN
 # ============================================================================
@@ -672,9 +1256,30 @@ if __name__ == '__main__':
     print("  GET    /api/perishables/category/<category>")
     print("  GET    /api/perishables/expiring")
     print("  GET    /api/stats/categories")
+    print("  GET    /api/stats/expiry")
+    print("  GET    /api/stats/db-pool")
+    print("  GET    /api/stats/cache")
+    print("  GET    /api/stats/snapshot")
+    print("  GET    /api/metrics")
     print("  POST   /api/import/csv")
+    print("  GET    /api/import/jobs")
+    print("  GET    /api/import/jobs/<job_id>")
     print("  GET    /api/export/csv")
+    print("  GET    /api/export/<csv|ndjson|arrow|parquet>")
+    print("  GET    /api/changes?since=<seq>")
+    print("  GET    /api/changes/stream")
+    print("  GET    /api/scheduler/runs")
+    print("  GET    /api/admin/archive")
+    print("  GET    /api/admin/archive/items")
+    print("  POST   /api/admin/archive/run")
+    print("  GET    /api/admin/slow-queries")
     print("\nServer running on http://localhost:5000")
     print("=" * 60)
-    
-    app.run(debug=True, host='0.0.0.0', port=5000)
+
+    debug = True
+    # The reloader re-runs this file in a child process that serves the
+    # requests; only that one starts the scheduler
+    if not debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_scheduler()
+
+    app.run(debug=debug, host='0.0.0.0', port=5000)
@@ -0,0 +1,102 @@
+"""
+Expired Item Archival for Basket Buddy 2.0
+Moves long-expired items out of the hot table into monthly partitions
+
+Retention Foundation:
+- The hot set H(t) = {i ∈ U : expiry(i) ≥ t − n} keeps every item that is
+  live or expired for at most n days; A = U − H(t) is archived
+- A is partitioned by expiry month, A = ⋃ A(m), one table per month, so
+  each partition is append-only and can be queried or dropped on its own
+- Rows move in batches of at most b per transaction with a pause between
+  batches, so the write lock is never held long and writers interleave
+- Archived rows leave every hot-table read: seller summaries (total_items,
+  expired, total_revenue), /api/perishables/<id> and the seller item lists
+  no longer count or return them; /api/admin/archive/items does. The
+  nightly archival therefore only runs when BASKETBUDDY_ARCHIVE_AFTER_DAYS
+  is set
+"""
+
+from datetime import date, timedelta
+from typing import Any, Dict, Optional
+import os
+import time
+
+from database import Database
+
+
+# Days an item must have been expired before the nightly run archives it
+# (unset or empty: no nightly archival; the admin endpoint still works)
+ARCHIVE_AFTER_DAYS_ENV = 'BASKETBUDDY_ARCHIVE_AFTER_DAYS'
+
+# Retention of a manual run when neither the request nor the env sets one
+DEFAULT_ARCHIVE_AFTER_DAYS = 30
+
+# Rows moved per transaction, and the pause that lets other writers in
+ARCHIVE_BATCH_SIZE = 500
+ARCHIVE_PAUSE_SECONDS = 0.02
+
+
+def archive_after_days() -> Optional[int]:
+    """
+    Retention of expired items in the hot table, from BASKETBUDDY_ARCHIVE_AFTER_DAYS.
+
+    Returns:
+        Number of days, or None if scheduled archival is disabled
+    """
+    value = os.environ.get(ARCHIVE_AFTER_DAYS_ENV, '').strip()
+    return int(value) if value else None
+
+
+def archive_expired_items(
+    db: Database,
+    older_than_days: int,
+    today: Optional[date] = None,
+    batch_size: int = ARCHIVE_BATCH_SIZE,
+    pause: float = ARCHIVE_PAUSE_SECONDS
+) -> Dict[str, Any]:
+    """
+    Archive every item expired for more than `older_than_days` days.
+
+    Args:
+        db: Database instance
+        older_than_days: Items with expiry_date < today - older_than_days move
+        today: Reference date (default: date.today())
+        batch_size: Rows moved per transaction
+        pause: Seconds to sleep between batches
+
+    Returns:
+        Dictionary with rows_archived, batches, partitions (rows per month),
+        partitions_created, cutoff, elapsed_ms and as_of
+    """
+    started = time.perf_counter()
+    today = today or date.today()
+    cutoff = (today - timedelta(days=older_than_days)).isoformat()
+
+    # Schema changes happen once, before any batch
+    created = db.create_archive_partitions(cutoff)
+
+    partitions: Dict[str, int] = {}
+    rows_archived = 0
+    batches = 0
+    while True:
+        moved = db.archive_expired_batch(cutoff, batch_size)
+        count = sum(moved.values())
+        if not count:
+            break
+        batches += 1
+        rows_archived += count
+        for month, month_count in moved.items():
+            partitions[month] = partitions.get(month, 0) + month_count
+        if count < batch_size:
+            break
+        time.sleep(pause)
+
+    return {
+        'rows_archived': rows_archived,
+        'batches': batches,
+        'partitions': partitions,
+        'partitions_created': created,
+        'cutoff': cutoff,
+        'elapsed_ms': round((time.perf_counter() - started) * 1000, 2),
+        'as_of': today.isoformat()
+    }
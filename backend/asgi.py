@@ -0,0 +1,286 @@
+"""
+ASGI Public API for Basket Buddy 2.0
+Async serving of the shopper-facing /api/perishables/public* read endpoints
+
+Usage:
+    uvicorn asgi:app --app-dir backend --workers 2
+
+Serving Foundation:
+- Same routes, query parameters and response bodies as routes/public_routes.py
+  (including ETag / Last-Modified revalidation and the response cache): both
+  call the handlers of routes/public_handlers.py, this module only adds the
+  ASGI transport
+- Each handler runs on the bounded thread pool of AsyncDatabase, so open connections are limited by the event loop, not by
+  the number of worker processes
+- Writes stay on the Flask app; this process sees them through the shared
+  database file (write generation, change triggers)
+"""
+
+from datetime import date, datetime
+from email.utils import format_datetime, parsedate_to_datetime
+from functools import partial
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl
+import json
+
+from database import get_database
+from async_database import AsyncDatabase
+from cache import response_cache, catalog_etag, catalog_last_modified, UNCACHEABLE_PARAMS
+from pagination import is_stream_requested, STREAM_BATCH_SIZE
+from routes import public_handlers
+from routes.public_handlers import PublicAPIError, public_filters
+
+
+PUBLIC_PREFIX = '/api/perishables/public'
+
+JSON_MIMETYPE = 'application/json'
+
+# Sent on every response, as flask_cors does for the Flask app
+CORS_HEADERS = [(b'access-control-allow-origin', b'*')]
+
+
+class QueryArgs:
+    """
+    Query string parameters with the lookup semantics of Flask's request.args:
+    the first value wins and a failed type conversion returns the default.
+    """
+
+    def __init__(self, query_string: bytes):
+        self.items = parse_qsl(query_string.decode('latin-1'), keep_blank_values=True)
+        self._first: Dict[str, str] = {}
+        for name, value in self.items:
+            self._first.setdefault(name, value)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._first
+
+    def get(self, name: str, default: Any = None, type: Optional[Callable[[str], Any]] = None) -> Any:
+        if name not in self._first:
+            return default
+        value = self._first[name]
+        if type is None:
+            return value
+        try:
+            return type(value)
+        except ValueError:
+            return default
+
+
+def json_body(payload: Dict[str, Any]) -> bytes:
+    """Encode a payload the way Flask's jsonify does (sorted keys, compact)."""
+    return (json.dumps(payload, sort_keys=True, separators=(',', ':')) + '\n').encode('utf-8')
+
+
+class Reply:
+    """A complete (non-streamed) HTTP response."""
+
+    def __init__(self, body: bytes = b'', status: int = 200, mimetype: str = JSON_MIMETYPE):
+        self.body = body
+        self.status = status
+        self.mimetype = mimetype
+        self.headers: List[Tuple[bytes, bytes]] = []
+
+
+class StreamReply:
+    """A streamed HTTP response produced by an async chunk generator."""
+
+    def __init__(self, chunks, mimetype: str = JSON_MIMETYPE):
+        self.chunks = chunks
+        self.status = 200
+        self.mimetype = mimetype
+        self.headers: List[Tuple[bytes, bytes]] = []
+
+
+class PublicAPI:
+    """
+    ASGI application serving the public read endpoints.
+
+    Each route runs its routes/public_handlers.py handler on the SQLite
+    thread pool and encodes the payload (or PublicAPIError) like the Flask
+    views do; only the streamed listing has its own async generator.
+    """
+
+    def __init__(self, adb: AsyncDatabase):
+        """
+        Initialize the application.
+
+        Args:
+            adb: Async data access layer
+        """
+        self.adb = adb
+        self.routes: Dict[str, Callable[[QueryArgs], Awaitable[Any]]] = {
+            PUBLIC_PREFIX: self.public_items,
+            f'{PUBLIC_PREFIX}/search': partial(adb.run, public_handlers.search_items, adb.db),
+            f'{PUBLIC_PREFIX}/autocomplete': partial(adb.run, public_handlers.autocomplete, adb.db),
+            f'{PUBLIC_PREFIX}/categories': partial(adb.run, public_handlers.categories, adb.catalog),
+            f'{PUBLIC_PREFIX}/sellers': partial(adb.run, public_handlers.sellers, adb.catalog),
+            f'{PUBLIC_PREFIX}/deals': partial(adb.run, public_handlers.deals, adb.catalog),
+        }
+
+    async def __call__(self, scope: Dict[str, Any], receive, send) -> None:
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        elif scope['type'] == 'http':
+            reply = await self.handle(scope)
+            await self._send(scope, reply, send)
+
+    async def _lifespan(self, receive, send) -> None:
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.adb.shutdown()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def handle(self, scope: Dict[str, Any]):
+        """
+        Route one request and build its reply.
+
+        Args:
+            scope: ASGI HTTP connection scope
+
+        Returns:
+            Reply or StreamReply
+        """
+        handler = self.routes.get(scope['path'])
+        if handler is None:
+            return Reply(json_body({'success': False, 'error': 'Endpoint not found'}), 404)
+
+        method = scope['method']
+        if method == 'OPTIONS':
+            reply = Reply(status=200)
+            reply.headers.append((b'allow', b'GET, HEAD, OPTIONS'))
+            return reply
+        if method not in ('GET', 'HEAD'):
+            reply = Reply(json_body({'success': False, 'error': 'Method not allowed'}), 405)
+            reply.headers.append((b'allow', b'GET, HEAD, OPTIONS'))
+            return reply
+
+        args = QueryArgs(scope.get('query_string', b''))
+        headers = {name.decode('latin-1').lower(): value.decode('latin-1') for name, value in scope['headers']}
+        try:
+            generation, modified_at = await self.adb.get_catalog_version()
+        except Exception as e:
+            return Reply(json_body({'success': False, 'error': str(e)}), 500)
+
+        # Conditional GET (same validators as cache.conditional_get)
+        today = date.today()
+        etag = catalog_etag(generation, today, (scope['path'], tuple(sorted(args.items))))
+        last_modified = catalog_last_modified(modified_at, today)
+        if _not_modified(headers, etag, last_modified):
+            reply = Reply(status=304)
+        else:
+            reply = await self._dispatch(handler, scope['path'], args, generation)
+            if reply.status != 200:
+                return reply
+
+        reply.headers += [
+            (b'etag', f'"{etag}"'.encode('latin-1')),
+            (b'cache-control', b'no-cache'),
+        ]
+        if last_modified is not None:
+            reply.headers.append(
+                (b'last-modified', format_datetime(last_modified, usegmt=True).encode('latin-1'))
+            )
+        return reply
+
+    async def _dispatch(self, handler, path: str, args: QueryArgs, generation: int):
+        """Run a handler through the response cache (same keys as cache.cached_response)."""
+        key = None
+        if not any(param in args for param in UNCACHEABLE_PARAMS):
+            key = (path, tuple(sorted((name, value) for name, value in args.items if value != '')))
+            hit = response_cache.get(key, generation)
+            if hit is not None:
+                body, status, mimetype = hit
+                return Reply(body, status, mimetype)
+
+        try:
+            result = await handler(args)
+        except PublicAPIError as e:
+            return Reply(json_body({'success': False, 'error': str(e)}), e.status)
+        except Exception as e:
+            return Reply(json_body({'success': False, 'error': str(e)}), 500)
+
+        if isinstance(result, StreamReply):
+            return result
+        reply = Reply(json_body(result))
+        if key is not None:
+            response_cache.put(key, generation, reply.body, reply.status, reply.mimetype)
+        return reply
+
+    async def _send(self, scope: Dict[str, Any], reply, send) -> None:
+        headers = [(b'content-type', reply.mimetype.encode('latin-1'))] + CORS_HEADERS + reply.headers
+        head_only = scope['method'] == 'HEAD'
+
+        if isinstance(reply, StreamReply):
+            await send({'type': 'http.response.start', 'status': reply.status, 'headers': headers})
+            if not head_only:
+                try:
+                    async for chunk in reply.chunks:
+                        await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+                finally:
+                    await reply.chunks.aclose()
+            await send({'type': 'http.response.body', 'body': b''})
+            return
+
+        if reply.status != 304:
+            headers.append((b'content-length', str(len(reply.body)).encode('latin-1')))
+        await send({'type': 'http.response.start', 'status': reply.status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': b'' if head_only else reply.body})
+
+    # ------------------------------------------------------------------
+    # Streamed listing (the other routes only run their shared handler)
+    # ------------------------------------------------------------------
+
+    async def public_items(self, args: QueryArgs):
+        if is_stream_requested(args):
+            filters = public_filters(args)
+            return StreamReply(self._stream_items(filters, {'filters_applied': filters}))
+        return await self.adb.run(public_handlers.public_items, self.adb.catalog, args)
+
+    async def _stream_items(self, filters: Dict[str, Any], envelope: Dict[str, Any]):
+        """Async counterpart of pagination.stream_json_array."""
+        header = {'success': True}
+        header.update(envelope)
+        # Opened on first iteration, so an unsent stream (HEAD) holds no cursor
+        rows = self.adb.db.iter_public_items(**filters)
+        try:
+            yield (json.dumps(header)[:-1] + ', "data": [').encode('utf-8')
+            count = 0
+            while True:
+                batch = await self.adb.next_batch(rows, STREAM_BATCH_SIZE)
+                if not batch:
+                    break
+                parts = []
+                for item in await self.adb.serialize(batch):
+                    parts.append((',' if count else '') + json.dumps(item))
+                    count += 1
+                yield ''.join(parts).encode('utf-8')
+            yield f'], "count": {count}}}'.encode('utf-8')
+        finally:
+            rows.close()
+
+
+def _not_modified(headers: Dict[str, str], etag: str, last_modified: Optional[datetime]) -> bool:
+    """
+    Evaluate If-None-Match (weak comparison) or else If-Modified-Since
+    (ignored while the catalog has no reliable Last-Modified).
+    """
+    if_none_match = headers.get('if-none-match')
+    if if_none_match:
+        tags = [tag.strip() for tag in if_none_match.split(',')]
+        return any(tag == '*' or (tag[2:] if tag.startswith('W/') else tag).strip('"') == etag for tag in tags)
+
+    if_modified_since = headers.get('if-modified-since')
+    if if_modified_since and last_modified is not None:
+        try:
+            return last_modified <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+db = get_database('perishable_items.db')
+app = PublicAPI(AsyncDatabase(db))
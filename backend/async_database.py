@@ -0,0 +1,93 @@
+"""
+Async Data Access for Basket Buddy 2.0
+Awaitable wrappers around Database for the ASGI public API
+
+Concurrency Foundation:
+- SQLite calls block, so each runs on a bounded pool of T threads; the event
+  loop only ever waits on futures and can hold thousands of connections
+- At most T calls are in flight; further callers queue as coroutines (not
+  as executor jobs), so a client that disconnects never leaves work behind
+- Every pool thread keeps its own pooled SQLite connection, so T also bounds
+  the number of open connections
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from itertools import islice
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+import asyncio
+import os
+
+from database import Database
+from models import serialize_rows
+from snapshot import get_snapshot_store
+
+
+# Threads (and SQLite connections) serving async callers
+DB_THREADS_ENV = 'BASKETBUDDY_ASGI_DB_THREADS'
+DEFAULT_DB_THREADS = 8
+
+
+class AsyncDatabase:
+    """
+    Async facade over Database for read endpoints.
+
+    Blocking calls run on a dedicated ThreadPoolExecutor; a semaphore keeps
+    the number of queued executor jobs equal to the thread count.
+    """
+
+    def __init__(self, db: Database, max_threads: Optional[int] = None):
+        """
+        Initialize the facade.
+
+        Args:
+            db: Database instance
+            max_threads: Thread pool size (default: BASKETBUDDY_ASGI_DB_THREADS or 8)
+        """
+        self.db = db
+        self.catalog = get_snapshot_store(db)
+        self.max_threads = max_threads or int(os.environ.get(DB_THREADS_ENV, DEFAULT_DB_THREADS))
+        self._executor = ThreadPoolExecutor(self.max_threads, thread_name_prefix='asgi-sqlite')
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    async def run(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """
+        Run a blocking callable on the SQLite thread pool.
+
+        Args:
+            func: Callable to run
+            *args, **kwargs: Arguments of the callable
+
+        Returns:
+            The callable's result
+        """
+        if self._semaphore is None:
+            # Created lazily so it binds to the running loop (Python 3.9)
+            self._semaphore = asyncio.Semaphore(self.max_threads)
+        async with self._semaphore:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, partial(func, *args, **kwargs))
+
+    def shutdown(self) -> None:
+        """Stop the thread pool once pending calls finish."""
+        self._executor.shutdown(wait=True)
+
+    async def get_catalog_version(self) -> Tuple[int, int]:
+        return await self.run(self.db.get_catalog_version)
+
+    async def serialize(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Serialize rows off the event loop (vectorized pricing is CPU work)."""
+        return await self.run(serialize_rows, rows) if rows else []
+
+    async def next_batch(self, rows: Iterator[Dict[str, Any]], size: int) -> List[Dict[str, Any]]:
+        """
+        Fetch the next batch of a server-side cursor opened by an iter_* method.
+
+        Args:
+            rows: Row iterator (e.g. Database.iter_public_items)
+            size: Maximum rows fetched
+
+        Returns:
+            List of rows, empty once the cursor is exhausted
+        """
+        return await self.run(lambda: list(islice(rows, size)))
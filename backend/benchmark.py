@@ -0,0 +1,523 @@
+"""
+Endpoint Benchmark Suite for Basket Buddy 2.0
+Synthetic catalog generator and per-endpoint latency / throughput / memory report
+
+Usage:
+    python benchmark.py --items 100000 --sellers 50 --categories 12
+    python benchmark.py --items 1000000 --output bench.json
+    python benchmark.py --compare bench.json --threshold 1.25
+
+Measurement:
+- Every route registered on the Flask app is driven through the test client
+  against a throwaway database filled with a synthetic catalog
+- Latency percentiles (p50/p95/p99) and throughput come from timed
+  iterations after warm-up; peak memory comes from one extra request traced
+  with tracemalloc, so tracing overhead never skews the timings
+- The JSON report can be compared against a baseline; an endpoint whose p95
+  grew beyond the threshold fails the run (exit code 1)
+"""
+
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, List, Optional
+import argparse
+import io
+import json
+import math
+import os
+import platform
+import random
+import re
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+
+
+CATEGORY_NAMES = [
+    'Dairy', 'Bakery', 'Fruit', 'Vegetables', 'Meat', 'Seafood', 'Deli',
+    'Frozen', 'Beverages', 'Snacks', 'Eggs', 'Ready Meals'
+]
+
+PRODUCT_WORDS = [
+    'Milk', 'Yogurt', 'Cheddar', 'Butter', 'Bread', 'Bagel', 'Croissant',
+    'Apple', 'Banana', 'Strawberries', 'Spinach', 'Carrots', 'Chicken',
+    'Salmon', 'Ham', 'Pizza', 'Juice', 'Chips', 'Eggs', 'Salad', 'Soup'
+]
+
+PRODUCT_ADJECTIVES = ['Organic', 'Fresh', 'Whole', 'Low Fat', 'Family', 'Local', 'Premium']
+
+# Expiry date distributions, as offsets in days from today
+EXPIRY_DISTRIBUTIONS = ('uniform', 'near', 'normal')
+
+GENERATOR_CHUNK_SIZE = 50000
+
+# Scenarios marked heavy scan the whole catalog; they run fewer iterations
+HEAVY_ITERATION_DIVISOR = 10
+
+
+def expiry_offset(rng: random.Random, distribution: str, past_days: int, future_days: int) -> int:
+    """
+    Draw an expiry date offset (days from today).
+
+    Args:
+        rng: Random generator
+        distribution: 'uniform' over [-past_days, future_days], 'near'
+            (exponential, most items expiring within a few days) or 'normal'
+            (centred mid-window)
+        past_days: How far in the past expired items may lie
+        future_days: How far in the future items may expire
+
+    Returns:
+        Offset in days
+    """
+    if distribution == 'near':
+        offset = int(rng.expovariate(1 / 3.0)) - rng.randint(0, past_days)
+    elif distribution == 'normal':
+        offset = int(rng.gauss(future_days / 2, future_days / 4))
+    else:
+        offset = rng.randint(-past_days, future_days)
+    return max(-past_days, min(future_days, offset))
+
+
+def generate_catalog(
+    db,
+    items: int,
+    sellers: int = 20,
+    categories: int = 8,
+    distribution: str = 'near',
+    past_days: int = 3,
+    future_days: int = 30,
+    inactive_ratio: float = 0.1,
+    seed: int = 42,
+    chunk_size: int = GENERATOR_CHUNK_SIZE
+) -> Dict[str, Any]:
+    """
+    Fill a database with a synthetic catalog.
+
+    Args:
+        db: Database instance
+        items: Number of items
+        sellers: Number of distinct sellers
+        categories: Number of distinct categories
+        distribution: Expiry distribution (see expiry_offset)
+        past_days: Oldest expiry offset (already expired items)
+        future_days: Latest expiry offset
+        inactive_ratio: Fraction of items that are deactivated
+        seed: Random seed (same seed, same catalog)
+        chunk_size: Items inserted per transaction
+
+    Returns:
+        Dictionary describing the generated catalog
+    """
+    from pricing import price_batch
+
+    rng = random.Random(seed)
+    today = date.today()
+    seller_names = [f'Seller {i:04d}' for i in range(sellers)]
+    category_names = [
+        CATEGORY_NAMES[i] if i < len(CATEGORY_NAMES) else f'Category {i}'
+        for i in range(categories)
+    ]
+
+    started = time.perf_counter()
+    inserted = 0
+    while inserted < items:
+        chunk = []
+        for _ in range(min(chunk_size, items - inserted)):
+            base_price = round(rng.uniform(0.5, 25.0), 2)
+            offset = expiry_offset(rng, distribution, past_days, future_days)
+            chunk.append({
+                'item_name': f'{rng.choice(PRODUCT_ADJECTIVES)} {rng.choice(PRODUCT_WORDS)}',
+                'category': rng.choice(category_names),
+                'quantity': rng.randint(1, 50),
+                'base_price': base_price,
+                'cost_price': round(base_price * rng.uniform(0.5, 0.8), 2),
+                'shelf_life': max(offset, 1),
+                'expiry_date': (today + timedelta(days=offset)).isoformat(),
+                'seller_name': rng.choice(seller_names),
+                'is_active': rng.random() >= inactive_ratio
+            })
+
+        _, prices = price_batch(
+            [item['expiry_date'] for item in chunk],
+            [item['quantity'] for item in chunk],
+            [item['base_price'] for item in chunk],
+            [item['category'] for item in chunk],
+            today
+        )
+        for item, price in zip(chunk, prices):
+            item['discounted_price'] = float(price)
+
+        with db.transaction():
+            inserted += db.bulk_insert(chunk)
+
+    return {
+        'items': inserted,
+        'sellers': seller_names,
+        'categories': category_names,
+        'distribution': distribution,
+        'seed': seed,
+        'elapsed_seconds': round(time.perf_counter() - started, 3)
+    }
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class Scenario:
+    """
+    One benchmarked request.
+
+    Attributes:
+        name: Report key, e.g. 'GET /api/perishables?limit=100'
+        endpoint: Flask endpoint name the scenario covers
+        request: Callable(client, iteration) issuing the request
+        heavy: Scans the whole catalog (fewer iterations)
+        streamed: Only the first chunk is read (long-lived streams)
+    """
+
+    def __init__(
+        self,
+        endpoint: str,
+        method: str,
+        path: str,
+        request: Optional[Callable[[Any, int], Any]] = None,
+        heavy: bool = False,
+        streamed: bool = False,
+        **kwargs: Any
+    ):
+        self.endpoint = endpoint
+        self.name = f'{method} {path}'
+        self.heavy = heavy
+        self.streamed = streamed
+        self.request = request or (
+            lambda client, i: client.open(path, method=method, buffered=not streamed, **kwargs)
+        )
+
+
+def build_scenarios(app_module, catalog: Dict[str, Any]) -> List[Scenario]:
+    """
+    Build the scenarios covering every route of the app.
+
+    Writes that consume rows (deletes) get their own freshly created items,
+    so every iteration does the same amount of work.
+    """
+    db = app_module.db
+    seller = catalog['sellers'][0]
+    category = catalog['categories'][0]
+    item_id = db.get_items_page(1)[0]['id']
+    expiry = (date.today() + timedelta(days=3)).isoformat()
+
+    def new_item(name: str = 'Bench Milk') -> Dict[str, Any]:
+        return {
+            'item_name': name, 'category': category, 'quantity': 5,
+            'base_price': 3.5, 'expiry_date': expiry, 'seller_name': seller
+        }
+
+    def fresh_id() -> int:
+        return db.create_item(dict(new_item('Bench Delete'), discounted_price=3.5))
+
+    def delete(prefix: str):
+        return lambda client, i: client.delete(f'{prefix}/{fresh_id()}')
+
+    def batch(client, i):
+        operations = [{'op': 'create', 'data': new_item()} for _ in range(10)]
+        operations += [{'op': 'toggle', 'id': item_id}, {'op': 'toggle', 'id': item_id}]
+        return client.post('/api/seller/items/batch', json={'operations': operations})
+
+    csv_body = 'item_name,category,quantity,base_price,expiry_date\n' + ''.join(
+        f'Bench Bread {n},{category},3,2.5,{expiry}\n' for n in range(100)
+    )
+
+    def import_csv(client, i):
+        data = {'file': (io.BytesIO(csv_body.encode('utf-8')), 'bench.csv')}
+        return client.post('/api/import/csv', data=data, content_type='multipart/form-data')
+
+    job = app_module.csv_importer.create_job('bench.csv')
+    threshold = db.slow_queries.stats()['threshold_ms']
+
+    scenarios = [
+        Scenario('health_check', 'GET', '/api/health'),
+        Scenario('get_all_perishables', 'GET', '/api/perishables', heavy=True),
+        Scenario('get_all_perishables', 'GET', '/api/perishables?limit=100'),
+        Scenario('get_all_perishables', 'GET', '/api/perishables?stream=1', heavy=True),
+        Scenario('get_perishable_by_id', 'GET', f'/api/perishables/{item_id}'),
+        Scenario('create_perishable', 'POST', '/api/perishables', json=new_item()),
+        Scenario('update_perishable', 'PUT', f'/api/perishables/{item_id}', json={'quantity': 7}),
+        Scenario('delete_perishable', 'DELETE', '/api/perishables/<id>', request=delete('/api/perishables')),
+        Scenario('update_all_discounts', 'PATCH', '/api/perishables/update_discounts'),
+        Scenario('get_by_category', 'GET', f'/api/perishables/category/{category}', heavy=True),
+        Scenario('get_expiring_items', 'GET', '/api/perishables/expiring?days=2'),
+        Scenario('get_expiry_stats', 'GET', '/api/stats/expiry'),
+        Scenario('get_category_stats', 'GET', '/api/stats/categories'),
+        Scenario('get_db_pool_stats', 'GET', '/api/stats/db-pool'),
+        Scenario('get_cache_stats', 'GET', '/api/stats/cache'),
+        Scenario('get_snapshot_stats', 'GET', '/api/stats/snapshot'),
+        Scenario('get_metrics', 'GET', '/api/metrics'),
+        Scenario('import_csv', 'POST', '/api/import/csv (100 rows)', request=import_csv),
+        Scenario('list_import_jobs', 'GET', '/api/import/jobs'),
+        Scenario('get_import_job', 'GET', f'/api/import/jobs/{job.id}'),
+        Scenario('export_csv', 'GET', '/api/export/csv', heavy=True),
+        Scenario('export_catalog', 'GET', '/api/export/ndjson', heavy=True),
+        Scenario('get_changes', 'GET', '/api/changes?since=0&limit=1000'),
+        Scenario('stream_changes', 'GET', '/api/changes/stream?since=0', streamed=True),
+        Scenario('get_scheduler_runs', 'GET', '/api/scheduler/runs'),
+        Scenario('get_slow_queries', 'GET', '/api/admin/slow-queries?limit=100'),
+        # Re-applies the current threshold, so later scenarios log the same way
+        Scenario('update_slow_query_threshold', 'PATCH', '/api/admin/slow-queries', json={'threshold_ms': threshold}),
+        Scenario('clear_slow_queries', 'DELETE', '/api/admin/slow-queries'),
+        Scenario('seller.get_seller_items', 'GET', f'/api/seller/items?seller_name={seller}', heavy=True),
+        Scenario('seller.get_seller_items', 'GET', f'/api/seller/items?seller_name={seller}&limit=100'),
+        Scenario('seller.create_seller_item', 'POST', '/api/seller/items', json=new_item()),
+        Scenario('seller.update_seller_item', 'PUT', f'/api/seller/items/{item_id}', json={'quantity': 8}),
+        Scenario('seller.delete_seller_item', 'DELETE', '/api/seller/items/<id>', request=delete('/api/seller/items')),
+        Scenario('seller.toggle_item_active', 'PATCH', f'/api/seller/items/{item_id}/toggle-active'),
+        Scenario('seller.batch_seller_items', 'POST', '/api/seller/items/batch (12 ops)', request=batch),
+        Scenario('seller.get_seller_stats', 'GET', f'/api/seller/stats?seller_name={seller}'),
+        Scenario('public.get_public_items', 'GET', '/api/perishables/public', heavy=True),
+        Scenario('public.get_public_items', 'GET', f'/api/perishables/public?category={category}&limit=100'),
+        Scenario('public.search_public_items', 'GET', '/api/perishables/public/search?q=milk'),
+        Scenario('public.autocomplete_public_items', 'GET', '/api/perishables/public/autocomplete?q=str'),
+        Scenario('public.get_public_categories', 'GET', '/api/perishables/public/categories'),
+        Scenario('public.get_public_sellers', 'GET', '/api/perishables/public/sellers'),
+        Scenario('public.get_best_deals', 'GET', '/api/perishables/public/deals?limit=10'),
+    ]
+
+    if app_module.PYARROW_AVAILABLE:
+        scenarios.append(Scenario('export_catalog', 'GET', '/api/export/parquet', heavy=True))
+
+    # Last, since a run can move rows out of the hot table. With the default
+    # retention only items expired for over 30 days move (none unless
+    # --past-days is larger), so iterations time the steady-state nightly scan
+    scenarios += [
+        Scenario('run_archival', 'POST', '/api/admin/archive/run',
+                 json={'older_than_days': app_module.DEFAULT_ARCHIVE_AFTER_DAYS}),
+        Scenario('get_archive_partitions', 'GET', '/api/admin/archive'),
+        Scenario('get_archived_items', 'GET', f'/api/admin/archive/items?seller_name={seller}&limit=100'),
+    ]
+
+    return scenarios
+
+
+def uncovered_endpoints(app, scenarios: List[Scenario]) -> List[str]:
+    """Endpoints registered on the app that no scenario exercises."""
+    covered = {scenario.endpoint for scenario in scenarios}
+    return sorted(
+        rule.endpoint for rule in app.url_map.iter_rules()
+        if rule.endpoint != 'static' and rule.endpoint not in covered
+    )
+
+
+def _issue(scenario: Scenario, client, iteration: int) -> int:
+    """Issue one request and consume its body; return the status code."""
+    response = scenario.request(client, iteration)
+    try:
+        if scenario.streamed:
+            next(iter(response.response), None)
+        else:
+            response.get_data()
+        return response.status_code
+    finally:
+        response.close()
+
+
+def run_scenario(
+    scenario: Scenario,
+    client,
+    iterations: int,
+    warmup: int,
+    clear_cache: Optional[Callable[[], None]] = None
+) -> Dict[str, Any]:
+    """
+    Time one scenario.
+
+    Returns:
+        Dictionary with iterations, errors, latency percentiles (ms),
+        throughput (requests/s) and peak traced memory (KiB)
+    """
+    if scenario.heavy:
+        iterations = max(3, iterations // HEAVY_ITERATION_DIVISOR)
+
+    for i in range(warmup):
+        _issue(scenario, client, i)
+
+    timings = []
+    errors = 0
+    started = time.perf_counter()
+    for i in range(iterations):
+        if clear_cache:
+            clear_cache()
+        t0 = time.perf_counter()
+        status = _issue(scenario, client, i)
+        timings.append((time.perf_counter() - t0) * 1000)
+        if status >= 400:
+            errors += 1
+    total = time.perf_counter() - started
+
+    if clear_cache:
+        clear_cache()
+    tracemalloc.start()
+    try:
+        _issue(scenario, client, iterations)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    timings.sort()
+    return {
+        'endpoint': scenario.endpoint,
+        'iterations': iterations,
+        'errors': errors,
+        'p50_ms': round(percentile(timings, 50), 3),
+        'p95_ms': round(percentile(timings, 95), 3),
+        'p99_ms': round(percentile(timings, 99), 3),
+        'mean_ms': round(sum(timings) / len(timings), 3),
+        'max_ms': round(timings[-1], 3),
+        'throughput_rps': round(iterations / total, 2) if total > 0 else 0.0,
+        'peak_memory_kib': round(peak / 1024, 1)
+    }
+
+
+def compare_reports(
+    report: Dict[str, Any],
+    baseline: Dict[str, Any],
+    threshold: float
+) -> List[Dict[str, Any]]:
+    """
+    Find endpoints whose p95 latency regressed beyond threshold x baseline.
+
+    Returns:
+        List of regressions with name, baseline_p95_ms, p95_ms and ratio
+    """
+    regressions = []
+    for name, result in report['results'].items():
+        before = baseline.get('results', {}).get(name)
+        if not before or before['p95_ms'] <= 0:
+            continue
+        ratio = result['p95_ms'] / before['p95_ms']
+        if ratio > threshold:
+            regressions.append({
+                'name': name,
+                'baseline_p95_ms': before['p95_ms'],
+                'p95_ms': result['p95_ms'],
+                'ratio': round(ratio, 2)
+            })
+    return regressions
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Benchmark every Basket Buddy endpoint')
+    parser.add_argument('--items', type=int, default=10000, help='Catalog size')
+    parser.add_argument('--sellers', type=int, default=20, help='Distinct sellers')
+    parser.add_argument('--categories', type=int, default=8, help='Distinct categories')
+    parser.add_argument('--distribution', choices=EXPIRY_DISTRIBUTIONS, default='near',
+                        help='Expiry date distribution')
+    parser.add_argument('--future-days', type=int, default=30, help='Latest expiry offset')
+    parser.add_argument('--past-days', type=int, default=3, help='Oldest (expired) expiry offset')
+    parser.add_argument('--seed', type=int, default=42, help='Generator seed')
+    parser.add_argument('--iterations', type=int, default=50, help='Timed requests per scenario')
+    parser.add_argument('--warmup', type=int, default=3, help='Untimed requests per scenario')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Clear the response cache before every request')
+    parser.add_argument('--only', help='Regex; run only scenarios whose name matches')
+    parser.add_argument('--output', help='Write the JSON report to this file (default: stdout)')
+    parser.add_argument('--compare', help='Baseline JSON report to compare against')
+    parser.add_argument('--threshold', type=float, default=1.25,
+                        help='Allowed p95 ratio against the baseline')
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    output_path = os.path.abspath(args.output) if args.output else None
+    baseline_path = os.path.abspath(args.compare) if args.compare else None
+
+    # Run against a throwaway database; the scheduler would race the timings
+    workdir = tempfile.mkdtemp(prefix='basketbuddy-bench-')
+    os.environ['BASKETBUDDY_SCHEDULER'] = '0'
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    os.chdir(workdir)
+
+    import app as app_module
+
+    print(f"Generating {args.items} items in {workdir} ...", file=sys.stderr)
+    catalog = generate_catalog(
+        app_module.db, args.items, args.sellers, args.categories, args.distribution,
+        args.past_days, args.future_days, seed=args.seed
+    )
+    print(f"  done in {catalog['elapsed_seconds']}s", file=sys.stderr)
+
+    client = app_module.app.test_client()
+    scenarios = build_scenarios(app_module, catalog)
+    missing = uncovered_endpoints(app_module.app, scenarios)
+    if args.only:
+        pattern = re.compile(args.only)
+        scenarios = [scenario for scenario in scenarios if pattern.search(scenario.name)]
+
+    clear_cache = app_module.response_cache.clear if args.no_cache else None
+    results = {}
+    for scenario in scenarios:
+        result = run_scenario(scenario, client, args.iterations, args.warmup, clear_cache)
+        results[scenario.name] = result
+        print(
+            f"  {scenario.name:<70} p50 {result['p50_ms']:>9.2f}  p95 {result['p95_ms']:>9.2f}  "
+            f"p99 {result['p99_ms']:>9.2f} ms  {result['throughput_rps']:>9.1f} req/s  "
+            f"{result['peak_memory_kib']:>10.1f} KiB",
+            file=sys.stderr
+        )
+
+    report = {
+        'generated_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'environment': {
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform()
+        },
+        'catalog': {
+            'items': catalog['items'],
+            'sellers': len(catalog['sellers']),
+            'categories': len(catalog['categories']),
+            'distribution': catalog['distribution'],
+            'seed': catalog['seed'],
+            'generation_seconds': catalog['elapsed_seconds']
+        },
+        'settings': {
+            'iterations': args.iterations,
+            'warmup': args.warmup,
+            'response_cache': not args.no_cache
+        },
+        'uncovered_endpoints': missing,
+        'results': results
+    }
+
+    exit_code = 0
+    if baseline_path:
+        with open(baseline_path) as handle:
+            regressions = compare_reports(report, json.load(handle), args.threshold)
+        report['regressions'] = regressions
+        for regression in regressions:
+            print(
+                f"  REGRESSION {regression['name']}: p95 {regression['baseline_p95_ms']} -> "
+                f"{regression['p95_ms']} ms (x{regression['ratio']})",
+                file=sys.stderr
+            )
+        exit_code = 1 if regressions else 0
+
+    output = json.dumps(report, indent=2)
+    if output_path:
+        with open(output_path, 'w') as handle:
+            handle.write(output)
+    else:
+        print(output)
+
+    return exit_code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,272 @@
+"""
+Response Cache for Basket Buddy 2.0
+Day-aware, write-invalidated in-process cache for public read endpoints
+
+Validity Foundation:
+- A cached answer A(q) for query q depends only on the catalog state and
+  on today's date (discounts change only at the day boundary)
+- An entry is valid iff its write generation equals the current one and
+  it was computed on the current local date
+- The same (generation, date) version tags responses with strong ETags,
+  so clients can revalidate with a 304 instead of re-downloading
+- Last-Modified has one-second granularity, so it is only sent once the
+  second of the last write is over; until then the ETag alone validates
+"""
+
+from collections import OrderedDict
+from datetime import date, datetime, time, timezone
+from functools import wraps
+from time import time as unix_time
+from typing import Any, Callable, Dict, Optional, Tuple
+import hashlib
+import threading
+
+from flask import Response, make_response, request
+
+
+DEFAULT_MAX_ENTRIES = 512
+
+# Query parameters that bypass the cache (streamed responses are never cached)
+UNCACHEABLE_PARAMS = ('stream',)
+
+
+class ResponseCache:
+    """
+    LRU cache of serialized JSON responses.
+
+    Entries are tagged with the catalog write generation and the local date
+    they were computed on. A lookup with a different generation or date is a
+    miss, so writes and midnight roll-over invalidate automatically.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of cached responses (LRU eviction)
+        """
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple, Tuple[int, date, bytes, int, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._day = date.today()
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'stores': 0,
+            'evictions': 0,
+            'invalidations': 0,
+        }
+
+    def get(self, key: Tuple, generation: int) -> Optional[Tuple[bytes, int, str]]:
+        """
+        Look up a cached response.
+
+        Args:
+            key: Normalized request key
+            generation: Current catalog write generation
+
+        Returns:
+            Tuple of (body, status, mimetype), or None on a miss
+        """
+        today = date.today()
+        with self._lock:
+            if today != self._day:
+                # Local midnight passed: every discount may have changed
+                self._stats['invalidations'] += len(self._entries)
+                self._entries.clear()
+                self._day = today
+
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats['misses'] += 1
+                return None
+
+            entry_generation, entry_day, body, status, mimetype = entry
+            if entry_generation != generation or entry_day != today:
+                del self._entries[key]
+                self._stats['invalidations'] += 1
+                self._stats['misses'] += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._stats['hits'] += 1
+            return body, status, mimetype
+
+    def put(self, key: Tuple, generation: int, body: bytes, status: int, mimetype: str) -> None:
+        """
+        Store a response computed at the given write generation.
+
+        Args:
+            key: Normalized request key
+            generation: Write generation the response was computed at
+            body: Serialized response body
+            status: HTTP status code
+            mimetype: Response MIME type
+        """
+        with self._lock:
+            self._entries[key] = (generation, date.today(), body, status, mimetype)
+            self._entries.move_to_end(key)
+            self._stats['stores'] += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def clear(self) -> None:
+        """Drop every cached response."""
+        with self._lock:
+            self._stats['invalidations'] += len(self._entries)
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache metrics.
+
+        Returns:
+            Dictionary of hit/miss counters, hit ratio and size
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size'] = len(self._entries)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_ratio'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+        stats['max_entries'] = self.max_entries
+        return stats
+
+
+def request_cache_key() -> Optional[Tuple]:
+    """
+    Build a normalized cache key for the current request.
+    Parameter order and blank values do not affect the key.
+
+    Returns:
+        Hashable key, or None if the request must not be cached
+    """
+    if any(param in request.args for param in UNCACHEABLE_PARAMS):
+        return None
+    params = tuple(sorted(
+        (name, value) for name, value in request.args.items(multi=True) if value != ''
+    ))
+    return (request.path, params)
+
+
+# Process-wide cache shared by the app and all blueprints
+response_cache = ResponseCache()
+
+
+def cached_response(generation: Callable[[], int], cache: ResponseCache = response_cache):
+    """
+    Decorator caching successful JSON responses of a GET view.
+
+    Args:
+        generation: Callable returning the current catalog write generation
+        cache: Cache instance (default: the process-wide response_cache)
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            key = request_cache_key()
+            if key is None:
+                return view(*args, **kwargs)
+
+            current = generation()
+            hit = cache.get(key, current)
+            if hit is not None:
+                body, status, mimetype = hit
+                return Response(body, status=status, mimetype=mimetype)
+
+            rv = view(*args, **kwargs)
+            response, status = (rv[0], rv[1]) if isinstance(rv, tuple) else (rv, None)
+            if isinstance(response, Response) and not response.is_streamed:
+                status = status or response.status_code
+                if status == 200:
+                    cache.put(key, current, response.get_data(), status, response.mimetype)
+            return rv
+        return wrapper
+    return decorator
+
+
+def catalog_etag(generation: int, day: date, key: Tuple) -> str:
+    """
+    Build the strong ETag of a representation.
+
+    Args:
+        generation: Catalog write generation
+        day: Local date the discounts are computed for
+        key: Request path and query parameters
+
+    Returns:
+        Unquoted entity tag
+    """
+    digest = hashlib.blake2s(repr(key).encode('utf-8'), digest_size=6).hexdigest()
+    return f"{generation}-{day.strftime('%Y%m%d')}-{digest}"
+
+
+def catalog_last_modified(modified_at: int, day: date, now: Optional[float] = None) -> Optional[datetime]:
+    """
+    Time the catalog last changed: the last write or local midnight
+    (when every discount rolls over), whichever is later.
+
+    While the second of the last write is still current, another write in
+    the same second would not move this time, so a client holding it would
+    wrongly be told nothing changed. No time is given until the second is
+    over.
+
+    Args:
+        modified_at: Unix time of the last write
+        day: Current local date
+        now: Current Unix time (default: time.time())
+
+    Returns:
+        Timezone-aware UTC datetime, or None while the last write's second
+        is still current
+    """
+    if modified_at >= int(unix_time() if now is None else now):
+        return None
+    midnight = datetime.combine(day, time.min).astimezone(timezone.utc)
+    return max(datetime.fromtimestamp(modified_at, timezone.utc), midnight)
+
+
+def conditional_get(version: Callable[[], Tuple[int, int]]):
+    """
+    Decorator adding ETag / Last-Modified headers to a GET view and
+    answering matching If-None-Match / If-Modified-Since requests with 304.
+
+    The catalog version is read before the view runs, so a 304 costs one
+    primary-key lookup and no query or serialization. A write racing the
+    view can only make the tag older than the body, which forces a full
+    response on the next request rather than hiding the change.
+
+    Args:
+        version: Callable returning (write_generation, modified_at)
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            generation, modified_at = version()
+            today = date.today()
+            key = (request.path, tuple(sorted(request.args.items(multi=True))))
+            etag = catalog_etag(generation, today, key)
+            last_modified = catalog_last_modified(modified_at, today)
+
+            if request.if_none_match:
+                not_modified = request.if_none_match.contains_weak(etag)
+            elif request.if_modified_since and last_modified is not None:
+                not_modified = last_modified <= request.if_modified_since
+            else:
+                not_modified = False
+
+            if not_modified:
+                response = Response(status=304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag)
+            if last_modified is not None:
+                response.last_modified = last_modified
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,274 @@
+"""
+Change Feed for Basket Buddy 2.0
+Delta sync and live push of catalog changes from the change log
+
+Sequence Foundation:
+- Every write appends an entry e with a strictly increasing seq(e)
+- A client holding the state after s reaches the current state by applying
+  Δ(s) = {e : seq(e) > s}, so it only transfers what changed
+- Entries of Δ(s) for the same item collapse to the latest one, since the
+  client replaces the whole item (or drops it on a tombstone)
+"""
+
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional
+import json
+import os
+import threading
+import time
+
+from database import Database
+
+
+# Default and maximum entries per delta page
+CHANGE_PAGE_LIMIT = 1000
+MAX_CHANGE_PAGE_LIMIT = 5000
+
+# Seconds between change log checks of the shared poller
+STREAM_POLL_INTERVAL = 1.0
+
+# Seconds of silence before a keep-alive comment is sent
+STREAM_HEARTBEAT_SECONDS = 15
+
+# Seconds a stream stays open; EventSource reconnects with Last-Event-ID
+STREAM_MAX_SECONDS = 300
+
+# Client reconnect delay advertised to EventSource (milliseconds)
+STREAM_RETRY_MS = 3000
+
+# Streams one worker process keeps open at most (empty: no limit). Each open
+# stream holds a server thread, so the limit must leave threads for the API
+MAX_STREAMS_ENV = 'BASKETBUDDY_MAX_STREAMS'
+
+
+def compact_changes(entries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Keep only the latest entry per item, preserving sequence order.
+
+    Args:
+        entries: Change log entries ordered by seq
+
+    Returns:
+        Compacted entries ordered by seq
+    """
+    latest = {entry['item_id']: entry for entry in entries}
+    return sorted(latest.values(), key=lambda entry: entry['seq'])
+
+
+def build_delta(
+    db: Database,
+    since: int,
+    serialize: Callable[[List[Dict[str, Any]]], List[Dict[str, Any]]],
+    limit: int = CHANGE_PAGE_LIMIT,
+    seller_name: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Build one page of changes after `since`.
+
+    Non-delete entries carry the item's current state; `item` is None when
+    the item no longer exists. Clients upsert items and drop tombstones,
+    then continue from next_since.
+
+    Args:
+        db: Database instance
+        since: Last sequence number the client has applied
+        serialize: Function converting database rows into JSON dictionaries
+        limit: Maximum change log entries read
+        seller_name: Only changes to this seller's items (optional)
+
+    Returns:
+        Dictionary with changes, next_since, has_more and latest_seq, or
+        reset_required=True if entries after `since` were pruned
+    """
+    # Bounds are read first: anything logged later has seq > latest and is
+    # picked up by the next call, so advancing to latest never skips entries
+    floor, latest = db.get_change_log_bounds()
+    if since < floor:
+        return {'reset_required': True, 'since': since, 'latest_seq': latest}
+
+    entries = db.get_changes(since, limit + 1, seller_name)
+    has_more = len(entries) > limit
+    del entries[limit:]
+
+    if has_more:
+        next_since = entries[-1]['seq']
+    else:
+        next_since = max([latest] + [entry['seq'] for entry in entries[-1:]])
+
+    entries = compact_changes(entries)
+    rows = db.get_items_by_ids([
+        entry['item_id'] for entry in entries if entry['op'] != 'delete'
+    ])
+    items = dict(zip(rows.keys(), serialize(list(rows.values()))))
+
+    changes = [
+        {
+            'seq': entry['seq'],
+            'op': entry['op'],
+            'item_id': entry['item_id'],
+            'seller_name': entry['seller_name'],
+            'changed_at': datetime.fromtimestamp(entry['changed_at']).isoformat(),
+            'item': None if entry['op'] == 'delete' else items.get(entry['item_id'])
+        }
+        for entry in entries
+    ]
+
+    return {
+        'reset_required': False,
+        'since': since,
+        'next_since': next_since,
+        'has_more': has_more,
+        'latest_seq': latest,
+        'changes': changes
+    }
+
+
+class ChangeFeed:
+    """
+    Push change log entries to connected server-sent-event clients.
+
+    One poller thread per process watches the latest sequence number and
+    wakes every waiting stream, so the database is polled once per
+    interval regardless of how many clients are connected. Polling (rather
+    than in-process notification) also sees writes made by other workers.
+
+    Every open stream occupies a server thread for up to STREAM_MAX_SECONDS,
+    so at most max_streams are admitted per process.
+    """
+
+    def __init__(
+        self,
+        db: Database,
+        poll_interval: float = STREAM_POLL_INTERVAL,
+        max_streams: Optional[int] = None
+    ):
+        """
+        Initialize the feed.
+
+        Args:
+            db: Database instance
+            poll_interval: Seconds between change log checks
+            max_streams: Open streams allowed (default: BASKETBUDDY_MAX_STREAMS, unlimited if unset)
+        """
+        self.db = db
+        self.poll_interval = poll_interval
+        if max_streams is None:
+            limit = os.environ.get(MAX_STREAMS_ENV, '').strip()
+            max_streams = int(limit) if limit else None
+        self.max_streams = max_streams
+        self._condition = threading.Condition()
+        self._latest = 0
+        self._subscribers = 0
+        self._streams = 0
+        self._poller: Optional[threading.Thread] = None
+
+    def acquire_stream(self) -> bool:
+        """
+        Reserve a stream slot; release it with release_stream when the
+        response closes.
+
+        Returns:
+            False if max_streams streams are already open
+        """
+        with self._condition:
+            if self.max_streams is not None and self._streams >= self.max_streams:
+                return False
+            self._streams += 1
+            return True
+
+    def release_stream(self) -> None:
+        """Free a slot reserved by acquire_stream."""
+        with self._condition:
+            self._streams -= 1
+
+    def _subscribe(self) -> None:
+        with self._condition:
+            self._subscribers += 1
+            if self._poller is None:
+                self._latest = self.db.get_change_log_bounds()[1]
+                self._poller = threading.Thread(
+                    target=self._poll, name='change-feed-poller', daemon=True
+                )
+                self._poller.start()
+
+    def _unsubscribe(self) -> None:
+        with self._condition:
+            self._subscribers -= 1
+
+    def _poll(self) -> None:
+        """Publish the latest seq until the last subscriber leaves."""
+        while True:
+            time.sleep(self.poll_interval)
+            with self._condition:
+                if self._subscribers <= 0:
+                    self._poller = None
+                    return
+            try:
+                latest = self.db.get_change_log_bounds()[1]
+            except Exception:
+                continue
+            with self._condition:
+                if latest != self._latest:
+                    self._latest = latest
+                    self._condition.notify_all()
+
+    def wait_for_change(self, after: int, timeout: float) -> bool:
+        """
+        Block until an entry newer than `after` is logged.
+
+        Args:
+            after: Latest sequence number already handled
+            timeout: Maximum seconds to wait
+
+        Returns:
+            True if there are new entries, False on timeout
+        """
+        with self._condition:
+            return self._condition.wait_for(lambda: self._latest > after, timeout)
+
+    def stream(
+        self,
+        since: int,
+        serialize: Callable[[List[Dict[str, Any]]], List[Dict[str, Any]]],
+        seller_name: Optional[str] = None,
+        max_seconds: float = STREAM_MAX_SECONDS
+    ) -> Iterator[str]:
+        """
+        Generate a server-sent-event stream of changes after `since`.
+
+        Each change is a message whose id is its seq, so a reconnecting
+        EventSource resumes via Last-Event-ID. A 'reset' event tells the
+        client to reload in full because the history it needs was pruned.
+
+        Args:
+            since: Last sequence number the client has applied
+            serialize: Function converting database rows into JSON dictionaries
+            seller_name: Only changes to this seller's items (optional)
+            max_seconds: Seconds before the stream ends (client reconnects)
+
+        Yields:
+            Server-sent-event frames
+        """
+        self._subscribe()
+        try:
+            yield f'retry: {STREAM_RETRY_MS}\n\n'
+            deadline = time.monotonic() + max_seconds
+
+            while time.monotonic() < deadline:
+                delta = build_delta(self.db, since, serialize, seller_name=seller_name)
+                if delta['reset_required']:
+                    yield f"event: reset\ndata: {json.dumps({'latest_seq': delta['latest_seq']})}\n\n"
+                    return
+
+                for change in delta['changes']:
+                    yield f"id: {change['seq']}\ndata: {json.dumps(change)}\n\n"
+
+                since = delta['next_since']
+                if delta['has_more']:
+                    continue
+
+                timeout = min(STREAM_HEARTBEAT_SECONDS, max(deadline - time.monotonic(), 0))
+                if not self.wait_for_change(delta['latest_seq'], timeout):
+                    yield ': keep-alive\n\n'
+        finally:
+            self._unsubscribe()
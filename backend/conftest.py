@@ -0,0 +1,72 @@
+"""
+Shared pytest fixtures for the Basket Buddy backend tests.
+
+Databases live in temporary directories. The app opens its database by a
+relative path, so it is imported once, from inside a temporary directory,
+and the session stays there; tests must not import app at module level.
+"""
+
+from datetime import date, timedelta
+import importlib
+import os
+import sys
+
+import pytest
+
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Standalone smoke script, run as `python test_backend.py`
+collect_ignore = ['test_backend.py']
+
+# Background work that would race the assertions
+os.environ.setdefault('BASKETBUDDY_SCHEDULER', '0')
+os.environ.setdefault('BASKETBUDDY_SLOW_QUERY_LOG', '')
+
+
+def days_from_today(days: int) -> str:
+    """ISO date `days` days from today."""
+    return (date.today() + timedelta(days=days)).isoformat()
+
+
+def make_item(**overrides):
+    """Database record for a test item (expires in 2 days by default)."""
+    item = {
+        'item_name': 'Test Milk',
+        'category': 'Dairy',
+        'quantity': 10,
+        'base_price': 4.0,
+        'expiry_date': days_from_today(2),
+        'discounted_price': 2.0,
+        'seller_name': 'Test Seller',
+        'is_active': 1,
+    }
+    item.update(overrides)
+    return item
+
+
+@pytest.fixture
+def db(tmp_path):
+    """A Database on a fresh file."""
+    from database import Database
+    return Database(str(tmp_path / 'test.db'))
+
+
+@pytest.fixture(scope='session')
+def app_module(tmp_path_factory):
+    """
+    The Flask application module, imported once against a throwaway
+    database. The app opens 'perishable_items.db' relative to the cwd on
+    every new connection, so the session stays in that directory.
+    """
+    os.chdir(tmp_path_factory.mktemp('app'))
+    return importlib.import_module('app')
+
+
+@pytest.fixture
+def client(app_module):
+    """Flask test client on an emptied catalog."""
+    app_module.db.clear_all_items()
+    app_module.response_cache.clear()
+    app_module.catalog_snapshot.refresh()
+    return app_module.app.test_client()
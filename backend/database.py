@@ -8,44 +8,626 @@ Set Theory Foundation:
 """
 
 import sqlite3
-from typing import List, Optional, Dict, Any
-from datetime import datetime, date
+from typing import List, Optional, Dict, Any, Tuple, Iterator, Callable
+from datetime import datetime, date, timedelta
 from contextlib import contextmanager
+import json
 import os
+import re
+import threading
+import time
+
+from pricing import price_one, max_days_for_discount, discount_sql, category_policies_registered
+from query_log import SlowQueryLog, DEFAULT_SLOW_QUERY_MS
+from write_queue import create_write_queue, group_committed
+
+
+# Public catalog visibility: only active items that have not yet expired.
+PUBLIC_ITEM_FILTER = 'is_active = 1 AND expiry_date > ?'
+
+# Slow-query log: threshold in milliseconds (empty disables) and log file
+# (default: slow_queries.log next to the database; empty disables the file)
+SLOW_QUERY_MS_ENV = 'BASKETBUDDY_SLOW_QUERY_MS'
+SLOW_QUERY_LOG_ENV = 'BASKETBUDDY_SLOW_QUERY_LOG'
+
+# Number of per-seller shard files (see sharding.py); 0 or 1 keeps one file
+SHARDS_ENV = 'BASKETBUDDY_SHARDS'
+
+# Columns that update_item may change
+UPDATABLE_COLUMNS = [
+    'item_name', 'category', 'quantity', 'base_price', 'cost_price', 'shelf_life',
+    'expiry_date', 'discounted_price', 'seller_name', 'is_active'
+]
+
+# Advances the catalog write generation. Run once per committed transaction
+# that changed perishable_items, however many rows it touched
+BUMP_GENERATION_SQL = '''
+    UPDATE catalog_state
+    SET write_generation = write_generation + 1,
+        modified_at = CAST(strftime('%s', 'now') AS INTEGER)
+    WHERE id = 1
+'''
+
+# Columns the discounted price depends on; an update touching any of them
+# reprices the row, wherever its new expiry date falls
+PRICING_COLUMNS = ('expiry_date', 'base_price', 'quantity', 'category')
+
+# Whitelisted ORDER BY clauses for the public catalog query builder.
+# Under a single policy discount is monotonically decreasing in days_to_expiry,
+# so "highest discount first" is exactly "soonest expiry first" and can be
+# served by the index; with category policies see public_order_by.
+PUBLIC_SORT_ORDERS = {
+    'discount': 'expiry_date ASC, id ASC',
+    'price': 'discounted_price ASC, id ASC',
+    'expiry': 'expiry_date ASC, id ASC',
+}
+
+# Sort orders compatible with keyset pagination on (expiry_date, id)
+KEYSET_SORT_ORDERS = {'expiry_date ASC, id ASC'}
+
+
+# SQL expression for days_to_expiry relative to a bound ISO date
+DAYS_TO_EXPIRY_SQL = 'CAST(julianday(expiry_date) - julianday(?) AS INTEGER)'
+
+
+def days_to_expiry_sql(day: date) -> str:
+    """
+    DAYS_TO_EXPIRY_SQL with the date inlined, for expressions that repeat
+    it (pricing.discount_sql has one branch per category policy).
+    """
+    return f"CAST(julianday(expiry_date) - julianday('{day.isoformat()}') AS INTEGER)"
+
+
+def sorts_by_policy_discount(sort_by: str) -> bool:
+    """
+    Whether a public sort must order by the computed discount itself.
+    Category policies can give a later-expiring item the larger discount,
+    so expiry order is no longer discount order.
+    """
+    return sort_by == 'discount' and category_policies_registered()
+
+
+def public_order_by(sort_by: str, day: date) -> str:
+    """
+    ORDER BY clause of a public catalog sort.
+    
+    Args:
+        sort_by: One of 'discount', 'price', 'expiry'
+        day: Date the discounts are computed for
+        
+    Returns:
+        Clause from PUBLIC_SORT_ORDERS, or discount DESC, expiry_date, id
+        while category policies are registered (not keyset-paginable)
+    """
+    if sorts_by_policy_discount(sort_by):
+        return f'{discount_sql(days_to_expiry_sql(day))} DESC, expiry_date ASC, id ASC'
+    return PUBLIC_SORT_ORDERS.get(sort_by, PUBLIC_SORT_ORDERS['expiry'])
+
+
+def group_stats_from_totals(group_by: str, totals: List[Tuple]) -> List[Dict[str, Any]]:
+    """
+    Public group statistics from per-group totals.
+    
+    Args:
+        group_by: Either 'category' or 'seller_name'
+        totals: Tuples of (group key, item count, discount sum, earliest expiry)
+        
+    Returns:
+        List of dictionaries with group key, item_count and avg_discount,
+        ordered by earliest expiry, then key
+    """
+    ordered = sorted(totals, key=lambda total: (total[3], total[0]))
+    return [
+        {group_by: key, 'item_count': count, 'avg_discount': round(discount_sum / count, 2)}
+        for key, count, discount_sum, _ in ordered
+    ]
+
+
+# Per-connection tuning applied by the connection pool.
+# WAL lets readers proceed while a seller write is in progress; NORMAL
+# synchronous is durable across application crashes in WAL mode.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -20000,  # Negative value = size in KiB (~20 MB per connection)
+    'busy_timeout': 5000,  # Milliseconds to wait on a locked database
+    'temp_store': 'MEMORY',
+}
+
+
+# Full-text index over the searchable catalog columns (external content:
+# the index stores tokens only and reads rows back from perishable_items)
+SEARCH_TABLE = 'perishable_items_fts'
+SEARCH_COLUMNS = ['item_name', 'category', 'seller_name']
+
+# bm25 column weights: a name match outranks a category or seller match
+SEARCH_RANK_SQL = f'bm25({SEARCH_TABLE}, 10.0, 2.0, 1.0)'
+
+SEARCH_TOKEN_PATTERN = re.compile(r'\w+', re.UNICODE)
+
+
+def fts_match_expression(
+    text: str,
+    prefix: str = 'last',
+    column: Optional[str] = None
+) -> Optional[str]:
+    """
+    Turn free text into a safe FTS5 MATCH expression.
+    
+    Every word becomes a quoted term (so user input can never inject FTS
+    syntax) and all terms must match. By default the last term matches as
+    a prefix, so results appear while the user is still typing.
+    
+    Args:
+        text: Raw search text
+        prefix: 'last' (default), 'all' or None - which terms match as prefixes
+        column: Restrict matching to one indexed column
+        
+    Returns:
+        MATCH expression, or None if the text contains no searchable words
+    """
+    tokens = SEARCH_TOKEN_PATTERN.findall(text or '')
+    if not tokens:
+        return None
+    
+    terms = [f'"{token}"' for token in tokens]
+    if prefix == 'all':
+        terms = [f'{term}*' for term in terms]
+    elif prefix == 'last':
+        terms[-1] += '*'
+    
+    expression = ' '.join(terms)
+    if column:
+        expression = f'{column} : ({expression})'
+    return expression
+
+
+# Change log: content columns whose change makes an update an 'update'
+# (otherwise an is_active change is a 'toggle' and a discounted_price
+# change is a 'reprice')
+CHANGE_CONTENT_COLUMNS = [
+    'item_name', 'category', 'quantity', 'base_price', 'cost_price',
+    'shelf_life', 'expiry_date', 'seller_name'
+]
+
+# Days of change history kept for delta sync
+CHANGE_LOG_RETENTION_DAYS = 7
+
+# Columns of perishable_items copied into catalog snapshots (snapshot.py)
+SNAPSHOT_COLUMNS = [
+    'id', 'item_name', 'category', 'quantity', 'base_price', 'cost_price', 'shelf_life',
+    'expiry_date', 'discounted_price', 'seller_name', 'is_active', 'created_at', 'updated_at'
+]
+
+# Month-partitioned archive of long-expired items (see archiver.py): one
+# table per expiry month, archive_items_YYYY_MM, with the snapshot columns
+ARCHIVE_TABLE_PREFIX = 'archive_items_'
+ARCHIVE_UNDATED = 'undated'
+ARCHIVE_MONTH_PATTERN = re.compile(r'(\d{4})-(\d{2})')
+
+
+def archive_month(expiry_date: Any) -> str:
+    """Archive partition (YYYY-MM) of an expiry date, or 'undated'."""
+    match = ARCHIVE_MONTH_PATTERN.match(str(expiry_date or ''))
+    return f'{match.group(1)}-{match.group(2)}' if match else ARCHIVE_UNDATED
+
+
+def archive_table(month: str) -> str:
+    """
+    Name of the archive table of a partition.
+    
+    Raises:
+        ValueError: If month is neither YYYY-MM nor 'undated'
+    """
+    if month != ARCHIVE_UNDATED and not ARCHIVE_MONTH_PATTERN.fullmatch(month):
+        raise ValueError(f"Invalid archive month: {month} (expected YYYY-MM)")
+    return ARCHIVE_TABLE_PREFIX + month.replace('-', '_')
+
+
+# Summary tables maintained by triggers: table -> group key expression
+SUMMARY_TABLES = {
+    'seller_summary': "COALESCE({row}.seller_name, 'Admin')",
+    'category_summary': '{row}.category',
+}
+
+# Columns whose change moves an item between summary buckets or changes its sums
+SUMMARY_SOURCE_COLUMNS = [
+    'seller_name', 'category', 'expiry_date', 'is_active', 'quantity',
+    'base_price', 'cost_price', 'discounted_price'
+]
+
+# Per-item contributions; cost_price defaults to 70% of base price like PerishableItem
+SUMMARY_REVENUE_SQL = 'COALESCE({row}.discounted_price, {row}.base_price) * {row}.quantity'
+SUMMARY_COST_SQL = 'COALESCE({row}.cost_price, {row}.base_price * 0.7) * {row}.quantity'
+
+
+def _summary_delta_sql(table: str, key: str, row: str, sign: int) -> str:
+    """
+    Trigger statement adding (sign=1) or removing (sign=-1) one item's
+    contribution to its summary bucket.
+    """
+    return f'''
+        INSERT INTO {table}
+        (group_key, expiry_date, is_active, item_count, quantity_sum, revenue_sum, cost_sum)
+        VALUES (
+            {key.format(row=row)}, {row}.expiry_date, COALESCE({row}.is_active, 1),
+            {sign}, {sign} * {row}.quantity,
+            {sign} * {SUMMARY_REVENUE_SQL.format(row=row)},
+            {sign} * {SUMMARY_COST_SQL.format(row=row)}
+        )
+        ON CONFLICT (group_key, expiry_date, is_active) DO UPDATE SET
+            item_count = item_count + excluded.item_count,
+            quantity_sum = quantity_sum + excluded.quantity_sum,
+            revenue_sum = revenue_sum + excluded.revenue_sum,
+            cost_sum = cost_sum + excluded.cost_sum;
+    '''
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """
+    Cursor reporting every statement to the pool's query observers.
+    
+    SQLite does most of a query's work while rows are stepped, so a
+    statement's elapsed time covers execute plus every fetch, and it is
+    reported once it is finished: results exhausted, cursor re-executed,
+    closed or released.
+    """
+    
+    _statement = None
+    
+    def _begin(self, sql: str, parameters: Any, elapsed: float) -> None:
+        self._statement = [sql, parameters, elapsed, 0]
+    
+    def _account(self, elapsed: float, rows: int) -> None:
+        if self._statement is not None:
+            self._statement[2] += elapsed
+            self._statement[3] += rows
+    
+    def _finish(self) -> None:
+        statement, self._statement = self._statement, None
+        if statement is not None:
+            self.connection.pool.observe(*statement)
+    
+    def execute(self, sql: str, parameters: Any = ()):
+        self._finish()
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._begin(sql, parameters, time.perf_counter() - started)
+    
+    def executemany(self, sql: str, seq_of_parameters: Any):
+        self._finish()
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self._begin(sql, None, time.perf_counter() - started)
+            self._finish()
+    
+    def fetchone(self):
+        started = time.perf_counter()
+        row = super().fetchone()
+        self._account(time.perf_counter() - started, 1 if row is not None else 0)
+        if row is None:
+            self._finish()
+        return row
+    
+    def fetchmany(self, size: Optional[int] = None):
+        started = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._account(time.perf_counter() - started, len(rows))
+        if not rows:
+            self._finish()
+        return rows
+    
+    def fetchall(self):
+        started = time.perf_counter()
+        rows = super().fetchall()
+        self._account(time.perf_counter() - started, len(rows))
+        self._finish()
+        return rows
+    
+    def __next__(self):
+        started = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._account(time.perf_counter() - started, 0)
+            self._finish()
+            raise
+        self._account(time.perf_counter() - started, 1)
+        return row
+    
+    def close(self) -> None:
+        self._finish()
+        super().close()
+    
+    def __del__(self):
+        try:
+            self._finish()
+        except Exception:
+            pass
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """Connection whose cursors report statements to their pool."""
+    
+    pool = None
+    
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+    
+    def execute(self, sql: str, parameters: Any = ()):
+        return self.cursor().execute(sql, parameters)
+    
+    def executemany(self, sql: str, seq_of_parameters: Any):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+class ConnectionPool:
+    """
+    Pool of persistent SQLite connections, one per thread.
+    
+    Each thread reuses its own connection for the lifetime of the process,
+    so queries no longer pay the connect and PRAGMA setup cost. Connections
+    are reopened after a fork so gunicorn workers never share a handle.
+    """
+    
+    def __init__(self, db_path: str, pragmas: Optional[Dict[str, Any]] = None):
+        """
+        Initialize the pool.
+        
+        Args:
+            db_path: Path to SQLite database file
+            pragmas: PRAGMA settings applied to every new connection
+        """
+        self.db_path = db_path
+        self.pragmas = dict(SQLITE_PRAGMAS if pragmas is None else pragmas)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections: Dict[int, sqlite3.Connection] = {}
+        self._pid = os.getpid()
+        self._stats = {
+            'connections_opened': 0,
+            'connections_closed': 0,
+            'checkouts': 0,
+            'reuses': 0,
+        }
+        self.observers: List[Callable[[str, Any, float, int], None]] = []
+    
+    def add_observer(self, observer: Callable[[str, Any, float, int], None]) -> None:
+        """
+        Register a callable notified of every finished statement.
+        
+        Args:
+            observer: Called as observer(sql, parameters, elapsed_seconds, rows)
+        """
+        if observer not in self.observers:
+            self.observers.append(observer)
+    
+    def observe(self, sql: str, parameters: Any, elapsed: float, rows: int) -> None:
+        """Notify the observers of a finished statement (observer errors are ignored)."""
+        for observer in self.observers:
+            try:
+                observer(sql, parameters, elapsed, rows)
+            except Exception:
+                pass
+    
+    def connect(self) -> sqlite3.Connection:
+        """
+        Open a configured connection that is not owned by the pool.
+        Used for long-running reads such as streamed exports.
+        
+        Returns:
+            sqlite3.Connection configured with the pool PRAGMAs
+        """
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, factory=InstrumentedConnection)
+        conn.pool = self
+        conn.row_factory = sqlite3.Row  # Enable column access by name
+        for name, value in self.pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+    
+    def _open(self) -> sqlite3.Connection:
+        """Open and configure a new connection for the current thread."""
+        conn = self.connect()
+        
+        with self._lock:
+            self._prune_dead_threads()
+            self._connections[threading.get_ident()] = conn
+            self._stats['connections_opened'] += 1
+        return conn
+    
+    def _prune_dead_threads(self) -> None:
+        """Close connections owned by threads that have exited. Caller holds the lock."""
+        alive = {thread.ident for thread in threading.enumerate()}
+        for ident in [ident for ident in self._connections if ident not in alive]:
+            self._connections.pop(ident).close()
+            self._stats['connections_closed'] += 1
+    
+    def _reset_after_fork(self) -> None:
+        """Drop connections inherited from the parent process."""
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = {}
+        self._pid = os.getpid()
+    
+    def acquire(self) -> sqlite3.Connection:
+        """
+        Get the persistent connection of the current thread.
+        
+        Returns:
+            sqlite3.Connection configured with the pool PRAGMAs
+        """
+        if self._pid != os.getpid():
+            self._reset_after_fork()
+        
+        conn = getattr(self._local, 'conn', None)
+        with self._lock:
+            self._stats['checkouts'] += 1
+            if conn is not None:
+                self._stats['reuses'] += 1
+        
+        if conn is None:
+            conn = self._open()
+            self._local.conn = conn
+        return conn
+    
+    def close_all(self) -> None:
+        """Close every pooled connection (e.g. on shutdown or in tests)."""
+        with self._lock:
+            for conn in self._connections.values():
+                conn.close()
+                self._stats['connections_closed'] += 1
+            self._connections = {}
+        self._local = threading.local()
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get pool statistics for monitoring.
+        
+        Returns:
+            Dictionary of pool counters and settings
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats['open_connections'] = len(self._connections)
+        stats['db_path'] = self.db_path
+        stats['pid'] = self._pid
+        stats['pragmas'] = dict(self.pragmas)
+        return stats
 
 
 class Database:
     """
     Database manager for perishable items using SQLite.
     Provides CRUD operations and transaction management.
+    With BASKETBUDDY_GROUP_COMMIT_MS set, single-item writes made outside
+    a transaction are group committed by a writer thread (see write_queue.py).
     """
     
+    # Whether get_changes / get_change_log_bounds can serve delta sync
+    change_log_available = True
+    
     def __init__(self, db_path: str = 'perishable_items.db'):
         """
-        Initialize database connection.
+        Initialize database connection pool.
         
         Args:
             db_path: Path to SQLite database file
         """
         self.db_path = db_path
+        self.pool = ConnectionPool(db_path)
+        self._local = threading.local()
+        self.search_available = False
+        self.slow_queries = self._create_slow_query_log()
+        self.add_query_observer(self.slow_queries.observe)
+        self.write_queue = create_write_queue(self)
         self.init_database()
     
     @contextmanager
     def get_connection(self):
         """
         Context manager for database connections.
-        Ensures proper connection handling and cleanup.
+        Checks out the thread's pooled connection and wraps the block in a
+        transaction. Nested blocks join the outermost transaction, which
+        bumps the write generation once before committing if any block
+        changed the catalog.
         """
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row  # Enable column access by name
+        conn = self.pool.acquire()
+        depth = getattr(self._local, 'depth', 0)
+        self._local.depth = depth + 1
         try:
             yield conn
-            conn.commit()
+            if depth == 0:
+                if getattr(self._local, 'catalog_written', False):
+                    conn.execute(BUMP_GENERATION_SQL)
+                conn.commit()
         except Exception as e:
-            conn.rollback()
+            if depth == 0:
+                conn.rollback()
             raise e
         finally:
-            conn.close()
+            self._local.depth = depth
+            if depth == 0:
+                self._local.catalog_written = False
+    
+    def _catalog_written(self, rows: int = 1) -> None:
+        """
+        Record that the open transaction changed `rows` catalog rows.
+        The write generation is bumped when the outermost block commits.
+        """
+        if rows:
+            self._local.catalog_written = True
+    
+    @contextmanager
+    def transaction(self, single_shard: bool = False):
+        """
+        Context manager for an explicit write transaction.
+        Takes the write lock up front (BEGIN IMMEDIATE) so a multi-statement
+        read-modify-write cannot be interleaved with another writer.
+        Database methods called inside the block join this transaction.
+        
+        Args:
+            single_shard: Same signature as ShardedDatabase.transaction (one
+                          file is always a single shard)
+        """
+        with self.get_connection() as conn:
+            if not conn.in_transaction:
+                conn.execute('BEGIN IMMEDIATE')
+            yield conn
+    
+    def add_query_observer(self, observer: Callable[[str, Any, float, int], None]) -> None:
+        """
+        Register a callable notified of every finished SQL statement.
+        
+        Args:
+            observer: Called as observer(sql, parameters, elapsed_seconds, rows)
+        """
+        self.pool.add_observer(observer)
+    
+    def _create_slow_query_log(self) -> SlowQueryLog:
+        """
+        Create the slow-query log from BASKETBUDDY_SLOW_QUERY_MS and
+        BASKETBUDDY_SLOW_QUERY_LOG.
+        
+        Returns:
+            SlowQueryLog instance
+        """
+        threshold = os.environ.get(SLOW_QUERY_MS_ENV, str(DEFAULT_SLOW_QUERY_MS)).strip()
+        try:
+            threshold_ms = float(threshold) if threshold else None
+        except ValueError:
+            print(f"Warning: invalid {SLOW_QUERY_MS_ENV}={threshold!r}, using {DEFAULT_SLOW_QUERY_MS} ms")
+            threshold_ms = DEFAULT_SLOW_QUERY_MS
+        log_path = os.environ.get(
+            SLOW_QUERY_LOG_ENV,
+            os.path.join(os.path.dirname(os.path.abspath(self.db_path)), 'slow_queries.log')
+        )
+        return SlowQueryLog(self.db_path, threshold_ms, log_path or None)
+    
+    def set_slow_query_threshold(self, threshold_ms: Optional[float]) -> None:
+        """
+        Change the slow-query threshold at runtime.
+        
+        Args:
+            threshold_ms: Minimum elapsed milliseconds to log; None disables
+        """
+        self.slow_queries.threshold_ms = threshold_ms
+    
+    def pool_stats(self) -> Dict[str, Any]:
+        """
+        Get connection pool statistics.
+        
+        Returns:
+            Dictionary of pool counters and settings, plus group commit
+            counters under 'write_queue' when group commit is enabled
+        """
+        stats = self.pool.stats()
+        if self.write_queue is not None:
+            stats['write_queue'] = self.write_queue.stats()
+        return stats
     
     def init_database(self) -> None:
         """
@@ -88,218 +670,1734 @@ class Database:
             except sqlite3.OperationalError:
                 pass
             
-            try:
-                cursor.execute('ALTER TABLE perishable_items ADD COLUMN is_active INTEGER DEFAULT 1')
-            except sqlite3.OperationalError:
-                pass
+            try:
+                cursor.execute('ALTER TABLE perishable_items ADD COLUMN is_active INTEGER DEFAULT 1')
+            except sqlite3.OperationalError:
+                pass
+            
+            # Create index for faster queries
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_expiry_date 
+                ON perishable_items(expiry_date)
+            ''')
+            
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_category 
+                ON perishable_items(category)
+            ''')
+            
+            # Partial index over rows whose stored price is not yet settled at 0
+            # (live items and newly expired ones) for incremental discount recompute
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_unsettled_expiry
+                ON perishable_items(expiry_date)
+                WHERE discounted_price IS NOT 0
+            ''')
+            
+            # Composite indexes for the public catalog query builder
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_active_expiry
+                ON perishable_items(is_active, expiry_date)
+            ''')
+            
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_seller_active_expiry
+                ON perishable_items(seller_name, is_active, expiry_date)
+            ''')
+            
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_active_price
+                ON perishable_items(is_active, discounted_price)
+            ''')
+            
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_category_active_expiry
+                ON perishable_items(category, is_active, expiry_date)
+            ''')
+            
+            # Top-K deals are served by the expiry indexes above; these
+            # stored-discount indexes ranked by a price that could be stale
+            for name in ('idx_deals', 'idx_deals_category', 'idx_deals_seller'):
+                cursor.execute(f'DROP INDEX IF EXISTS {name}')
+            
+            # Catalog write generation, bumped once per write transaction so
+            # caches in any worker process can detect changes with one lookup;
+            # modified_at (Unix seconds) of the last write feeds Last-Modified
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS catalog_state (
+                    id INTEGER PRIMARY KEY CHECK (id = 1),
+                    write_generation INTEGER NOT NULL DEFAULT 0,
+                    modified_at INTEGER NOT NULL DEFAULT 0
+                )
+            ''')
+            
+            cursor.execute('PRAGMA table_info(catalog_state)')
+            if 'modified_at' not in [row['name'] for row in cursor.fetchall()]:
+                # Databases created before modified_at existed
+                cursor.execute('''
+                    ALTER TABLE catalog_state
+                    ADD COLUMN modified_at INTEGER NOT NULL DEFAULT 0
+                ''')
+                cursor.execute("UPDATE catalog_state SET modified_at = CAST(strftime('%s', 'now') AS INTEGER)")
+            
+            cursor.execute('''
+                INSERT OR IGNORE INTO catalog_state (id, write_generation, modified_at)
+                VALUES (1, 0, CAST(strftime('%s', 'now') AS INTEGER))
+            ''')
+            
+            # The generation used to be bumped by per-row triggers
+            for event in ('insert', 'update', 'delete'):
+                cursor.execute(f'DROP TRIGGER IF EXISTS trg_perishable_items_{event}_generation')
+            
+            self._init_summary_tables(cursor)
+            self._init_search_index(cursor)
+            self._init_change_log(cursor)
+            
+            # Run history of scheduled and manual maintenance jobs. The
+            # partial unique index lets exactly one worker claim a job's
+            # scheduled run per day
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS scheduler_runs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    job TEXT NOT NULL,
+                    run_date DATE NOT NULL,
+                    trigger TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    worker TEXT,
+                    started_at TIMESTAMP NOT NULL,
+                    finished_at TIMESTAMP,
+                    duration_ms REAL,
+                    rows_scanned INTEGER,
+                    rows_changed INTEGER,
+                    error TEXT
+                )
+            ''')
+            
+            cursor.execute('''
+                CREATE UNIQUE INDEX IF NOT EXISTS idx_scheduler_runs_claim
+                ON scheduler_runs(job, run_date) WHERE trigger = 'scheduled'
+            ''')
+            
+            # Progress of CSV import jobs, shared by every worker process so
+            # a job can be polled from any of them
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS import_jobs (
+                    id TEXT PRIMARY KEY,
+                    filename TEXT,
+                    status TEXT NOT NULL,
+                    rows_parsed INTEGER NOT NULL DEFAULT 0,
+                    rows_inserted INTEGER NOT NULL DEFAULT 0,
+                    rows_rejected INTEGER NOT NULL DEFAULT 0,
+                    errors TEXT,
+                    error TEXT,
+                    elapsed_seconds REAL NOT NULL DEFAULT 0,
+                    created_at TIMESTAMP NOT NULL,
+                    started_at TIMESTAMP,
+                    finished_at TIMESTAMP
+                )
+            ''')
+    
+    def _init_change_log(self, cursor: sqlite3.Cursor) -> None:
+        """
+        Create the append-only change log and the triggers feeding it.
+        
+        Every write to perishable_items appends (seq, item_id, op) with op
+        one of 'insert', 'update', 'toggle', 'reprice' or 'delete'
+        (a tombstone). seq is strictly increasing and never reused.
+        
+        An item moved to another seller also gets a tombstone under its old
+        seller, logged before the update, so a feed filtered on the old
+        seller drops it while the unfiltered feed still ends on 'update'.
+        """
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS change_log (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                item_id INTEGER NOT NULL,
+                op TEXT NOT NULL,
+                seller_name TEXT,
+                changed_at INTEGER NOT NULL
+            )
+        ''')
+        
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_change_log_seller
+            ON change_log(seller_name, seq)
+        ''')
+        
+        now = "CAST(strftime('%s', 'now') AS INTEGER)"
+        content_changed = ' OR '.join(
+            f'OLD.{column} IS NOT NEW.{column}' for column in CHANGE_CONTENT_COLUMNS
+        )
+        
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_change_log_insert
+            AFTER INSERT ON perishable_items
+            BEGIN
+                INSERT INTO change_log (item_id, op, seller_name, changed_at)
+                VALUES (NEW.id, 'insert', NEW.seller_name, {now});
+            END
+        ''')
+        
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_change_log_delete
+            AFTER DELETE ON perishable_items
+            BEGIN
+                INSERT INTO change_log (item_id, op, seller_name, changed_at)
+                VALUES (OLD.id, 'delete', OLD.seller_name, {now});
+            END
+        ''')
+        
+        # Replaced by trg_change_log_item_update (adds the seller-move tombstone)
+        cursor.execute('DROP TRIGGER IF EXISTS trg_change_log_update')
+        
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_change_log_item_update
+            AFTER UPDATE ON perishable_items
+            BEGIN
+                INSERT INTO change_log (item_id, op, seller_name, changed_at)
+                SELECT OLD.id, 'delete', OLD.seller_name, {now}
+                WHERE OLD.seller_name IS NOT NEW.seller_name;
+                
+                INSERT INTO change_log (item_id, op, seller_name, changed_at)
+                VALUES (
+                    NEW.id,
+                    CASE
+                        WHEN {content_changed} THEN 'update'
+                        WHEN OLD.is_active IS NOT NEW.is_active THEN 'toggle'
+                        WHEN OLD.discounted_price IS NOT NEW.discounted_price THEN 'reprice'
+                        ELSE 'update'
+                    END,
+                    NEW.seller_name,
+                    {now}
+                );
+            END
+        ''')
+    
+    def _init_search_index(self, cursor: sqlite3.Cursor) -> None:
+        """
+        Create the FTS5 search index and the triggers keeping it in sync.
+        
+        Builds without FTS5 leave search_available False; search then
+        falls back to substring matching.
+        """
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (SEARCH_TABLE,)
+        )
+        is_new = cursor.fetchone() is None
+        
+        columns = ', '.join(SEARCH_COLUMNS)
+        new_values = ', '.join(f'NEW.{column}' for column in SEARCH_COLUMNS)
+        old_values = ', '.join(f'OLD.{column}' for column in SEARCH_COLUMNS)
+        
+        try:
+            cursor.execute(f'''
+                CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5(
+                    {columns},
+                    content='perishable_items',
+                    content_rowid='id',
+                    prefix='2 3'
+                )
+            ''')
+        except sqlite3.OperationalError:
+            self.search_available = False
+            return
+        
+        add = f'INSERT INTO {SEARCH_TABLE} (rowid, {columns}) VALUES (NEW.id, {new_values});'
+        remove = (
+            f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}, rowid, {columns}) "
+            f"VALUES ('delete', OLD.id, {old_values});"
+        )
+        
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_{SEARCH_TABLE}_insert
+            AFTER INSERT ON perishable_items
+            BEGIN
+                {add}
+            END
+        ''')
+        
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_{SEARCH_TABLE}_delete
+            AFTER DELETE ON perishable_items
+            BEGIN
+                {remove}
+            END
+        ''')
+        
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_{SEARCH_TABLE}_update
+            AFTER UPDATE OF {columns} ON perishable_items
+            BEGIN
+                {remove}
+                {add}
+            END
+        ''')
+        
+        if is_new:
+            cursor.execute(f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}) VALUES ('rebuild')")
+        
+        self.search_available = True
+    
+    def _init_summary_tables(self, cursor: sqlite3.Cursor) -> None:
+        """
+        Create the per-seller and per-category summary tables and the
+        triggers that maintain them incrementally on every write.
+        
+        Each summary row aggregates the items of one group that share an
+        expiry date and active flag. Day-dependent figures (expired,
+        near-expiry, discount) are derived from these buckets at read time,
+        so the tables never need a daily rebuild.
+        """
+        for table, key in SUMMARY_TABLES.items():
+            cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+            )
+            is_new = cursor.fetchone() is None
+            
+            cursor.execute(f'''
+                CREATE TABLE IF NOT EXISTS {table} (
+                    group_key TEXT NOT NULL,
+                    expiry_date DATE NOT NULL,
+                    is_active INTEGER NOT NULL,
+                    item_count INTEGER NOT NULL DEFAULT 0,
+                    quantity_sum INTEGER NOT NULL DEFAULT 0,
+                    revenue_sum REAL NOT NULL DEFAULT 0,
+                    cost_sum REAL NOT NULL DEFAULT 0,
+                    PRIMARY KEY (group_key, expiry_date, is_active)
+                ) WITHOUT ROWID
+            ''')
+            
+            add = _summary_delta_sql(table, key, 'NEW', 1)
+            remove = _summary_delta_sql(table, key, 'OLD', -1)
+            prune = f'DELETE FROM {table} WHERE item_count <= 0;'
+            
+            cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_insert
+                AFTER INSERT ON perishable_items
+                BEGIN
+                    {add}
+                END
+            ''')
+            
+            cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_delete
+                AFTER DELETE ON perishable_items
+                BEGIN
+                    {remove}
+                    {prune}
+                END
+            ''')
+            
+            cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_update
+                AFTER UPDATE OF {', '.join(SUMMARY_SOURCE_COLUMNS)} ON perishable_items
+                BEGIN
+                    {remove}
+                    {add}
+                    {prune}
+                END
+            ''')
+            
+            if is_new:
+                self._rebuild_summary_table(cursor, table, key)
+    
+    def _rebuild_summary_table(self, cursor: sqlite3.Cursor, table: str, key: str) -> None:
+        """Repopulate a summary table from perishable_items."""
+        cursor.execute(f'DELETE FROM {table}')
+        cursor.execute(f'''
+            INSERT INTO {table}
+            (group_key, expiry_date, is_active, item_count, quantity_sum, revenue_sum, cost_sum)
+            SELECT
+                {key.format(row='perishable_items')},
+                expiry_date,
+                COALESCE(is_active, 1),
+                COUNT(*),
+                SUM(quantity),
+                SUM({SUMMARY_REVENUE_SQL.format(row='perishable_items')}),
+                SUM({SUMMARY_COST_SQL.format(row='perishable_items')})
+            FROM perishable_items
+            GROUP BY 1, 2, 3
+        ''')
+    
+    def rebuild_summaries(self) -> None:
+        """Rebuild all summary tables from scratch (e.g. after manual edits)."""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            for table, key in SUMMARY_TABLES.items():
+                self._rebuild_summary_table(cursor, table, key)
+    
+    def get_write_generation(self) -> int:
+        """
+        Get the catalog write generation.
+        Increases whenever any row of perishable_items is inserted, updated or deleted.
+        
+        Returns:
+            Current write generation
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT write_generation FROM catalog_state WHERE id = 1')
+            row = cursor.fetchone()
+            return row[0] if row else 0
+    
+    def get_catalog_version(self) -> Tuple[int, int]:
+        """
+        Get the catalog write generation and the time of the last write.
+        
+        Returns:
+            Tuple of (write_generation, modified_at as Unix seconds)
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT write_generation, modified_at FROM catalog_state WHERE id = 1')
+            row = cursor.fetchone()
+            return (row[0], row[1]) if row else (0, 0)
+    
+    def read_snapshot_rows(self, day: date) -> Tuple[int, List[Tuple]]:
+        """
+        Read the rows of a catalog snapshot together with the write
+        generation they belong to, in one read transaction.
+        
+        Rows are the items counted as active by the summary tables
+        (COALESCE(is_active, 1) = 1) that expire after `day`, ordered by
+        (expiry_date, id). Columns follow SNAPSHOT_COLUMNS.
+        
+        Args:
+            day: Date the snapshot is built for
+            
+        Returns:
+            Tuple of (write_generation, rows)
+        """
+        conn = self.pool.connect()
+        try:
+            conn.row_factory = None
+            # Deferred read transaction: both statements see the same WAL snapshot
+            conn.execute('BEGIN')
+            row = conn.execute('SELECT write_generation FROM catalog_state WHERE id = 1').fetchone()
+            rows = conn.execute(f'''
+                SELECT {', '.join(SNAPSHOT_COLUMNS)} FROM perishable_items
+                WHERE COALESCE(is_active, 1) = 1 AND expiry_date > ?
+                ORDER BY expiry_date ASC, id ASC
+            ''', (day.isoformat(),)).fetchall()
+            conn.execute('COMMIT')
+            return (row[0] if row else 0), rows
+        finally:
+            conn.close()
+    
+    def read_expiry_entries(self, from_date: Optional[str] = None) -> Tuple[int, int, List[Tuple[int, str, int]]]:
+        """
+        Read the expiry date and active flag of every item together with the
+        write generation and change log position they belong to, in one read
+        transaction.
+        
+        Args:
+            from_date: Only items expiring on or after this ISO date (optional)
+            
+        Returns:
+            Tuple of (write_generation, latest change seq, rows of
+            (id, expiry_date, active)) where active is 1 unless is_active is 0
+        """
+        conn = self.pool.connect()
+        try:
+            conn.row_factory = None
+            conn.execute('BEGIN')
+            row = conn.execute('SELECT write_generation FROM catalog_state WHERE id = 1').fetchone()
+            seq = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'change_log'").fetchone()
+            if from_date is None:
+                rows = conn.execute(
+                    'SELECT id, expiry_date, COALESCE(is_active, 1) != 0 FROM perishable_items'
+                ).fetchall()
+            else:
+                rows = conn.execute(
+                    'SELECT id, expiry_date, COALESCE(is_active, 1) != 0 FROM perishable_items '
+                    'WHERE expiry_date >= ?',
+                    (from_date,)
+                ).fetchall()
+            conn.execute('COMMIT')
+            return (row[0] if row else 0), (seq[0] if seq else 0), rows
+        finally:
+            conn.close()
+    
+    @group_committed
+    def create_item(self, item_data: Dict[str, Any]) -> int:
+        """
+        Create a new perishable item.
+        
+        Args:
+            item_data: Dictionary containing item fields
+            
+        Returns:
+            ID of the created item
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT INTO perishable_items 
+                (item_name, category, quantity, base_price, cost_price, shelf_life, expiry_date,
+                 discounted_price, seller_name, is_active, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (
+                item_data['item_name'],
+                item_data['category'],
+                item_data['quantity'],
+                item_data['base_price'],
+                item_data.get('cost_price'),
+                item_data.get('shelf_life'),
+                item_data['expiry_date'],
+                item_data.get('discounted_price'),
+                item_data.get('seller_name') or 'Admin',
+                1 if item_data.get('is_active', 1) else 0,
+                datetime.now().isoformat()
+            ))
+            self._catalog_written()
+            return cursor.lastrowid
+    
+    def get_item_by_id(self, item_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Retrieve a single item by ID.
+        
+        Args:
+            item_id: ID of the item
+            
+        Returns:
+            Dictionary containing item data or None if not found
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT * FROM perishable_items WHERE id = ?', (item_id,))
+            row = cursor.fetchone()
+            return dict(row) if row else None
+    
+    def get_all_items(self) -> List[Dict[str, Any]]:
+        """
+        Retrieve all perishable items.
+        
+        Returns:
+            List of dictionaries containing item data
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT * FROM perishable_items ORDER BY expiry_date ASC')
+            rows = cursor.fetchall()
+            return [dict(row) for row in rows]
+    
+    def get_items_page(
+        self,
+        limit: int,
+        after: Optional[Tuple[str, int]] = None,
+        seller_name: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Retrieve one page of items in (expiry_date, id) order.
+        
+        Args:
+            limit: Maximum number of rows to return
+            after: Keyset position (expiry_date, id) of the previous page's last row
+            seller_name: Filter by seller (optional)
+            
+        Returns:
+            List of dictionaries containing item data
+        """
+        clauses = []
+        params: List[Any] = []
+        
+        if seller_name:
+            clauses.append('seller_name = ?')
+            params.append(seller_name)
+        
+        if after is not None:
+            clauses.append('(expiry_date, id) > (?, ?)')
+            params.extend(after)
+        
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        params.append(limit)
+        
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                f'SELECT * FROM perishable_items {where} ORDER BY expiry_date ASC, id ASC LIMIT ?',
+                params
+            )
+            rows = cursor.fetchall()
+            return [dict(row) for row in rows]
+    
+    def stream_rows(self, query: str, params: Any = (), batch_size: int = 500) -> Iterator[Dict[str, Any]]:
+        """
+        Yield rows of a query incrementally from a server-side cursor.
+        Runs on a dedicated connection so the result set is never fully
+        materialized and the thread's pooled connection stays free.
+        
+        Args:
+            query: SELECT statement
+            params: Bound parameters
+            batch_size: Rows fetched per round trip
+            
+        Yields:
+            Dictionaries containing row data
+        """
+        conn = self.pool.connect()
+        try:
+            cursor = conn.execute(query, params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield dict(row)
+        finally:
+            conn.close()
+    
+    def iter_items(self, seller_name: Optional[str] = None, batch_size: int = 500) -> Iterator[Dict[str, Any]]:
+        """
+        Stream all items in (expiry_date, id) order.
+        
+        Args:
+            seller_name: Filter by seller (optional)
+            batch_size: Rows fetched per round trip
+            
+        Yields:
+            Dictionaries containing item data
+        """
+        if seller_name:
+            return self.stream_rows(
+                'SELECT * FROM perishable_items WHERE seller_name = ? ORDER BY expiry_date ASC, id ASC',
+                (seller_name,), batch_size
+            )
+        return self.stream_rows(
+            'SELECT * FROM perishable_items ORDER BY expiry_date ASC, id ASC', (), batch_size
+        )
+    
+    @group_committed
+    def update_item(self, item_id: int, item_data: Dict[str, Any]) -> bool:
+        """
+        Update an existing item.
+        The discounted price is recomputed when a pricing input changes, so
+        an item moved out of the discount window never keeps a stale price.
+        
+        Args:
+            item_id: ID of the item to update
+            item_data: Dictionary containing updated fields
+            
+        Returns:
+            True if update successful, False otherwise
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            
+            if any(key in item_data for key in PRICING_COLUMNS):
+                item_data = self._reprice_update(cursor, item_id, item_data)
+            
+            # Build dynamic UPDATE query based on provided fields
+            fields = []
+            values = []
+            
+            for key in UPDATABLE_COLUMNS:
+                if key in item_data:
+                    fields.append(f"{key} = ?")
+                    values.append(item_data[key])
+            
+            if not fields:
+                return False
+            
+            # Always update the updated_at timestamp
+            fields.append("updated_at = ?")
+            values.append(datetime.now().isoformat())
+            values.append(item_id)
+            
+            query = f"UPDATE perishable_items SET {', '.join(fields)} WHERE id = ?"
+            cursor.execute(query, values)
+            self._catalog_written(cursor.rowcount)
+            
+            return cursor.rowcount > 0
+    
+    def _reprice_update(self, cursor: sqlite3.Cursor, item_id: int, item_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Set the discounted price of an update from the row as it will be stored.
+        
+        Args:
+            cursor: Cursor of the update's connection
+            item_id: ID of the item to update
+            item_data: Dictionary containing updated fields
+            
+        Returns:
+            item_data with discounted_price set (unchanged if the item does not exist)
+        """
+        merged = {key: item_data[key] for key in PRICING_COLUMNS if key in item_data}
+        missing = [key for key in PRICING_COLUMNS if key not in merged]
+        if missing:
+            cursor.execute(
+                f"SELECT {', '.join(missing)} FROM perishable_items WHERE id = ?", (item_id,)
+            )
+            row = cursor.fetchone()
+            if row is None:
+                return item_data
+            merged.update(zip(missing, row))
+        
+        _, price = price_one(
+            merged['expiry_date'], int(merged['quantity']), float(merged['base_price']), merged['category']
+        )
+        return dict(item_data, discounted_price=price)
+    
+    @group_committed
+    def delete_item(self, item_id: int) -> bool:
+        """
+        Delete an item by ID.
+        
+        Args:
+            item_id: ID of the item to delete
+            
+        Returns:
+            True if deletion successful, False otherwise
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('DELETE FROM perishable_items WHERE id = ?', (item_id,))
+            self._catalog_written(cursor.rowcount)
+            return cursor.rowcount > 0
+    
+    @group_committed
+    def toggle_item_active(self, item_id: int) -> Optional[bool]:
+        """
+        Flip an item's active flag in place.
+        
+        Args:
+            item_id: ID of the item
+            
+        Returns:
+            New active status, or None if the item was not found
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                UPDATE perishable_items
+                SET is_active = 1 - COALESCE(is_active, 1), updated_at = ?
+                WHERE id = ?
+            ''', (datetime.now().isoformat(), item_id))
+            
+            if cursor.rowcount == 0:
+                return None
+            self._catalog_written()
+            
+            cursor.execute('SELECT is_active FROM perishable_items WHERE id = ?', (item_id,))
+            return bool(cursor.fetchone()['is_active'])
+    
+    def get_items_by_ids(self, item_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        """
+        Retrieve several items by ID in one query.
+        
+        Args:
+            item_ids: IDs of the items
+            
+        Returns:
+            Dictionary mapping id to item data (missing IDs are absent)
+        """
+        if not item_ids:
+            return {}
+        
+        placeholders = ', '.join('?' for _ in item_ids)
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                f'SELECT * FROM perishable_items WHERE id IN ({placeholders})',
+                list(item_ids)
+            )
+            return {row['id']: dict(row) for row in cursor.fetchall()}
+    
+    def get_items_by_category(self, category: str) -> List[Dict[str, Any]]:
+        """
+        Retrieve items by category.
+        
+        Args:
+            category: Category name
+            
+        Returns:
+            List of items in the specified category
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                'SELECT * FROM perishable_items WHERE category = ? ORDER BY expiry_date ASC',
+                (category,)
+            )
+            rows = cursor.fetchall()
+            return [dict(row) for row in rows]
+    
+    def get_expiring_items(self, days: int = 2) -> List[Dict[str, Any]]:
+        """
+        Retrieve items expiring within specified days.
+        
+        Args:
+            days: Number of days threshold
+            
+        Returns:
+            List of items expiring soon
+        """
+        # Cutoff computed here: a plain range on idx_expiry_date, and negative
+        # thresholds work ('+-3 days' is not a valid SQLite modifier)
+        cutoff = date.today() + timedelta(days=days)
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT * FROM perishable_items 
+                WHERE expiry_date <= ?
+                ORDER BY expiry_date ASC
+            ''', (cutoff.isoformat(),))
+            rows = cursor.fetchall()
+            return [dict(row) for row in rows]
+    
+    def get_items_expired_before(self, before: str) -> List[Dict[str, Any]]:
+        """
+        Retrieve items whose (valid) expiry date is earlier than a date.
+        
+        Args:
+            before: ISO date, exclusive
+            
+        Returns:
+            List of items ordered by (expiry_date, id)
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT * FROM perishable_items
+                WHERE expiry_date < ? AND date(expiry_date) IS NOT NULL
+                ORDER BY expiry_date ASC, id ASC
+            ''', (before,))
+            return [dict(row) for row in cursor.fetchall()]
+    
+    def count_items_expired_before(self, before: str) -> Tuple[int, int]:
+        """
+        Count items whose (valid) expiry date is earlier than a date.
+        
+        Args:
+            before: ISO date, exclusive
+            
+        Returns:
+            Tuple of (items, active items)
+        """
+        with self.get_connection() as conn:
+            row = conn.execute('''
+                SELECT COUNT(*), COALESCE(SUM(COALESCE(is_active, 1) != 0), 0)
+                FROM perishable_items
+                WHERE expiry_date < ? AND date(expiry_date) IS NOT NULL
+            ''', (before,)).fetchone()
+            return row[0], row[1]
+    
+    def bulk_insert(self, items: List[Dict[str, Any]]) -> int:
+        """
+        Insert multiple items at once (CSV import, synthetic catalogs).
+        Uses a single prepared statement via executemany in one transaction.
+        
+        Args:
+            items: List of item dictionaries
+            
+        Returns:
+            Number of items inserted
+        """
+        now = datetime.now().isoformat()
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.executemany('''
+                INSERT INTO perishable_items 
+                (item_name, category, quantity, base_price, cost_price, shelf_life, expiry_date,
+                 discounted_price, seller_name, is_active, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', [
+                (
+                    item['item_name'],
+                    item['category'],
+                    item['quantity'],
+                    item['base_price'],
+                    item.get('cost_price'),
+                    item.get('shelf_life'),
+                    item['expiry_date'],
+                    item.get('discounted_price'),
+                    item.get('seller_name') or 'Admin',
+                    1 if item.get('is_active', 1) else 0,
+                    now
+                )
+                for item in items
+            ])
+            self._catalog_written(len(items))
+            return len(items)
+    
+    def _build_public_filter(
+        self,
+        category: Optional[str] = None,
+        min_discount: Optional[float] = None,
+        max_price: Optional[float] = None,
+        seller_name: Optional[str] = None
+    ) -> Tuple[str, List[Any]]:
+        """
+        Build the WHERE clause shared by the public catalog queries.
+        
+        Args:
+            category: Filter by category
+            min_discount: Minimum discount percentage
+            max_price: Maximum discounted price
+            seller_name: Filter by seller
+            
+        Returns:
+            Tuple of (where_clause, params)
+        """
+        today = date.today()
+        clauses = [PUBLIC_ITEM_FILTER]
+        params: List[Any] = [today.isoformat()]
+        
+        if category:
+            clauses.append('category = ?')
+            params.append(category)
+        
+        if min_discount is not None:
+            max_days = max_days_for_discount(min_discount)
+            if max_days is not None:
+                clauses.append('expiry_date <= ?')
+                params.append((today + timedelta(days=max_days)).isoformat())
+                if category_policies_registered():
+                    # The range only bounds the category policies' discounts
+                    clauses.append(f'{discount_sql(days_to_expiry_sql(today))} >= ?')
+                    params.append(min_discount)
+        
+        if max_price is not None:
+            clauses.append('discounted_price <= ?')
+            params.append(max_price)
+        
+        if seller_name:
+            clauses.append('seller_name = ?')
+            params.append(seller_name)
+        
+        return ' AND '.join(clauses), params
+    
+    def _public_items_query(
+        self,
+        category: Optional[str] = None,
+        min_discount: Optional[float] = None,
+        max_price: Optional[float] = None,
+        seller_name: Optional[str] = None,
+        sort_by: str = 'discount',
+        limit: Optional[int] = None,
+        after: Optional[Tuple[str, int]] = None
+    ) -> Tuple[str, List[Any]]:
+        """
+        Build the SELECT statement for the public catalog.
+        
+        Returns:
+            Tuple of (query, params)
+        """
+        where, params = self._build_public_filter(category, min_discount, max_price, seller_name)
+        order_by = public_order_by(sort_by, date.today())
+        
+        if after is not None:
+            if order_by not in KEYSET_SORT_ORDERS:
+                raise ValueError(f"Cursor pagination is not supported for sort_by={sort_by}")
+            where += ' AND (expiry_date, id) > (?, ?)'
+            params.extend(after)
+        
+        query = f'SELECT * FROM perishable_items WHERE {where} ORDER BY {order_by}'
+        if limit is not None:
+            query += ' LIMIT ?'
+            params.append(limit)
+        
+        return query, params
+    
+    def query_public_items(
+        self,
+        category: Optional[str] = None,
+        min_discount: Optional[float] = None,
+        max_price: Optional[float] = None,
+        seller_name: Optional[str] = None,
+        sort_by: str = 'discount',
+        limit: Optional[int] = None,
+        after: Optional[Tuple[str, int]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Retrieve active, non-expired items matching the public catalog filters.
+        Filtering and sorting run in a single indexed SQL query.
+        
+        Args:
+            category: Filter by category
+            min_discount: Minimum discount percentage
+            max_price: Maximum discounted price
+            seller_name: Filter by seller
+            sort_by: One of 'discount', 'price', 'expiry'
+            limit: Maximum number of rows to return
+            after: Keyset position (expiry_date, id); only for expiry-ordered sorts
+            
+        Returns:
+            List of dictionaries containing item data
+        """
+        query, params = self._public_items_query(
+            category, min_discount, max_price, seller_name, sort_by, limit, after
+        )
+        
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
+            return [dict(row) for row in rows]
+    
+    def iter_public_items(self, batch_size: int = 500, **filters: Any) -> Iterator[Dict[str, Any]]:
+        """
+        Stream public catalog rows from a server-side cursor.
+        
+        Args:
+            batch_size: Rows fetched per round trip
+            **filters: Same keyword filters as query_public_items
+            
+        Yields:
+            Dictionaries containing item data
+        """
+        query, params = self._public_items_query(**filters)
+        return self.stream_rows(query, params, batch_size)
+    
+    def get_top_deals(
+        self,
+        limit: int = 10,
+        category: Optional[str] = None,
+        seller_name: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Retrieve the public items with the highest discount.
+        
+        Under a single policy discount only grows as expiry nears, so the
+        best deals are the soonest-expiring public items: the query walks an
+        (is_active, expiry_date) index, globally or per category / seller,
+        and stops after `limit` rows. With category policies registered it
+        orders by the policies' discount expression instead. Stored prices
+        are not consulted, so a stale discounted_price can never reorder the
+        result.
+        
+        Args:
+            limit: Number of items to return (K)
+            category: Restrict to a category (optional)
+            seller_name: Restrict to a seller (optional)
+            
+        Returns:
+            List of dictionaries containing item data, best deal first
+        """
+        return self.query_public_items(
+            category=category, seller_name=seller_name, sort_by='discount', limit=limit
+        )
+    
+    def search_public_items(
+        self,
+        text: str,
+        category: Optional[str] = None,
+        min_discount: Optional[float] = None,
+        max_price: Optional[float] = None,
+        seller_name: Optional[str] = None,
+        limit: int = 50
+    ) -> List[Dict[str, Any]]:
+        """
+        Full-text search over the public catalog, best match first.
+        
+        Matches item name, category and seller name (the last word as a
+        prefix) and combines with the public catalog filters.
+        
+        Args:
+            text: Search text
+            category: Filter by category
+            min_discount: Minimum discount percentage
+            max_price: Maximum discounted price
+            seller_name: Filter by seller
+            limit: Maximum number of rows to return
+            
+        Returns:
+            List of dictionaries containing item data
+        """
+        where, params = self._build_public_filter(category, min_discount, max_price, seller_name)
+        
+        if self.search_available:
+            expression = fts_match_expression(text)
+            if expression is None:
+                return []
+            query = f'''
+                SELECT perishable_items.* FROM (
+                    SELECT rowid AS match_id, {SEARCH_RANK_SQL} AS match_rank
+                    FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH ?
+                ) AS matches
+                -- CROSS JOIN keeps the full-text match as the outer loop
+                CROSS JOIN perishable_items ON perishable_items.id = matches.match_id
+                WHERE {where}
+                ORDER BY matches.match_rank, expiry_date, id
+                LIMIT ?
+            '''
+            params = [expression] + params + [limit]
+        else:
+            tokens = SEARCH_TOKEN_PATTERN.findall(text or '')
+            if not tokens:
+                return []
+            for token in tokens:
+                where += " AND (item_name || ' ' || category || ' ' || COALESCE(seller_name, '')) LIKE ?"
+                params.append(f'%{token}%')
+            query = f'SELECT * FROM perishable_items WHERE {where} ORDER BY expiry_date, id LIMIT ?'
+            params.append(limit)
+        
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
+            return [dict(row) for row in rows]
+    
+    def autocomplete_item_names(self, prefix: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Suggest public item names starting with the typed words.
+        
+        Args:
+            prefix: Text typed so far
+            limit: Maximum number of suggestions
+            
+        Returns:
+            List of dictionaries with item_name and item_count, most common first
+        """
+        where, params = self._build_public_filter()
+        
+        if self.search_available:
+            expression = fts_match_expression(prefix, prefix='all', column='item_name')
+            if expression is None:
+                return []
+            source = f'''
+                (SELECT rowid AS match_id FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH ?) AS matches
+                CROSS JOIN perishable_items ON perishable_items.id = matches.match_id
+            '''
+            params = [expression] + params
+        else:
+            if not (prefix or '').strip():
+                return []
+            source = 'perishable_items'
+            where += ' AND item_name LIKE ?'
+            params.append(f'{prefix.strip()}%')
+        
+        params.append(limit)
+        
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f'''
+                SELECT item_name, COUNT(*) AS item_count
+                FROM {source}
+                WHERE {where}
+                GROUP BY item_name
+                ORDER BY item_count DESC, item_name
+                LIMIT ?
+            ''', params)
+            rows = cursor.fetchall()
+            return [dict(row) for row in rows]
+    
+    def get_public_group_totals(self, group_by: str) -> List[Tuple]:
+        """
+        Count public items and sum their discounts per category or seller.
+        Reads the trigger-maintained summary tables, not perishable_items,
+        unless category policies are registered: summary buckets carry no
+        category, so the discounts are then summed per item.
+        
+        Args:
+            group_by: Either 'category' or 'seller_name'
+            
+        Returns:
+            Tuples of (group key, item count, discount sum, earliest expiry)
+        """
+        table = {'category': 'category_summary', 'seller_name': 'seller_summary'}.get(group_by)
+        if table is None:
+            raise ValueError(f"Unsupported group_by column: {group_by}")
+        
+        today = date.today()
+        
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            if category_policies_registered():
+                cursor.execute(f'''
+                    SELECT {SUMMARY_TABLES[table].format(row='perishable_items')} as group_key,
+                           COUNT(*), SUM({discount_sql(days_to_expiry_sql(today))}), MIN(expiry_date)
+                    FROM perishable_items
+                    WHERE COALESCE(is_active, 1) = 1 AND expiry_date > ?
+                    GROUP BY group_key
+                ''', (today.isoformat(),))
+            else:
+                cursor.execute(f'''
+                    SELECT group_key, SUM(item_count), SUM(item_count * {discount_sql()}), MIN(expiry_date)
+                    FROM (
+                        SELECT group_key, expiry_date, item_count, {DAYS_TO_EXPIRY_SQL} as days_to_expiry
+                        FROM {table}
+                        WHERE is_active = 1 AND expiry_date > ?
+                    )
+                    GROUP BY group_key
+                ''', (today.isoformat(), today.isoformat()))
+            return [tuple(row) for row in cursor.fetchall()]
+    
+    def get_public_group_stats(self, group_by: str) -> List[Dict[str, Any]]:
+        """
+        Count public items and average their discount per category or seller.
+        
+        Args:
+            group_by: Either 'category' or 'seller_name'
             
-            # Create index for faster queries
-            cursor.execute('''
-                CREATE INDEX IF NOT EXISTS idx_expiry_date 
-                ON perishable_items(expiry_date)
-            ''')
+        Returns:
+            List of dictionaries with group key, item_count and avg_discount
+        """
+        return group_stats_from_totals(group_by, self.get_public_group_totals(group_by))
+    
+    def get_seller_summary(self, seller_name: str) -> Dict[str, Any]:
+        """
+        Get dashboard statistics for one seller from the summary table.
+        Cost is bounded by the number of distinct expiry dates of the seller,
+        not by the number of items (except for the discount sum while
+        category policies are registered: summary buckets carry no category).
+        
+        Args:
+            seller_name: Seller name
             
-            cursor.execute('''
-                CREATE INDEX IF NOT EXISTS idx_category 
-                ON perishable_items(category)
-            ''')
+        Returns:
+            Dictionary with item counts, average discount and active revenue/cost sums
+        """
+        today = date.today()
+        policies = category_policies_registered()
+        
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f'''
+                SELECT
+                    COALESCE(SUM(item_count), 0) as total_items,
+                    COALESCE(SUM(CASE WHEN is_active = 1 THEN item_count ELSE 0 END), 0) as active_items,
+                    COALESCE(SUM(CASE WHEN days_to_expiry > 0 AND days_to_expiry <= 2
+                                      THEN item_count ELSE 0 END), 0) as near_expiry,
+                    COALESCE(SUM(CASE WHEN days_to_expiry <= 0 THEN item_count ELSE 0 END), 0) as expired,
+                    COALESCE(SUM(item_count * {'0' if policies else discount_sql()}), 0) as discount_sum,
+                    COALESCE(SUM(CASE WHEN is_active = 1 THEN revenue_sum ELSE 0 END), 0) as total_revenue,
+                    COALESCE(SUM(CASE WHEN is_active = 1 THEN cost_sum ELSE 0 END), 0) as total_cost
+                FROM (
+                    SELECT *, {DAYS_TO_EXPIRY_SQL} as days_to_expiry
+                    FROM seller_summary
+                    WHERE group_key = ?
+                )
+            ''', (today.isoformat(), seller_name))
+            summary = dict(cursor.fetchone())
+            if policies:
+                cursor.execute(f'''
+                    SELECT COALESCE(SUM({discount_sql(days_to_expiry_sql(today))}), 0)
+                    FROM perishable_items
+                    WHERE COALESCE(seller_name, 'Admin') = ?
+                ''', (seller_name,))
+                summary['discount_sum'] = cursor.fetchone()[0]
+            return summary
     
-    def create_item(self, item_data: Dict[str, Any]) -> int:
+    def get_repricing_candidates(self, window_end: Optional[str] = None) -> List[Dict[str, Any]]:
         """
-        Create a new perishable item.
+        Retrieve rows whose discounted price can change.
+        
+        With a window_end, only rows expiring on or before it that are not yet
+        settled at a price of 0 are returned: items inside the discount window
+        plus newly expired items. Without one, every row is returned.
         
         Args:
-            item_data: Dictionary containing item fields
+            window_end: Last ISO date of the discount window (optional)
             
         Returns:
-            ID of the created item
+            List of dictionaries with id, category, quantity, expiry_date,
+            base_price and discounted_price
         """
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute('''
-                INSERT INTO perishable_items 
-                (item_name, category, quantity, base_price, expiry_date, discounted_price, updated_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                item_data['item_name'],
-                item_data['category'],
-                item_data['quantity'],
-                item_data['base_price'],
-                item_data['expiry_date'],
-                item_data.get('discounted_price'),
-                datetime.now().isoformat()
-            ))
-            return cursor.lastrowid
+            if window_end is None:
+                cursor.execute('''
+                    SELECT id, category, quantity, expiry_date, base_price, discounted_price
+                    FROM perishable_items
+                ''')
+            else:
+                cursor.execute('''
+                    SELECT id, category, quantity, expiry_date, base_price, discounted_price
+                    FROM perishable_items
+                    WHERE discounted_price IS NOT 0 AND expiry_date <= ?
+                ''', (window_end,))
+            rows = cursor.fetchall()
+            return [dict(row) for row in rows]
     
-    def get_item_by_id(self, item_id: int) -> Optional[Dict[str, Any]]:
+    def update_discounted_prices(self, updates: List[Tuple[float, int]]) -> int:
         """
-        Retrieve a single item by ID.
+        Apply new discounted prices with one batched statement.
         
         Args:
-            item_id: ID of the item
+            updates: List of (discounted_price, item_id) pairs
             
         Returns:
-            Dictionary containing item data or None if not found
+            Number of rows updated
         """
+        if not updates:
+            return 0
+        
+        now = datetime.now().isoformat()
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute('SELECT * FROM perishable_items WHERE id = ?', (item_id,))
-            row = cursor.fetchone()
-            return dict(row) if row else None
+            cursor.executemany(
+                'UPDATE perishable_items SET discounted_price = ?, updated_at = ? WHERE id = ?',
+                [(price, now, item_id) for price, item_id in updates]
+            )
+            self._catalog_written(cursor.rowcount)
+            return cursor.rowcount
     
-    def get_all_items(self) -> List[Dict[str, Any]]:
+    def get_category_stats(self) -> List[Dict[str, Any]]:
         """
-        Retrieve all perishable items.
+        Get statistics by category for visualization.
         
         Returns:
-            List of dictionaries containing item data
+            List of category statistics
         """
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute('SELECT * FROM perishable_items ORDER BY expiry_date ASC')
+            cursor.execute('''
+                SELECT 
+                    category,
+                    COUNT(*) as item_count,
+                    SUM(quantity) as total_quantity,
+                    AVG(base_price) as avg_price
+                FROM perishable_items
+                GROUP BY category
+                ORDER BY item_count DESC
+            ''')
             rows = cursor.fetchall()
             return [dict(row) for row in rows]
     
-    def update_item(self, item_id: int, item_data: Dict[str, Any]) -> bool:
+    def get_changes(
+        self,
+        since: int = 0,
+        limit: int = 1000,
+        seller_name: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
         """
-        Update an existing item.
+        Retrieve change log entries after a sequence number, oldest first.
         
         Args:
-            item_id: ID of the item to update
-            item_data: Dictionary containing updated fields
+            since: Last sequence number the client has seen
+            limit: Maximum number of entries
+            seller_name: Only changes to this seller's items (optional)
             
         Returns:
-            True if update successful, False otherwise
+            List of dictionaries with seq, item_id, op, seller_name and changed_at
+        """
+        query = 'SELECT * FROM change_log WHERE seq > ?'
+        params: List[Any] = [since]
+        
+        if seller_name:
+            query += ' AND seller_name = ?'
+            params.append(seller_name)
+        
+        query += ' ORDER BY seq LIMIT ?'
+        params.append(limit)
+        
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
+            return [dict(row) for row in rows]
+    
+    def get_change_log_bounds(self) -> Tuple[int, int]:
+        """
+        Get the range of sequence numbers a client can sync from.
+        
+        Returns:
+            Tuple of (oldest valid `since`, latest seq). A client whose last
+            seen seq is below the first value missed pruned entries.
         """
         with self.get_connection() as conn:
             cursor = conn.cursor()
+            cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = 'change_log'")
+            row = cursor.fetchone()
+            latest = row[0] if row else 0
             
-            # Build dynamic UPDATE query based on provided fields
-            fields = []
-            values = []
+            cursor.execute('SELECT MIN(seq) FROM change_log')
+            oldest = cursor.fetchone()[0]
+            return (oldest - 1 if oldest is not None else latest), latest
+    
+    def prune_change_log(self, retention_days: int = CHANGE_LOG_RETENTION_DAYS) -> int:
+        """
+        Drop change log entries older than the retention period.
+        
+        Args:
+            retention_days: Days of history to keep
             
-            for key in ['item_name', 'category', 'quantity', 'base_price', 'expiry_date', 'discounted_price']:
-                if key in item_data:
-                    fields.append(f"{key} = ?")
-                    values.append(item_data[key])
+        Returns:
+            Number of entries deleted
+        """
+        cutoff = int((datetime.now() - timedelta(days=retention_days)).timestamp())
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('DELETE FROM change_log WHERE changed_at < ?', (cutoff,))
+            return cursor.rowcount
+    
+    def start_job_run(
+        self,
+        job: str,
+        run_date: str,
+        worker: str,
+        trigger: str = 'manual',
+        stale_after_seconds: Optional[int] = None
+    ) -> Optional[int]:
+        """
+        Record the start of a job run.
+        
+        A 'scheduled' run is a claim: only the first caller per (job, run_date)
+        gets a run id, so only one worker process executes it. A claim still
+        'running' after stale_after_seconds (its worker died) can be taken over.
+        
+        Args:
+            job: Job name
+            run_date: Local date the run is for (YYYY-MM-DD)
+            worker: Identifier of the calling process
+            trigger: 'scheduled' or 'manual'
+            stale_after_seconds: Age after which a running claim is abandoned
             
-            if not fields:
-                return False
+        Returns:
+            Run ID, or None if another worker holds the scheduled run
+        """
+        now = datetime.now()
+        with self.transaction() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT OR IGNORE INTO scheduler_runs
+                (job, run_date, trigger, status, worker, started_at)
+                VALUES (?, ?, ?, 'running', ?, ?)
+            ''', (job, run_date, trigger, worker, now.isoformat()))
             
-            # Always update the updated_at timestamp
-            fields.append("updated_at = ?")
-            values.append(datetime.now().isoformat())
-            values.append(item_id)
+            if cursor.rowcount:
+                return cursor.lastrowid
             
-            query = f"UPDATE perishable_items SET {', '.join(fields)} WHERE id = ?"
-            cursor.execute(query, values)
+            if stale_after_seconds is None:
+                return None
             
-            return cursor.rowcount > 0
+            stale_before = (now - timedelta(seconds=stale_after_seconds)).isoformat()
+            cursor.execute('''
+                UPDATE scheduler_runs
+                SET worker = ?, started_at = ?, error = 'Took over abandoned run'
+                WHERE job = ? AND run_date = ? AND trigger = 'scheduled'
+                  AND status = 'running' AND started_at < ?
+            ''', (worker, now.isoformat(), job, run_date, stale_before))
+            
+            if not cursor.rowcount:
+                return None
+            
+            cursor.execute('''
+                SELECT id FROM scheduler_runs
+                WHERE job = ? AND run_date = ? AND trigger = 'scheduled'
+            ''', (job, run_date))
+            return cursor.fetchone()['id']
     
-    def delete_item(self, item_id: int) -> bool:
+    def finish_job_run(
+        self,
+        run_id: int,
+        status: str,
+        duration_ms: float,
+        rows_scanned: Optional[int] = None,
+        rows_changed: Optional[int] = None,
+        error: Optional[str] = None
+    ) -> None:
         """
-        Delete an item by ID.
+        Record the outcome of a job run.
         
         Args:
-            item_id: ID of the item to delete
-            
-        Returns:
-            True if deletion successful, False otherwise
+            run_id: ID returned by start_job_run
+            status: 'succeeded' or 'failed'
+            duration_ms: Run time in milliseconds
+            rows_scanned: Rows examined (optional)
+            rows_changed: Rows written (optional)
+            error: Failure message (optional)
         """
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute('DELETE FROM perishable_items WHERE id = ?', (item_id,))
-            return cursor.rowcount > 0
+            cursor.execute('''
+                UPDATE scheduler_runs
+                SET status = ?, finished_at = ?, duration_ms = ?,
+                    rows_scanned = ?, rows_changed = ?, error = ?
+                WHERE id = ?
+            ''', (
+                status, datetime.now().isoformat(), duration_ms,
+                rows_scanned, rows_changed, error, run_id
+            ))
     
-    def get_items_by_category(self, category: str) -> List[Dict[str, Any]]:
+    def get_job_runs(
+        self,
+        job: Optional[str] = None,
+        status: Optional[str] = None,
+        run_date: Optional[str] = None,
+        limit: int = 50
+    ) -> List[Dict[str, Any]]:
         """
-        Retrieve items by category.
+        Retrieve job run history, most recent first.
         
         Args:
-            category: Category name
+            job: Filter by job name (optional)
+            status: Filter by status (optional)
+            run_date: Filter by run date (optional)
+            limit: Maximum number of runs
             
         Returns:
-            List of items in the specified category
+            List of run dictionaries
         """
+        clauses = []
+        params: List[Any] = []
+        for column, value in (('job', job), ('status', status), ('run_date', run_date)):
+            if value:
+                clauses.append(f'{column} = ?')
+                params.append(value)
+        
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        params.append(limit)
+        
         with self.get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute(
-                'SELECT * FROM perishable_items WHERE category = ? ORDER BY expiry_date ASC',
-                (category,)
+                f'SELECT * FROM scheduler_runs {where} ORDER BY id DESC LIMIT ?', params
             )
             rows = cursor.fetchall()
             return [dict(row) for row in rows]
     
-    def get_expiring_items(self, days: int = 2) -> List[Dict[str, Any]]:
+    def save_import_job(self, job: Dict[str, Any]) -> None:
         """
-        Retrieve items expiring within specified days.
+        Insert or update the stored progress of an import job.
         
         Args:
-            days: Number of days threshold
+            job: Dictionary with the import_jobs columns (errors as a list)
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT OR REPLACE INTO import_jobs
+                (id, filename, status, rows_parsed, rows_inserted, rows_rejected,
+                 errors, error, elapsed_seconds, created_at, started_at, finished_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (
+                job['id'], job['filename'], job['status'], job['rows_parsed'],
+                job['rows_inserted'], job['rows_rejected'], json.dumps(job['errors']),
+                job['error'], job['elapsed_seconds'], job['created_at'],
+                job['started_at'], job['finished_at']
+            ))
+    
+    def get_import_jobs(self, job_id: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        Retrieve stored import jobs, most recent first.
+        
+        Args:
+            job_id: Only this job (optional)
+            limit: Maximum number of jobs
             
         Returns:
-            List of items expiring soon
+            List of job dictionaries (errors decoded to a list)
+        """
+        where = 'WHERE id = ?' if job_id else ''
+        params: List[Any] = [job_id] if job_id else []
+        params.append(limit)
+        
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                f'SELECT * FROM import_jobs {where} ORDER BY created_at DESC LIMIT ?', params
+            )
+            jobs = [dict(row) for row in cursor.fetchall()]
+        
+        for job in jobs:
+            job['errors'] = json.loads(job['errors'] or '[]')
+        return jobs
+    
+    def prune_import_jobs(self, keep: int) -> int:
+        """
+        Delete all but the `keep` most recent finished import jobs.
+        
+        Returns:
+            Number of jobs deleted
         """
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            target_date = date.today()
             cursor.execute('''
-                SELECT * FROM perishable_items 
-                WHERE expiry_date <= date(?, '+' || ? || ' days')
-                ORDER BY expiry_date ASC
-            ''', (target_date.isoformat(), days))
-            rows = cursor.fetchall()
-            return [dict(row) for row in rows]
+                DELETE FROM import_jobs
+                WHERE status IN ('completed', 'failed') AND id NOT IN (
+                    SELECT id FROM import_jobs WHERE status IN ('completed', 'failed')
+                    ORDER BY created_at DESC LIMIT ?
+                )
+            ''', (keep,))
+            return cursor.rowcount
     
-    def bulk_insert(self, items: List[Dict[str, Any]]) -> int:
+    def _ensure_archive_table(self, cursor: sqlite3.Cursor, month: str) -> str:
+        """
+        Create the archive table of a partition if it doesn't exist.
+        
+        Returns:
+            Table name
+        """
+        table = archive_table(month)
+        cursor.execute(f'''
+            CREATE TABLE IF NOT EXISTS {table} (
+                id INTEGER PRIMARY KEY,
+                item_name TEXT NOT NULL,
+                category TEXT NOT NULL,
+                quantity INTEGER NOT NULL,
+                base_price REAL NOT NULL,
+                cost_price REAL,
+                shelf_life INTEGER,
+                expiry_date DATE NOT NULL,
+                discounted_price REAL,
+                seller_name TEXT,
+                is_active INTEGER,
+                created_at TIMESTAMP,
+                updated_at TIMESTAMP,
+                archived_at TIMESTAMP NOT NULL
+            )
+        ''')
+        cursor.execute(f'CREATE INDEX IF NOT EXISTS idx_{table}_expiry ON {table}(expiry_date, id)')
+        cursor.execute(f'CREATE INDEX IF NOT EXISTS idx_{table}_seller ON {table}(seller_name, expiry_date, id)')
+        return table
+    
+    def create_archive_partitions(self, cutoff: str) -> List[str]:
         """
-        Insert multiple items at once (for CSV import).
+        Create the archive tables needed to archive items expiring before a
+        cutoff, in one short transaction of its own.
+        
+        Connections that start while a schema change is uncommitted can fail
+        their first statement, so archive batches should not carry DDL.
         
         Args:
-            items: List of item dictionaries
+            cutoff: ISO date; items with expiry_date < cutoff will be archived
             
         Returns:
-            Number of items inserted
+            Months whose table was created
         """
+        existing = {partition['month'] for partition in self.get_archive_partitions()}
         with self.get_connection() as conn:
+            rows = conn.execute(
+                'SELECT DISTINCT expiry_date FROM perishable_items WHERE expiry_date < ?', (cutoff,)
+            ).fetchall()
+        missing = sorted({archive_month(row[0]) for row in rows} - existing)
+        
+        if missing:
+            with self.transaction() as conn:
+                cursor = conn.cursor()
+                for month in missing:
+                    self._ensure_archive_table(cursor, month)
+        return missing
+    
+    def archive_expired_batch(self, cutoff: str, batch_size: int = 500) -> Dict[str, int]:
+        """
+        Move one batch of items expiring before a cutoff into the archive,
+        in one short write transaction.
+        
+        Rows are copied into the table of their expiry month and deleted from
+        perishable_items (the delete triggers keep summaries, the change log
+        and the write generation current). Call create_archive_partitions
+        first; a missing table is still created here.
+        
+        Args:
+            cutoff: ISO date; items with expiry_date < cutoff are archived
+            batch_size: Maximum number of rows moved
+            
+        Returns:
+            Dictionary mapping archive month to rows moved (empty when done)
+        """
+        now = datetime.now().isoformat()
+        columns = ', '.join(SNAPSHOT_COLUMNS)
+        
+        with self.transaction() as conn:
             cursor = conn.cursor()
-            count = 0
-            for item in items:
-                cursor.execute('''
-                    INSERT INTO perishable_items 
-                    (item_name, category, quantity, base_price, expiry_date, discounted_price, updated_at)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    item['item_name'],
-                    item['category'],
-                    item['quantity'],
-                    item['base_price'],
-                    item['expiry_date'],
-                    item.get('discounted_price'),
-                    datetime.now().isoformat()
-                ))
-                count += 1
-            return count
+            cursor.execute('''
+                SELECT id, expiry_date FROM perishable_items
+                WHERE expiry_date < ?
+                ORDER BY expiry_date ASC, id ASC
+                LIMIT ?
+            ''', (cutoff, batch_size))
+            
+            partitions: Dict[str, List[int]] = {}
+            for row in cursor.fetchall():
+                partitions.setdefault(archive_month(row['expiry_date']), []).append(row['id'])
+            
+            for month, ids in partitions.items():
+                table = self._ensure_archive_table(cursor, month)
+                placeholders = ', '.join('?' for _ in ids)
+                cursor.execute(f'''
+                    INSERT OR REPLACE INTO {table} ({columns}, archived_at)
+                    SELECT {columns}, ? FROM perishable_items WHERE id IN ({placeholders})
+                ''', [now, *ids])
+                cursor.execute(f'DELETE FROM perishable_items WHERE id IN ({placeholders})', ids)
+                self._catalog_written(cursor.rowcount)
+            
+            return {month: len(ids) for month, ids in partitions.items()}
     
-    def get_category_stats(self) -> List[Dict[str, Any]]:
+    def get_archive_partitions(self) -> List[Dict[str, Any]]:
         """
-        Get statistics by category for visualization.
+        List the archive partitions with their row counts.
         
         Returns:
-            List of category statistics
+            List of dictionaries with month, table and item_count, oldest first
         """
         with self.get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute('''
-                SELECT 
-                    category,
-                    COUNT(*) as item_count,
-                    SUM(quantity) as total_quantity,
-                    AVG(base_price) as avg_price
-                FROM perishable_items
-                GROUP BY category
-                ORDER BY item_count DESC
-            ''')
+                SELECT name FROM sqlite_master
+                WHERE type = 'table' AND name LIKE ? ESCAPE '\\'
+                ORDER BY name
+            ''', (ARCHIVE_TABLE_PREFIX.replace('_', '\\_') + '%',))
+            tables = [row['name'] for row in cursor.fetchall()]
+            
+            partitions = []
+            for table in tables:
+                cursor.execute(f'SELECT COUNT(*) FROM {table}')
+                partitions.append({
+                    'month': table[len(ARCHIVE_TABLE_PREFIX):].replace('_', '-'),
+                    'table': table,
+                    'item_count': cursor.fetchone()[0]
+                })
+            return partitions
+    
+    def query_archive(
+        self,
+        month: Optional[str] = None,
+        seller_name: Optional[str] = None,
+        category: Optional[str] = None,
+        limit: int = 100,
+        after: Optional[Tuple[str, int]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Retrieve archived items in (expiry_date, id) order.
+        
+        Args:
+            month: Archive partition (YYYY-MM); all partitions if omitted
+            seller_name: Filter by seller (optional)
+            category: Filter by category (optional)
+            limit: Maximum number of rows to return
+            after: Keyset position (expiry_date, id) of the previous page's last row
+            
+        Returns:
+            List of dictionaries with item data, archived_at and archive_month
+        
+        Raises:
+            ValueError: If month is not YYYY-MM
+        """
+        partitions = [partition['month'] for partition in self.get_archive_partitions()]
+        if month is not None:
+            archive_table(month)
+            partitions = [month] if month in partitions else []
+        if not partitions:
+            return []
+        
+        clauses = []
+        filter_params: List[Any] = []
+        if seller_name:
+            clauses.append('seller_name = ?')
+            filter_params.append(seller_name)
+        if category:
+            clauses.append('category = ?')
+            filter_params.append(category)
+        if after is not None:
+            clauses.append('(expiry_date, id) > (?, ?)')
+            filter_params.extend(after)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        
+        selects = []
+        params: List[Any] = []
+        for partition in partitions:
+            selects.append(f'SELECT *, ? as archive_month FROM {archive_table(partition)} {where}')
+            params.extend([partition, *filter_params])
+        params.append(limit)
+        
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                f"{' UNION ALL '.join(selects)} ORDER BY expiry_date ASC, id ASC LIMIT ?", params
+            )
             rows = cursor.fetchall()
             return [dict(row) for row in rows]
     
@@ -314,4 +2412,35 @@ class Database:
         with self.get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute('DELETE FROM perishable_items')
+            self._catalog_written(cursor.rowcount)
             return cursor.rowcount
+
+
+# Process-wide Database instances, keyed by absolute database path
+_instances: Dict[str, Database] = {}
+_instances_lock = threading.Lock()
+
+
+def get_database(db_path: str = 'perishable_items.db') -> Database:
+    """
+    Get the shared Database instance for a database file.
+    All blueprints use this so they share one connection pool per process.
+    With BASKETBUDDY_SHARDS set above 1 the instance is a ShardedDatabase
+    spreading sellers over that many files.
+    
+    Args:
+        db_path: Path to SQLite database file
+        
+    Returns:
+        Database instance shared across the process
+    """
+    key = os.path.abspath(db_path)
+    with _instances_lock:
+        if key not in _instances:
+            shard_count = int(os.environ.get(SHARDS_ENV, '').strip() or 1)
+            if shard_count > 1:
+                from sharding import ShardedDatabase
+                _instances[key] = ShardedDatabase(db_path, shard_count)
+            else:
+                _instances[key] = Database(db_path)
+        return _instances[key]
@@ -0,0 +1,66 @@
+"""
+Discount Recompute Engine for Basket Buddy 2.0
+Set-based, incremental daily repricing of perishable items
+
+Mathematical Foundation:
+- Let W(t) = {i ∈ U : expiry(i) ≤ t + 4} − {i : price(i) = 0}
+- f(x) only changes for items in the discount window or newly expired,
+  so the daily recompute is restricted to W(t) instead of all of U
+"""
+
+from datetime import date, timedelta
+from typing import Any, Dict, Optional
+import time
+
+from pricing import max_window_days, price_batch
+from database import Database
+
+
+def recompute_discounts(db: Database, today: Optional[date] = None, full: bool = False) -> Dict[str, Any]:
+    """
+    Recompute stored discounted prices in one transaction.
+
+    Only rows whose price can change on `today` are read (items expiring
+    within the discount window plus newly expired items). They are priced in
+    one vectorized pass, and only rows whose price actually changed are
+    written, with a single batched UPDATE.
+
+    Args:
+        db: Database instance
+        today: Reference date (default: date.today())
+        full: Recompute every row instead of the discount window only
+
+    Returns:
+        Dictionary with rows_scanned, rows_changed, elapsed_ms, as_of and mode
+    """
+    started = time.perf_counter()
+    today = today or date.today()
+    window_end = None if full else (today + timedelta(days=max_window_days())).isoformat()
+
+    with db.transaction():
+        rows = db.get_repricing_candidates(window_end)
+
+        updates = []
+        if rows:
+            _, prices = price_batch(
+                [row['expiry_date'] for row in rows],
+                [row['quantity'] for row in rows],
+                [row['base_price'] for row in rows],
+                [row['category'] for row in rows],
+                today
+            )
+            updates = [
+                (float(price), row['id'])
+                for row, price in zip(rows, prices)
+                if price != row['discounted_price']
+            ]
+
+        rows_changed = db.update_discounted_prices(updates)
+
+    return {
+        'rows_scanned': len(rows),
+        'rows_changed': rows_changed,
+        'elapsed_ms': round((time.perf_counter() - started) * 1000, 2),
+        'as_of': today.isoformat(),
+        'mode': 'full' if full else 'incremental'
+    }
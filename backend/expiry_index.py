@@ -0,0 +1,451 @@
+"""
+Expiry Index for Basket Buddy 2.0
+In-memory time wheel bucketing item ids by expiry day
+
+Time Wheel Foundation:
+- Items are partitioned by expiry day: U = ⋃ B(d), B(d) = {i : expiry(i) = d}
+- The next WHEEL_DAYS days (today onwards) live in a ring of slots indexed
+  by d mod WHEEL_DAYS; earlier days are "overdue" buckets, later days wait
+  in an overflow map until they enter the ring
+- The day rollover is one bucket shift: today's slot joins the overdue
+  buckets and the reused slot takes the day entering the window
+- "Expiring within n days" is ⋃_{d ≤ today + n} B(d), and the status
+  colors depend only on d - today, so counts cost O(buckets), not O(items)
+- Overdue buckets are kept for OVERDUE_DAYS days only: items expired
+  longer ago form the tail T = ⋃_{d < today - OVERDUE_DAYS} B(d), which is
+  counted and read with an indexed expiry_date range query instead, so the
+  index holds the hot window only
+- The index follows writes through the change log: when the write
+  generation moves, only the items logged since the last sync are
+  re-bucketed (a full reload happens only if history was pruned)
+- With sharded storage every shard has its own change log, so each shard
+  gets its own wheel and the queries combine them
+"""
+
+from collections import Counter
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+import heapq
+import os
+import threading
+
+from database import Database
+
+
+# Ring size: today plus the days that have their own status color or
+# near-expiry flag (1-2 days near expiry, 3 days yellow, 4+ green)
+WHEEL_DAYS = 8
+
+# Days an expired item stays in the index before it leaves with the tail
+OVERDUE_DAYS = 7
+
+# Rows fetched per IN (...) query
+FETCH_CHUNK_SIZE = 500
+
+# Change log entries read per page while syncing
+SYNC_PAGE_SIZE = 1000
+
+# More changed items than this since the last sync: reload instead
+MAX_INCREMENTAL_CHANGES = 50000
+
+
+def _chunks(values: List[int], size: int) -> Iterable[List[int]]:
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def _expiry_key(row: Dict[str, Any]) -> Tuple:
+    return (row['expiry_date'], row['id'])
+
+
+def _expiry_day(expiry_date: Any) -> Optional[int]:
+    """Proleptic ordinal of an expiry date, or None if it cannot be parsed."""
+    try:
+        return date.fromisoformat(str(expiry_date)[:10]).toordinal()
+    except (TypeError, ValueError):
+        return None
+
+
+class ExpiryWheel:
+    """
+    Expiry-day buckets of every item in the catalog.
+
+    Readers call the query methods directly; each one first brings the
+    index up to the current write generation and local date. Items with an
+    unparseable expiry_date are not indexed; items expired more than
+    overdue_days days ago are served from the database.
+    """
+
+    def __init__(self, db: Database, wheel_days: int = WHEEL_DAYS, overdue_days: int = OVERDUE_DAYS):
+        """
+        Initialize an empty index (filled on first use).
+
+        Args:
+            db: Database instance
+            wheel_days: Number of ring slots (at least 4)
+            overdue_days: Days expired items stay in the index
+        """
+        self.db = db
+        self.wheel_days = max(wheel_days, 4)
+        self.overdue_days = max(overdue_days, 0)
+        self._lock = threading.RLock()
+        self._entries: Dict[int, tuple] = {}       # id -> (day, active)
+        self._ring: List[Set[int]] = []
+        self._overdue: Dict[int, Set[int]] = {}    # day < base
+        self._future: Dict[int, Set[int]] = {}     # day >= base + wheel_days
+        self._inactive: Counter = Counter()        # day -> inactive items
+        self._base: Optional[int] = None           # ordinal of today's slot
+        self._generation: Optional[int] = None
+        self._seq: Optional[int] = None
+        self._stats = {
+            'reloads': 0,
+            'syncs': 0,
+            'items_resynced': 0,
+            'shifts': 0,
+            'evicted': 0,
+        }
+
+    # ------------------------------------------------------------------
+    # Buckets
+    # ------------------------------------------------------------------
+
+    def _bucket(self, day: int, create: bool = False) -> Optional[Set[int]]:
+        if day < self._base:
+            buckets = self._overdue
+        elif day >= self._base + self.wheel_days:
+            buckets = self._future
+        else:
+            return self._ring[day % self.wheel_days]
+        if create:
+            return buckets.setdefault(day, set())
+        return buckets.get(day)
+
+    def _horizon(self) -> int:
+        """First day still indexed; earlier days belong to the tail."""
+        return self._base - self.overdue_days
+
+    def _add(self, item_id: int, expiry_date: Any, active: Any) -> None:
+        day = _expiry_day(expiry_date)
+        if day is None or day < self._horizon():
+            return
+        self._entries[item_id] = (day, bool(active))
+        self._bucket(day, create=True).add(item_id)
+        if not active:
+            self._inactive[day] += 1
+
+    def _remove(self, item_id: int) -> None:
+        entry = self._entries.pop(item_id, None)
+        if entry is None:
+            return
+        day, active = entry
+        bucket = self._bucket(day)
+        bucket.discard(item_id)
+        if not bucket:
+            # Ring slots are reused; overflow buckets are dropped when empty
+            if day < self._base:
+                del self._overdue[day]
+            elif day >= self._base + self.wheel_days:
+                del self._future[day]
+        if not active:
+            self._inactive[day] -= 1
+            if not self._inactive[day]:
+                del self._inactive[day]
+
+    def _shift(self) -> None:
+        """Advance the wheel by one day."""
+        slot = self._base % self.wheel_days
+        if self._ring[slot]:
+            self._overdue[self._base] = self._ring[slot]
+        self._base += 1
+        # The freed slot now holds the day entering the window
+        self._ring[slot] = self._future.pop(self._base + self.wheel_days - 1, set())
+        # The overdue day passing the horizon joins the tail
+        evicted = self._overdue.pop(self._horizon() - 1, set())
+        for item_id in evicted:
+            del self._entries[item_id]
+        self._inactive.pop(self._horizon() - 1, None)
+        self._stats['evicted'] += len(evicted)
+        self._stats['shifts'] += 1
+
+    def _count(self, day: int, active_only: bool) -> int:
+        bucket = self._bucket(day)
+        if not bucket:
+            return 0
+        return len(bucket) - (self._inactive.get(day, 0) if active_only else 0)
+
+    # ------------------------------------------------------------------
+    # Keeping current
+    # ------------------------------------------------------------------
+
+    def _reload(self, today: int) -> None:
+        generation, seq, rows = self.db.read_expiry_entries(
+            date.fromordinal(today - self.overdue_days).isoformat()
+        )
+        self._entries = {}
+        self._ring = [set() for _ in range(self.wheel_days)]
+        self._overdue = {}
+        self._future = {}
+        self._inactive = Counter()
+        self._base = today
+        for item_id, expiry_date, active in rows:
+            self._add(item_id, expiry_date, active)
+        self._generation, self._seq = generation, seq
+        self._stats['reloads'] += 1
+
+    def _sync_changes(self) -> bool:
+        """
+        Re-bucket the items logged since the last sync.
+
+        Returns:
+            False if the change log cannot cover the gap (reload needed)
+        """
+        if self._seq is None or not self.db.change_log_available:
+            return False
+        if self.db.get_change_log_bounds()[0] > self._seq:
+            return False
+
+        changed: Set[int] = set()
+        seq = self._seq
+        while True:
+            entries = self.db.get_changes(seq, SYNC_PAGE_SIZE)
+            for entry in entries:
+                # A reprice changes neither the expiry date nor the active flag
+                if entry['op'] != 'reprice':
+                    changed.add(entry['item_id'])
+            if entries:
+                seq = entries[-1]['seq']
+            if len(entries) < SYNC_PAGE_SIZE:
+                break
+            if len(changed) > MAX_INCREMENTAL_CHANGES:
+                return False
+
+        ids = sorted(changed)
+        rows: Dict[int, Dict[str, Any]] = {}
+        for chunk in _chunks(ids, FETCH_CHUNK_SIZE):
+            rows.update(self.db.get_items_by_ids(chunk))
+        for item_id in ids:
+            self._remove(item_id)
+            row = rows.get(item_id)
+            if row is not None:
+                self._add(item_id, row['expiry_date'], row.get('is_active') != 0)
+
+        self._seq = seq
+        self._stats['syncs'] += 1
+        self._stats['items_resynced'] += len(ids)
+        return True
+
+    def refresh(self) -> None:
+        """Bring the index up to the current write generation and local date."""
+        today = date.today().toordinal()
+        with self._lock:
+            if self._base is None or today < self._base:
+                self._reload(today)
+                return
+
+            while self._base < today:
+                self._shift()
+
+            generation = self.db.get_write_generation()
+            if generation != self._generation:
+                # Entries logged up to `generation` are visible now; a later
+                # write only makes the next sync read it again
+                if self._sync_changes():
+                    self._generation = generation
+                else:
+                    self._reload(today)
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def _expiring(self, days: int) -> Tuple[List[int], int, int]:
+        """Indexed ids with expiry_date <= today + days, the cutoff and the horizon."""
+        self.refresh()
+        with self._lock:
+            cutoff = self._base + days
+            ids: List[int] = []
+            for buckets in (self._overdue, self._future):
+                for day, bucket in buckets.items():
+                    if day <= cutoff:
+                        ids.extend(bucket)
+            for day in range(self._base, min(cutoff, self._base + self.wheel_days - 1) + 1):
+                ids.extend(self._ring[day % self.wheel_days])
+            return ids, cutoff, self._horizon()
+
+    def expiring_ids(self, days: int) -> List[int]:
+        """
+        Ids of the indexed items expiring within `days` days (expired ones
+        up to overdue_days ago included), like expiry_date <= today + days.
+
+        Args:
+            days: Number of days threshold
+
+        Returns:
+            List of item ids
+        """
+        return self._expiring(days)[0]
+
+    def get_expiring_items(self, days: int = 2) -> List[Dict[str, Any]]:
+        """
+        Retrieve items expiring within specified days, like
+        Database.get_expiring_items but without a date predicate scan over
+        the hot window (the tail is one indexed range read).
+
+        Args:
+            days: Number of days threshold
+
+        Returns:
+            List of items ordered by (expiry_date, id)
+        """
+        ids, cutoff, horizon = self._expiring(days)
+        items = self.db.get_items_expired_before(date.fromordinal(min(horizon, cutoff + 1)).isoformat())
+        for chunk in _chunks(ids, FETCH_CHUNK_SIZE):
+            items.extend(self.db.get_items_by_ids(chunk).values())
+        items.sort(key=_expiry_key)
+        return items
+
+    def breakdown(self, active_only: bool = False) -> Dict[str, Any]:
+        """
+        Count items by status color and expiry state, the way
+        PerishableItem.get_status_color and is_near_expiry classify them.
+
+        Args:
+            active_only: Count only active items
+
+        Returns:
+            Dictionary with total, expired, near_expiry, status_colors and
+            per-day counts for the days in the wheel
+        """
+        self.refresh()
+        with self._lock:
+            base = self._base
+            overdue = sum(self._count(day, active_only) for day in self._overdue)
+            by_day = [self._count(base + offset, active_only) for offset in range(self.wheel_days)]
+            total = len(self._entries)
+            if active_only:
+                total -= sum(self._inactive.values())
+            horizon = self._horizon()
+
+        tail = self.db.count_items_expired_before(date.fromordinal(horizon).isoformat())[1 if active_only else 0]
+        total += tail
+        expired = tail + overdue + by_day[0]
+        near_expiry = by_day[1] + by_day[2]
+        yellow = by_day[3]
+        return {
+            'as_of': date.fromordinal(base).isoformat(),
+            'total': total,
+            'expired': expired,
+            'near_expiry': near_expiry,
+            'status_colors': {
+                'red': expired + near_expiry,
+                'yellow': yellow,
+                'green': total - expired - near_expiry - yellow
+            },
+            'by_days_to_expiry': {str(offset): count for offset, count in enumerate(by_day)}
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get index metrics.
+
+        Returns:
+            Dictionary of reload/sync counters, size and wheel position
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats.update({
+                'items': len(self._entries),
+                'overdue_buckets': len(self._overdue),
+                'future_buckets': len(self._future),
+                'wheel_days': self.wheel_days,
+                'overdue_days': self.overdue_days,
+                'base_day': date.fromordinal(self._base).isoformat() if self._base else None,
+                'generation': self._generation,
+                'change_seq': self._seq
+            })
+        return stats
+
+
+class ShardedExpiryIndex:
+    """
+    Expiry index of a ShardedDatabase: one ExpiryWheel per shard, each
+    following its own shard's change log, with the same query methods as
+    ExpiryWheel. Item ids are unique across shards.
+    """
+
+    def __init__(self, db, wheel_days: int = WHEEL_DAYS, overdue_days: int = OVERDUE_DAYS):
+        """
+        Initialize one empty wheel per shard.
+
+        Args:
+            db: ShardedDatabase instance
+            wheel_days: Number of ring slots of each wheel
+            overdue_days: Days expired items stay in the index
+        """
+        self.db = db
+        self.wheels = [ExpiryWheel(shard, wheel_days, overdue_days) for shard in db.shards]
+
+    def refresh(self) -> None:
+        """Bring every shard's wheel up to date."""
+        for wheel in self.wheels:
+            wheel.refresh()
+
+    def expiring_ids(self, days: int) -> List[int]:
+        """Ids of the indexed items expiring within `days` days on any shard."""
+        return [item_id for wheel in self.wheels for item_id in wheel.expiring_ids(days)]
+
+    def get_expiring_items(self, days: int = 2) -> List[Dict[str, Any]]:
+        """Items expiring within `days` days on any shard, ordered by (expiry_date, id)."""
+        return list(heapq.merge(*(wheel.get_expiring_items(days) for wheel in self.wheels), key=_expiry_key))
+
+    def breakdown(self, active_only: bool = False) -> Dict[str, Any]:
+        """Status color and expiry state counts summed over the shards."""
+        parts = [wheel.breakdown(active_only) for wheel in self.wheels]
+        combined = parts[0]
+        for part in parts[1:]:
+            for key in ('total', 'expired', 'near_expiry'):
+                combined[key] += part[key]
+            for group in ('status_colors', 'by_days_to_expiry'):
+                for key, count in part[group].items():
+                    combined[group][key] += count
+        return combined
+
+    def stats(self) -> Dict[str, Any]:
+        """Index metrics summed over the shards, with each shard's own."""
+        shards = [wheel.stats() for wheel in self.wheels]
+        stats: Dict[str, Any] = {
+            key: sum(shard[key] for shard in shards)
+            for key in ('reloads', 'syncs', 'items_resynced', 'shifts', 'evicted',
+                        'items', 'overdue_buckets', 'future_buckets')
+        }
+        stats.update({
+            'wheel_days': shards[0]['wheel_days'],
+            'overdue_days': shards[0]['overdue_days'],
+            'base_day': shards[0]['base_day'],
+            'shards': shards
+        })
+        return stats
+
+
+# Process-wide indexes, keyed by absolute database path
+_indexes: Dict[str, Any] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_expiry_index(db: Database):
+    """
+    Get the shared expiry index of a database.
+
+    Args:
+        db: Database or ShardedDatabase instance
+
+    Returns:
+        ExpiryWheel (ShardedExpiryIndex for sharded storage) shared across
+        the process
+    """
+    key = os.path.abspath(db.db_path)
+    with _indexes_lock:
+        if key not in _indexes:
+            shards = getattr(db, 'shards', None)
+            _indexes[key] = ShardedExpiryIndex(db) if shards is not None else ExpiryWheel(db)
+        return _indexes[key]
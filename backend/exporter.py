@@ -0,0 +1,199 @@
+"""
+Catalog Exporter for Basket Buddy 2.0
+Streaming CSV / NDJSON and columnar (Arrow IPC, Parquet) exports
+
+Design:
+- Rows are read from a server-side cursor in fixed-size batches
+- Each batch is enriched with computed discount data in one vectorized pass
+- Each format encodes a batch and yields its bytes immediately, so the
+  backend never holds the full file in memory
+"""
+
+from datetime import date
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+import csv
+import io
+import json
+
+from pagination import batched
+from pricing import days_to_expiry, price_batch
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as pa_ipc
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+
+# Columns of the CSV export
+CSV_FIELDS = [
+    'id', 'item_name', 'category', 'quantity', 'base_price',
+    'expiry_date', 'discounted_price', 'discount_percentage', 'days_to_expiry'
+]
+
+# Columns of the NDJSON and columnar exports
+CATALOG_FIELDS = [
+    ('id', 'int64'),
+    ('item_name', 'string'),
+    ('category', 'string'),
+    ('quantity', 'int64'),
+    ('base_price', 'float64'),
+    ('cost_price', 'float64'),
+    ('shelf_life', 'int64'),
+    ('expiry_date', 'string'),
+    ('discounted_price', 'float64'),
+    ('discount_percentage', 'float64'),
+    ('days_to_expiry', 'int64'),
+    ('seller_name', 'string'),
+    ('is_active', 'bool'),
+    ('created_at', 'string'),
+    ('updated_at', 'string'),
+]
+
+EXPORT_BATCH_SIZE = 5000
+
+# MIME type and file extension per export format
+EXPORT_FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'arrow': ('application/vnd.apache.arrow.stream', 'arrow'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+}
+
+COLUMNAR_FORMATS = ('arrow', 'parquet')
+
+
+def enrich_batch(rows: List[Dict[str, Any]], today: Optional[date] = None) -> List[Dict[str, Any]]:
+    """
+    Add computed discount fields to a batch of database rows.
+
+    Args:
+        rows: Database record dictionaries
+        today: Reference date (default: date.today())
+
+    Returns:
+        Rows with discount_percentage, days_to_expiry and discounted_price filled in
+    """
+    today = today or date.today()
+    expiry_dates = [row['expiry_date'] for row in rows]
+    discounts, prices = price_batch(
+        expiry_dates,
+        [row['quantity'] for row in rows],
+        [row['base_price'] for row in rows],
+        [row['category'] for row in rows],
+        today
+    )
+    days = days_to_expiry(expiry_dates, today)
+
+    enriched = []
+    for row, discount, price, day in zip(rows, discounts, prices, days):
+        item = dict(row)
+        item['discount_percentage'] = float(discount)
+        item['days_to_expiry'] = int(day)
+        item['discounted_price'] = row.get('discounted_price') or float(price)
+        item['cost_price'] = row.get('cost_price') or row['base_price'] * 0.7  # Default 30% markup
+        item['seller_name'] = row.get('seller_name') or 'Admin'
+        item['is_active'] = bool(row.get('is_active', 1))
+        enriched.append(item)
+    return enriched
+
+
+def _enriched_batches(rows: Iterable[Dict[str, Any]]) -> Iterator[List[Dict[str, Any]]]:
+    """Group rows into batches and enrich each with computed fields."""
+    today = date.today()
+    for batch in batched(rows, EXPORT_BATCH_SIZE):
+        yield enrich_batch(batch, today)
+
+
+def iter_csv(rows: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    """
+    Encode rows as CSV, one chunk per batch.
+    The header is written before the first row (an empty catalog yields nothing).
+    """
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=CSV_FIELDS, extrasaction='ignore')
+    header_written = False
+
+    for batch in _enriched_batches(rows):
+        if not header_written:
+            writer.writeheader()
+            header_written = True
+        writer.writerows(batch)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def iter_ndjson(rows: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    """Encode rows as newline-delimited JSON, one chunk per batch."""
+    fields = [name for name, _ in CATALOG_FIELDS]
+    for batch in _enriched_batches(rows):
+        yield ''.join(json.dumps({name: item.get(name) for name in fields}) + '\n' for item in batch)
+
+
+class _DrainableSink(io.RawIOBase):
+    """Write-only buffer whose contents are drained after every batch."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _arrow_schema():
+    """Arrow schema of the columnar export."""
+    types = {
+        'int64': pa.int64(),
+        'float64': pa.float64(),
+        'string': pa.string(),
+        'bool': pa.bool_(),
+    }
+    return pa.schema([(name, types[dtype]) for name, dtype in CATALOG_FIELDS])
+
+
+def iter_columnar(rows: Iterable[Dict[str, Any]], fmt: str = 'arrow') -> Iterator[bytes]:
+    """
+    Encode rows as an Arrow IPC stream or a Parquet file, one record batch /
+    row group per batch.
+
+    Args:
+        rows: Database record dictionaries
+        fmt: 'arrow' or 'parquet'
+
+    Yields:
+        Encoded bytes
+    """
+    if not PYARROW_AVAILABLE:
+        raise RuntimeError('pyarrow is required for columnar exports')
+
+    schema = _arrow_schema()
+    sink = _DrainableSink()
+    if fmt == 'parquet':
+        writer = pq.ParquetWriter(sink, schema)
+    else:
+        writer = pa_ipc.new_stream(sink, schema)
+
+    try:
+        for batch in _enriched_batches(rows):
+            columns = {name: [item.get(name) for item in batch] for name, _ in CATALOG_FIELDS}
+            table = pa.Table.from_pydict(columns, schema=schema)
+            writer.write_table(table)
+            data = sink.drain()
+            if data:
+                yield data
+    finally:
+        writer.close()
+
+    yield sink.drain()
@@ -0,0 +1,324 @@
+"""
+Streaming CSV Importer for Basket Buddy 2.0
+Chunked, incremental import of seller feeds with job progress tracking
+
+Set Theory Foundation:
+- An upload is a sequence of rows R = (r₁, r₂, ..., rₙ) read lazily
+- R is partitioned into valid rows V and rejected rows R − V
+- V is inserted in fixed-size chunks C₁ ∪ C₂ ∪ ... = V, one transaction each
+- Job progress is stored in the database after every chunk, so any worker
+  process can report on a job started by another
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import csv
+import os
+import threading
+import time
+import uuid
+
+from database import Database
+from pricing import price_batch
+
+
+# Rows inserted per executemany / transaction
+IMPORT_CHUNK_SIZE = 5000
+
+# Rejected rows reported in detail (the count is always exact)
+MAX_REPORTED_ERRORS = 100
+
+# Finished jobs kept in the database for the progress endpoint
+MAX_FINISHED_JOBS = 50
+
+
+class ImportJob:
+    """
+    Progress and outcome of one CSV import.
+
+    Attributes:
+        id: Unique job identifier
+        filename: Name of the uploaded file
+        status: 'queued', 'running', 'completed' or 'failed'
+        rows_parsed: Data rows read from the file so far
+        rows_inserted: Rows committed to the database so far
+        rows_rejected: Rows that failed validation
+        errors: First MAX_REPORTED_ERRORS rejection messages
+    """
+
+    def __init__(self, filename: str):
+        self.id = uuid.uuid4().hex
+        self.filename = filename
+        self.status = 'queued'
+        self.rows_parsed = 0
+        self.rows_inserted = 0
+        self.rows_rejected = 0
+        self.errors: List[str] = []
+        self.error: Optional[str] = None
+        self.created_at = datetime.now()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self._started = None
+        self._finished = None
+        self._stored_elapsed = 0.0
+
+    def reject(self, row_num: int, message: str) -> None:
+        """Record a rejected row."""
+        self.rows_rejected += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(f"Row {row_num}: {message}")
+
+    @property
+    def elapsed_seconds(self) -> float:
+        """Seconds spent running (so far, if still running)."""
+        if self._started is None:
+            return self._stored_elapsed
+        return (self._finished or time.perf_counter()) - self._started
+
+    @property
+    def throughput(self) -> float:
+        """Rows parsed per second."""
+        elapsed = self.elapsed_seconds
+        return round(self.rows_parsed / elapsed, 2) if elapsed > 0 else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Convert job to dictionary for JSON serialization.
+
+        Returns:
+            Dictionary representation of the job
+        """
+        return {
+            'job_id': self.id,
+            'filename': self.filename,
+            'status': self.status,
+            'rows_parsed': self.rows_parsed,
+            'rows_inserted': self.rows_inserted,
+            'rows_rejected': self.rows_rejected,
+            'throughput_rows_per_sec': self.throughput,
+            'elapsed_seconds': round(self.elapsed_seconds, 3),
+            'errors': list(self.errors),
+            'error': self.error,
+            'created_at': self.created_at.isoformat(),
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
+    def to_record(self) -> Dict[str, Any]:
+        """
+        Convert job to the columns stored by Database.save_import_job.
+
+        Returns:
+            Dictionary of import_jobs columns
+        """
+        data = self.to_dict()
+        return {
+            'id': self.id,
+            'filename': self.filename,
+            'status': self.status,
+            'rows_parsed': self.rows_parsed,
+            'rows_inserted': self.rows_inserted,
+            'rows_rejected': self.rows_rejected,
+            'errors': data['errors'],
+            'error': self.error,
+            'elapsed_seconds': self.elapsed_seconds,
+            'created_at': data['created_at'],
+            'started_at': data['started_at'],
+            'finished_at': data['finished_at']
+        }
+
+    @classmethod
+    def from_record(cls, record: Dict[str, Any]) -> 'ImportJob':
+        """
+        Rebuild a job from its stored columns (progress as of the last save).
+
+        Args:
+            record: Dictionary returned by Database.get_import_jobs
+
+        Returns:
+            ImportJob instance
+        """
+        job = cls(record['filename'])
+        job.id = record['id']
+        job.status = record['status']
+        job.rows_parsed = record['rows_parsed']
+        job.rows_inserted = record['rows_inserted']
+        job.rows_rejected = record['rows_rejected']
+        job.errors = list(record['errors'])
+        job.error = record['error']
+        job.created_at = datetime.fromisoformat(record['created_at'])
+        job.started_at = datetime.fromisoformat(record['started_at']) if record['started_at'] else None
+        job.finished_at = datetime.fromisoformat(record['finished_at']) if record['finished_at'] else None
+        job._stored_elapsed = record['elapsed_seconds'] or 0.0
+        return job
+
+
+class CSVImporter:
+    """
+    Import CSV files into the database in fixed-size chunks.
+
+    Rows are parsed lazily from disk, validated, priced per chunk by the
+    batch pricing engine and inserted with one executemany per chunk, so
+    memory stays bounded by the chunk size regardless of file size.
+
+    Jobs are stored in the database; jobs running in this process are also
+    kept in memory, so their progress is reported live rather than as of
+    the last chunk.
+    """
+
+    def __init__(
+        self,
+        db: Database,
+        validate: Callable[[Dict[str, Any]], Tuple[bool, str]],
+        chunk_size: int = IMPORT_CHUNK_SIZE
+    ):
+        """
+        Initialize the importer.
+
+        Args:
+            db: Database instance
+            validate: Row validator returning (is_valid, error_message)
+            chunk_size: Rows inserted per transaction
+        """
+        self.db = db
+        self.validate = validate
+        self.chunk_size = chunk_size
+        self._jobs: Dict[str, ImportJob] = {}
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def create_job(self, filename: str) -> ImportJob:
+        """Create, store and register a new job."""
+        job = ImportJob(filename)
+        with self._lock:
+            self._jobs[job.id] = job
+        self.db.save_import_job(job.to_record())
+        self.db.prune_import_jobs(MAX_FINISHED_JOBS)
+        return job
+
+    def get_job(self, job_id: str) -> Optional[ImportJob]:
+        """Look up a job by id, whichever worker runs it."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is not None:
+            return job
+        records = self.db.get_import_jobs(job_id)
+        return ImportJob.from_record(records[0]) if records else None
+
+    def list_jobs(self) -> List[ImportJob]:
+        """Stored jobs of every worker, most recent first."""
+        records = self.db.get_import_jobs(limit=MAX_FINISHED_JOBS * 2)
+        with self._lock:
+            return [self._jobs.get(record['id']) or ImportJob.from_record(record) for record in records]
+
+    def _save(self, job: ImportJob) -> None:
+        """Store the job's progress so other workers can report it."""
+        self.db.save_import_job(job.to_record())
+
+    def submit(self, path: str, job: ImportJob) -> ImportJob:
+        """
+        Run an import in the background.
+        Imports run one at a time so they never compete for the write lock.
+
+        Args:
+            path: Path of the spooled upload (deleted when the job finishes)
+            job: Job created with create_job
+
+        Returns:
+            The submitted job
+        """
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='csv-import')
+        self._executor.submit(self.run, path, job, True)
+        return job
+
+    def run(self, path: str, job: ImportJob, remove_file: bool = False) -> ImportJob:
+        """
+        Run an import synchronously.
+
+        Args:
+            path: Path of the CSV file
+            job: Job to report progress on
+            remove_file: Delete the file when done
+
+        Returns:
+            The finished job
+        """
+        job.status = 'running'
+        job.started_at = datetime.now()
+        job._started = time.perf_counter()
+
+        try:
+            self._save(job)
+            with open(path, newline='', encoding='utf-8-sig') as stream:
+                chunk: List[Dict[str, Any]] = []
+
+                for row_num, row in enumerate(csv.DictReader(stream), start=2):
+                    job.rows_parsed += 1
+                    item = self._parse_row(row_num, row, job)
+                    if item is None:
+                        continue
+
+                    chunk.append(item)
+                    if len(chunk) >= self.chunk_size:
+                        self._insert_chunk(chunk, job)
+                        chunk = []
+
+                if chunk:
+                    self._insert_chunk(chunk, job)
+
+            job.status = 'completed'
+        except Exception as e:
+            job.status = 'failed'
+            job.error = str(e)
+        finally:
+            job._finished = time.perf_counter()
+            job.finished_at = datetime.now()
+            if remove_file:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            try:
+                self._save(job)
+            except Exception:
+                pass  # The in-memory job still reports the outcome here
+            with self._lock:
+                self._jobs.pop(job.id, None)
+
+        return job
+
+    def _parse_row(self, row_num: int, row: Dict[str, Any], job: ImportJob) -> Optional[Dict[str, Any]]:
+        """Validate and convert one CSV row; record a rejection on failure."""
+        try:
+            is_valid, error_msg = self.validate(row)
+            if not is_valid:
+                job.reject(row_num, error_msg)
+                return None
+
+            return {
+                'item_name': row['item_name'],
+                'category': row['category'],
+                'quantity': int(row['quantity']),
+                'base_price': float(row['base_price']),
+                'expiry_date': row['expiry_date']
+            }
+        except Exception as e:
+            job.reject(row_num, str(e))
+            return None
+
+    def _insert_chunk(self, chunk: List[Dict[str, Any]], job: ImportJob) -> None:
+        """Price a chunk in one vectorized pass and insert it in one transaction."""
+        _, prices = price_batch(
+            [item['expiry_date'] for item in chunk],
+            [item['quantity'] for item in chunk],
+            [item['base_price'] for item in chunk],
+            [item['category'] for item in chunk]
+        )
+        for item, price in zip(chunk, prices):
+            item['discounted_price'] = float(price)
+
+        job.rows_inserted += self.db.bulk_insert(chunk)
+        self._save(job)
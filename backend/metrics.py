@@ -0,0 +1,261 @@
+"""
+Request Metrics for Basket Buddy 2.0
+Per-route latency, SQL accounting and response size in Prometheus format
+
+Measurement Foundation:
+- Every request r is tagged with its route template ρ(r) (not the raw URL,
+  so label cardinality stays bounded)
+- Per request: wall time, SQL statements, SQL time, rows hydrated and
+  response bytes are accumulated and observed into histograms keyed by ρ
+- SQL figures come from the Database query observer, attributed to the
+  request running on the same thread
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import os
+import threading
+import time
+
+from flask import Flask, Response, request
+
+
+# Histogram bucket upper bounds
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 500)
+ROW_COUNT_BUCKETS = (0, 1, 10, 100, 1000, 10000, 100000, 1000000)
+SIZE_BUCKETS = (256, 1024, 10240, 102400, 1048576, 10485760, 104857600)
+
+# Set to 1 to send Server-Timing on every response; otherwise clients opt in
+# per request with the X-Server-Timing: 1 header
+SERVER_TIMING_ENV = 'BASKETBUDDY_SERVER_TIMING'
+SERVER_TIMING_REQUEST_HEADER = 'X-Server-Timing'
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class Histogram:
+    """Cumulative histogram with fixed buckets, one series per label set."""
+
+    def __init__(self, name: str, help_text: str, buckets: Tuple[float, ...], labels: Tuple[str, ...]):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self.labels = labels
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, label_values: Tuple[str, ...], value: float) -> None:
+        """Record one observation. Caller holds the registry lock."""
+        series = self._series.get(label_values)
+        if series is None:
+            # Per-bucket counts, then +Inf count, then sum
+            series = self._series[label_values] = [0] * (len(self.buckets) + 2)
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[index] += 1
+        series[-2] += 1
+        series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        for label_values, series in sorted(self._series.items()):
+            labels = _format_labels(self.labels, label_values)
+            prefix = labels[1:-1] + ',' if labels else ''
+            for bound, count in zip(self.buckets, series):
+                lines.append(f'{self.name}_bucket{{{prefix}le="{_format_number(bound)}"}} {count}')
+            lines.append(f'{self.name}_bucket{{{prefix}le="+Inf"}} {series[-2]}')
+            lines.append(f'{self.name}_count{labels} {series[-2]}')
+            lines.append(f'{self.name}_sum{labels} {_format_number(series[-1])}')
+        return lines
+
+
+class Counter:
+    """Monotonic counter, one series per label set."""
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self._series: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, label_values: Tuple[str, ...] = (), amount: float = 1) -> None:
+        """Increment a series. Caller holds the registry lock."""
+        self._series[label_values] = self._series.get(label_values, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} counter']
+        for label_values, value in sorted(self._series.items()):
+            lines.append(f'{self.name}{_format_labels(self.labels, label_values)} {_format_number(value)}')
+        return lines
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...]) -> str:
+    if not names:
+        return ''
+    pairs = []
+    for name, value in zip(names, values):
+        escaped = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{name}="{escaped}"')
+    return '{' + ','.join(pairs) + '}'
+
+
+def _format_number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class RequestStats:
+    """Figures accumulated for the request running on a thread."""
+
+    __slots__ = ('started', 'queries', 'sql_seconds', 'rows')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.sql_seconds = 0.0
+        self.rows = 0
+
+
+class MetricsRegistry:
+    """
+    Process-wide request and SQL metrics.
+
+    Install on a Flask app with install(); SQL statements are attributed to
+    the request active on the executing thread. Statements run outside a
+    request (scheduler, imports) only count toward the SQL totals.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._collectors: List[Callable[[], List[str]]] = []
+        route = ('route', 'method')
+        self.request_duration = Histogram(
+            'basketbuddy_http_request_duration_seconds', 'Request latency', LATENCY_BUCKETS, route)
+        self.requests = Counter(
+            'basketbuddy_http_requests_total', 'Requests served', ('route', 'method', 'status'))
+        self.request_queries = Histogram(
+            'basketbuddy_http_request_sql_queries', 'SQL statements per request', QUERY_COUNT_BUCKETS, route)
+        self.request_sql_duration = Histogram(
+            'basketbuddy_http_request_sql_duration_seconds', 'SQL time per request', LATENCY_BUCKETS, route)
+        self.request_rows = Histogram(
+            'basketbuddy_http_request_rows_hydrated', 'Rows fetched from SQLite per request',
+            ROW_COUNT_BUCKETS, route)
+        self.response_size = Histogram(
+            'basketbuddy_http_response_size_bytes', 'Response body size (non-streamed responses)',
+            SIZE_BUCKETS, route)
+        self.sql_queries = Counter('basketbuddy_sql_queries_total', 'SQL statements executed')
+        self.sql_seconds = Counter('basketbuddy_sql_duration_seconds_total', 'Time spent in SQL')
+        self.sql_rows = Counter('basketbuddy_sql_rows_total', 'Rows fetched from SQLite')
+
+    def add_collector(self, collector: Callable[[], List[str]]) -> None:
+        """Register a callable returning extra exposition lines (e.g. gauges)."""
+        self._collectors.append(collector)
+
+    def observe_query(self, sql: str, parameters: Any, elapsed: float, rows: int) -> None:
+        """Database query observer: attribute one statement to the current request."""
+        stats = getattr(self._local, 'stats', None)
+        if stats is not None:
+            stats.queries += 1
+            stats.sql_seconds += elapsed
+            stats.rows += rows
+        with self._lock:
+            self.sql_queries.inc()
+            self.sql_seconds.inc(amount=elapsed)
+            self.sql_rows.inc(amount=rows)
+
+    def current(self) -> Optional[RequestStats]:
+        """Stats of the request running on this thread, if any."""
+        return getattr(self._local, 'stats', None)
+
+    def install(self, app: Flask, db) -> None:
+        """
+        Hook request timing into a Flask app and SQL accounting into a Database.
+
+        Args:
+            app: Flask application
+            db: Database instance whose statements are accounted
+        """
+        db.add_query_observer(self.observe_query)
+        always_send_timing = os.environ.get(SERVER_TIMING_ENV, '0') == '1'
+
+        @app.before_request
+        def _start_request_metrics():
+            self._local.stats = RequestStats()
+
+        @app.after_request
+        def _record_request_metrics(response: Response) -> Response:
+            stats = self.current()
+            if stats is None:
+                return response
+            self._local.stats = None
+
+            elapsed = time.perf_counter() - stats.started
+            route = request.url_rule.rule if request.url_rule else 'unmatched'
+            method = request.method
+            size = None if response.is_streamed else response.calculate_content_length()
+
+            with self._lock:
+                self.request_duration.observe((route, method), elapsed)
+                self.requests.inc((route, method, str(response.status_code)))
+                self.request_queries.observe((route, method), stats.queries)
+                self.request_sql_duration.observe((route, method), stats.sql_seconds)
+                self.request_rows.observe((route, method), stats.rows)
+                if size is not None:
+                    self.response_size.observe((route, method), size)
+
+            if always_send_timing or request.headers.get(SERVER_TIMING_REQUEST_HEADER) == '1':
+                response.headers['Server-Timing'] = server_timing_header(elapsed, stats)
+                response.headers['Timing-Allow-Origin'] = '*'
+            return response
+
+        @app.teardown_request
+        def _clear_request_metrics(exc=None):
+            self._local.stats = None
+
+    def render(self) -> str:
+        """
+        Render all metrics in the Prometheus text exposition format.
+
+        Returns:
+            Exposition text
+        """
+        with self._lock:
+            lines = []
+            for metric in (
+                self.request_duration, self.requests, self.request_queries,
+                self.request_sql_duration, self.request_rows, self.response_size,
+                self.sql_queries, self.sql_seconds, self.sql_rows
+            ):
+                lines.extend(metric.render())
+        for collector in self._collectors:
+            try:
+                lines.extend(collector())
+            except Exception:
+                pass
+        return '\n'.join(lines) + '\n'
+
+
+def server_timing_header(elapsed: float, stats: RequestStats) -> str:
+    """
+    Build a Server-Timing header value for browser dev tools.
+
+    Args:
+        elapsed: Request wall time in seconds
+        stats: Figures of the request
+
+    Returns:
+        Header value
+    """
+    return ', '.join([
+        f'app;desc="Total";dur={elapsed * 1000:.2f}',
+        f'sql;desc="{stats.queries} SQL statements";dur={stats.sql_seconds * 1000:.2f}',
+        f'rows;desc="{stats.rows} rows hydrated"'
+    ])
+
+
+def gauge_lines(name: str, help_text: str, value: float) -> List[str]:
+    """Exposition lines of a single unlabeled gauge."""
+    return [f'# HELP {name} {help_text}', f'# TYPE {name} gauge', f'{name} {_format_number(value)}']
+
+
+# Process-wide registry used by the app
+metrics = MetricsRegistry()
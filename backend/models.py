@@ -10,9 +10,26 @@ Mathematical Foundation:
 """
 
 from datetime import datetime, date, timedelta
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 import json
 
+from pricing import price_one, discounted_price, price_batch, days_to_expiry
+
+
+def status_color(days: int) -> str:
+    """
+    Color indicator for a number of days to expiry.
+    
+    Returns:
+        'red' (0-2 days or expired), 'yellow' (3 days) or 'green' (4+ days)
+    """
+    if days <= 2:
+        return 'red'
+    elif days == 3:
+        return 'yellow'
+    else:
+        return 'green'
+
 
 class PerishableItem:
     """
@@ -47,6 +64,7 @@ class PerishableItem:
         shelf_life: Optional[int] = None,
         seller_name: Optional[str] = None,
         is_active: bool = True,
+        discount_percentage: Optional[float] = None,
         created_at: Optional[datetime] = None,
         updated_at: Optional[datetime] = None
     ):
@@ -71,8 +89,10 @@ class PerishableItem:
         self.created_at = created_at or datetime.now()
         self.updated_at = updated_at or datetime.now()
         
-        # Compute discount and discounted price
-        self._discount_percentage = self._calculate_discount()
+        # Compute discount and discounted price (unless priced in batch already)
+        if discount_percentage is None:
+            discount_percentage = self._calculate_discount()
+        self._discount_percentage = discount_percentage
         self.discounted_price = discounted_price or self._calculate_discounted_price()
     
     @property
@@ -119,24 +139,14 @@ class PerishableItem:
         - d: historical demand
         - s: seasonal trends
         
+        The formula is evaluated by the category's policy in pricing.py,
+        shared with the batch paths (recompute, import, listings).
+        
         Returns:
             Float representing discount percentage
         """
-        days = self.days_to_expiry
-        
-        # Expired items
-        if days <= 0:
-            return 100.0
-        
-        # Fresh items (more than 4 days)
-        if days > 4:
-            return 0.0
-        
-        # Linear discount function for items expiring in 1-4 days
-        # f(x) = ((4 - x) / 4) * 100
-        discount = ((4 - days) / 4) * 100
-        
-        return round(discount, 2)
+        discount, _ = price_one(self.expiry_date, self.quantity, self.base_price, self.category)
+        return discount
     
     def _calculate_discounted_price(self) -> float:
         """
@@ -148,8 +158,7 @@ class PerishableItem:
         Returns:
             Float representing the discounted price
         """
-        discount_multiplier = 1 - (self.discount_percentage / 100)
-        return round(self.base_price * discount_multiplier, 2)
+        return discounted_price(self.base_price, self.discount_percentage)
     
     def update_discount(self) -> None:
         """
@@ -178,13 +187,7 @@ class PerishableItem:
             - 'yellow': Moderate freshness (3 days)
             - 'green': Fresh (4+ days)
         """
-        days = self.days_to_expiry
-        if days <= 2:
-            return 'red'
-        elif days == 3:
-            return 'yellow'
-        else:
-            return 'green'
+        return status_color(self.days_to_expiry)
     
     def to_dict(self) -> Dict[str, Any]:
         """
@@ -239,3 +242,158 @@ class PerishableItem:
     
     def __repr__(self) -> str:
         return f"<PerishableItem(id={self.id}, name='{self.item_name}', days_to_expiry={self.days_to_expiry}, discount={self.discount_percentage}%)>"
+
+
+def create_perishable_item_from_db(
+    db_item: Dict[str, Any],
+    discount_percentage: Optional[float] = None
+) -> PerishableItem:
+    """
+    Create PerishableItem instance from database record.
+    
+    Args:
+        db_item: Database record dictionary
+        discount_percentage: Discount already computed by the batch pricing engine (optional)
+        
+    Returns:
+        PerishableItem instance
+    """
+    return PerishableItem(
+        id=db_item['id'],
+        item_name=db_item['item_name'],
+        category=db_item['category'],
+        quantity=db_item['quantity'],
+        base_price=db_item['base_price'],
+        expiry_date=db_item['expiry_date'],
+        discounted_price=db_item.get('discounted_price'),
+        cost_price=db_item.get('cost_price'),
+        shelf_life=db_item.get('shelf_life'),
+        seller_name=db_item.get('seller_name'),
+        is_active=bool(db_item.get('is_active', 1)),
+        discount_percentage=discount_percentage,
+        created_at=datetime.fromisoformat(db_item['created_at']) if db_item.get('created_at') else None,
+        updated_at=datetime.fromisoformat(db_item['updated_at']) if db_item.get('updated_at') else None
+    )
+
+
+def _iso_timestamp(value: Optional[str], now: str) -> str:
+    """
+    Normalize a stored timestamp exactly as datetime.fromisoformat(value).isoformat().
+    Avoids parsing for the two formats the database actually contains.
+    """
+    if not value:
+        return now
+    if len(value) == 19:
+        if value[10] == 'T':
+            return value
+        if value[10] == ' ':
+            return f"{value[:10]}T{value[11:]}"
+    if len(value) == 26 and value[10] == 'T' and not value.endswith('.000000'):
+        return value
+    return datetime.fromisoformat(value).isoformat()
+
+
+class PerishableRecord:
+    """
+    Lightweight, read-only view of a perishable item row for list endpoints.
+    
+    Unlike PerishableItem, no discount is recomputed per object: days to expiry
+    and discount are supplied by the batch serializer, which evaluates
+    date.today() once per request.
+    """
+    
+    __slots__ = ('row', 'days_to_expiry', 'discount_percentage', 'computed_price')
+    
+    def __init__(self, row: Dict[str, Any], days: int, discount: float, computed_price: float):
+        self.row = row
+        self.days_to_expiry = days
+        self.discount_percentage = discount
+        self.computed_price = computed_price
+    
+    def to_dict(self, now: str) -> Dict[str, Any]:
+        """
+        Convert record to the same dictionary as PerishableItem.to_dict.
+        
+        Args:
+            now: ISO timestamp used for missing created_at / updated_at
+            
+        Returns:
+            Dictionary representation of the item
+        """
+        row = self.row
+        days = self.days_to_expiry
+        base_price = row['base_price']
+        expiry_date = row['expiry_date']
+        
+        return {
+            'id': row['id'],
+            'item_name': row['item_name'],
+            'category': row['category'],
+            'quantity': row['quantity'],
+            'base_price': base_price,
+            'cost_price': row.get('cost_price') or (base_price * 0.7),
+            'shelf_life': row.get('shelf_life'),
+            'expiry_date': expiry_date if isinstance(expiry_date, str) else expiry_date.isoformat(),
+            'discounted_price': row.get('discounted_price') or self.computed_price,
+            'days_to_expiry': days,
+            'discount_percentage': self.discount_percentage,
+            'seller_name': row.get('seller_name') or "Admin",
+            'is_active': bool(row.get('is_active', 1)),
+            'status_color': status_color(days),
+            'is_expired': days <= 0,
+            'is_near_expiry': 0 < days <= 2,
+            'created_at': _iso_timestamp(row.get('created_at'), now),
+            'updated_at': _iso_timestamp(row.get('updated_at'), now)
+        }
+
+
+def serialize_rows(rows: List[Dict[str, Any]], today: Optional[date] = None) -> List[Dict[str, Any]]:
+    """
+    Serialize database rows to the JSON produced by PerishableItem.to_dict,
+    without building a PerishableItem per row.
+    
+    Days to expiry, discounts and prices for the whole batch are computed in
+    one vectorized pass against a single `today`.
+    
+    Args:
+        rows: Database record dictionaries
+        today: Reference date (default: date.today())
+        
+    Returns:
+        List of item dictionaries
+    """
+    if not rows:
+        return []
+    
+    today = today or date.today()
+    now = datetime.now().isoformat()
+    expiry_dates = [row['expiry_date'] for row in rows]
+    
+    discounts, prices = price_batch(
+        expiry_dates,
+        [row['quantity'] for row in rows],
+        [row['base_price'] for row in rows],
+        [row['category'] for row in rows],
+        today
+    )
+    days = days_to_expiry(expiry_dates, today).tolist()
+    
+    return [
+        PerishableRecord(row, day, discount, price).to_dict(now)
+        for row, day, discount, price in zip(rows, days, discounts.tolist(), prices.tolist())
+    ]
+
+
+def serialize_db_items(db_items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Convert database records into JSON dictionaries with computed discount data.
+    Uses lightweight records priced in one vectorized pass instead of
+    building a PerishableItem per row.
+    
+    Args:
+        db_items: List of database record dictionaries
+        
+    Returns:
+        List of item dictionaries
+    """
+    return serialize_rows(db_items)
@@ -0,0 +1,163 @@
+"""
+Keyset Pagination and Streaming Helpers for Basket Buddy 2.0
+Cursor-based paging on (expiry_date, id) and incremental JSON responses
+
+Ordering Foundation:
+- Listings are totally ordered by the key k(i) = (expiry_date, id)
+- A page is the next `limit` items with k(i) > cursor, served by the index
+"""
+
+import base64
+import json
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from flask import Response, request
+
+
+DEFAULT_PAGE_LIMIT = 100
+MAX_PAGE_LIMIT = 1000
+
+# Rows fetched per round trip when streaming from a server-side cursor
+STREAM_BATCH_SIZE = 500
+
+
+def encode_cursor(row: Dict[str, Any]) -> str:
+    """
+    Encode the keyset position of a row as an opaque cursor token.
+
+    Args:
+        row: Item dictionary containing expiry_date and id
+
+    Returns:
+        URL-safe cursor string
+    """
+    expiry_date = row['expiry_date']
+    if hasattr(expiry_date, 'isoformat'):
+        expiry_date = expiry_date.isoformat()
+    raw = f"{expiry_date}|{row['id']}".encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token: str) -> Tuple[str, int]:
+    """
+    Decode a cursor token back into its (expiry_date, id) key.
+
+    Args:
+        token: Cursor string produced by encode_cursor
+
+    Returns:
+        Tuple of (expiry_date, id)
+
+    Raises:
+        ValueError: If the token is malformed
+    """
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        expiry_date, item_id = base64.urlsafe_b64decode(padded).decode('utf-8').split('|')
+        return expiry_date, int(item_id)
+    except Exception:
+        raise ValueError('Invalid cursor')
+
+
+def parse_page_args(args=None) -> Optional[Dict[str, Any]]:
+    """
+    Read pagination parameters from the current request.
+
+    Query Parameters:
+        limit: Page size (default: 100, max: 1000)
+        cursor: Cursor from a previous page's next_cursor
+
+    Args:
+        args: Query arguments (default: the current Flask request's)
+
+    Returns:
+        Dictionary with 'limit' and 'after', or None if the request is unpaginated
+
+    Raises:
+        ValueError: If limit or cursor is invalid
+    """
+    args = request.args if args is None else args
+    if 'limit' not in args and 'cursor' not in args:
+        return None
+
+    limit = args.get('limit', DEFAULT_PAGE_LIMIT, type=int)
+    if limit is None or limit < 1:
+        raise ValueError('limit must be a positive integer')
+
+    cursor = args.get('cursor')
+    return {
+        'limit': min(limit, MAX_PAGE_LIMIT),
+        'after': decode_cursor(cursor) if cursor else None
+    }
+
+
+def is_stream_requested(args=None) -> bool:
+    """Check whether the client asked for a streamed response (?stream=1)."""
+    args = request.args if args is None else args
+    return args.get('stream', '').lower() in ('1', 'true', 'yes')
+
+
+def page_metadata(rows: list, limit: int) -> Dict[str, Any]:
+    """
+    Trim a page fetched with limit + 1 rows and build its metadata.
+
+    Args:
+        rows: Rows fetched with a LIMIT of limit + 1 (trimmed in place)
+        limit: Requested page size
+
+    Returns:
+        Dictionary with 'has_more' and 'next_cursor'
+    """
+    has_more = len(rows) > limit
+    del rows[limit:]
+    return {
+        'has_more': has_more,
+        'next_cursor': encode_cursor(rows[-1]) if has_more else None
+    }
+
+
+def stream_json_array(
+    rows: Iterable[Dict[str, Any]],
+    serialize: Callable[[List[Dict[str, Any]]], List[Dict[str, Any]]] = list,
+    envelope: Optional[Dict[str, Any]] = None,
+    batch_size: int = STREAM_BATCH_SIZE
+) -> Response:
+    """
+    Stream rows as a JSON response without materializing the full list.
+
+    Output shape:
+        {"success": true, ..., "data": [...], "count": N}
+
+    Args:
+        rows: Iterable of database rows (typically a server-side cursor)
+        serialize: Function converting a batch of rows into JSON-serializable dicts
+        envelope: Extra top-level fields emitted before the data array
+        batch_size: Rows serialized per batch
+
+    Returns:
+        Flask streaming Response
+    """
+    header = {'success': True}
+    header.update(envelope or {})
+
+    def generate() -> Iterator[str]:
+        yield json.dumps(header)[:-1] + ', "data": ['
+        count = 0
+        for batch in batched(rows, batch_size):
+            for item in serialize(batch):
+                yield (',' if count else '') + json.dumps(item)
+                count += 1
+        yield f'], "count": {count}}}'
+
+    return Response(generate(), mimetype='application/json')
+
+
+def batched(rows: Iterable[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    """Group an iterable of rows into lists of at most `size`."""
+    iterator = iter(rows)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
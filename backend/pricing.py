@@ -0,0 +1,371 @@
+"""
+Batch Pricing Engine for Basket Buddy 2.0
+Vectorized discount computation over columns of perishable items
+
+Mathematical Foundation:
+- Each item i is a point (xᵢ, qᵢ, pᵢ): days_to_expiry, quantity, base_price
+- A pricing policy maps the column vectors (x, q, p) to a discount vector d
+- discounted_price = p ⊙ (1 - d / 100), evaluated in one vectorized pass
+- Policies are pluggable per category, preparing for f(x, q, d, s) models
+- A single item is priced by the same policy in plain Python, with the same
+  rounding to cents, so pricing one item builds no arrays
+- Each policy also states its discount as SQL and inverts it into an expiry
+  bound, so database filters, aggregates and the catalog snapshot apply
+  exactly the formula served as discount_percentage
+"""
+
+from datetime import date, datetime
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+# Number of days before expiry over which the default linear discount applies
+DISCOUNT_WINDOW_DAYS = 4
+
+
+class PricingPolicy:
+    """
+    Base class for discount policies.
+
+    Subclasses implement `discounts`, operating on whole columns at once,
+    and `discount_sql` for queries (register_policy rejects a policy
+    without it), and may override `discount` with a scalar form for single
+    items. `window_days` bounds how far before
+    expiry the policy can produce a non-zero discount; the incremental
+    recompute and the discount filters rely on it.
+    """
+
+    window_days = DISCOUNT_WINDOW_DAYS
+
+    def discount(self, days: int, quantity: int, base_price: float) -> float:
+        """
+        Compute the discount percentage of a single item.
+        The default evaluates `discounts` on one-element columns.
+
+        Args:
+            days: Days to expiry (negative if expired)
+            quantity: Stock level
+            base_price: Price before discount
+
+        Returns:
+            Discount percentage in [0, 100]
+        """
+        return float(self.discounts(
+            np.array([days], dtype=np.int64),
+            np.array([quantity], dtype=np.int64),
+            np.array([base_price], dtype=np.float64)
+        )[0])
+
+    def discounts(self, days: 'np.ndarray', quantities: 'np.ndarray', base_prices: 'np.ndarray') -> 'np.ndarray':
+        """
+        Compute discount percentages for a batch of items.
+
+        Args:
+            days: Days to expiry (int array, negative if expired)
+            quantities: Stock levels (int array)
+            base_prices: Prices before discount (float array)
+
+        Returns:
+            Float array of discount percentages in [0, 100]
+        """
+        raise NotImplementedError
+
+    def discount_sql(self, days_column: str) -> str:
+        """
+        SQL expression of the discount percentage of a perishable_items row.
+
+        Args:
+            days_column: Column or expression holding days_to_expiry (the
+                         expression may also use the quantity and base_price
+                         columns)
+
+        Returns:
+            SQL expression evaluating to the value of `discount`
+        """
+        raise NotImplementedError
+
+    def max_days_for_discount(self, min_discount: float) -> Optional[int]:
+        """
+        Largest days_to_expiry at which the policy can reach a discount.
+        The default is the window bound: further out, the discount is 0%.
+
+        Args:
+            min_discount: Minimum discount percentage
+
+        Returns:
+            Number of days, None if any non-expired item qualifies, or 0 if
+            none do
+        """
+        if min_discount <= 0:
+            return None
+        return self.window_days
+
+
+class LinearExpiryPolicy(PricingPolicy):
+    """
+    Linear expiry discount (Prototype Phase).
+
+    f(x) = ((w - x) / w) * 100, with w = window_days
+    - If x > w: discount = 0% (fresh item)
+    - If x ≤ 0: discount = 100% (expired, should be removed)
+    """
+
+    def __init__(self, window_days: int = DISCOUNT_WINDOW_DAYS):
+        self.window_days = window_days
+
+    def discount(self, days: int, quantity: int, base_price: float) -> float:
+        window = self.window_days
+        if days <= 0:
+            return 100.0
+        if days > window:
+            return 0.0
+        return _round_cents((window - days) / window * 100)
+
+    def discounts(self, days: 'np.ndarray', quantities: 'np.ndarray', base_prices: 'np.ndarray') -> 'np.ndarray':
+        window = self.window_days
+        linear = np.round((window - days) / window * 100, 2)
+        return np.where(days <= 0, 100.0, np.where(days > window, 0.0, linear))
+
+    def discount_sql(self, days_column: str) -> str:
+        window = self.window_days
+        return f'''
+            CASE
+                WHEN {days_column} <= 0 THEN 100.0
+                WHEN {days_column} > {window} THEN 0.0
+                ELSE ROUND(({window} - {days_column}) * 100.0 / {window}, 2)
+            END
+        '''
+
+    def max_days_for_discount(self, min_discount: float) -> Optional[int]:
+        # Exact inverse: the discount only grows as expiry gets closer
+        if min_discount <= 0:
+            return None
+        for days in range(self.window_days, 0, -1):
+            if self.discount(days, 0, 0.0) >= min_discount:
+                return days
+        return 0
+
+
+def _round_cents(value: float) -> float:
+    """Round to 2 decimals exactly like np.round(value, 2) (half to even on value * 100)."""
+    return round(value * 100) / 100
+
+
+DEFAULT_POLICY = LinearExpiryPolicy()
+
+# Category-specific policies; categories not listed use DEFAULT_POLICY
+_category_policies: Dict[str, PricingPolicy] = {}
+
+
+def register_policy(category: str, policy: PricingPolicy) -> None:
+    """
+    Register a pricing policy for a category.
+
+    Public filters, group stats and the discount sort evaluate discounts
+    in SQL, so the policy must implement `discount_sql`.
+
+    Args:
+        category: Category name (e.g. 'Dairy')
+        policy: Policy used for items of that category
+
+    Raises:
+        ValueError: If the policy has no SQL form
+    """
+    if type(policy).discount_sql is PricingPolicy.discount_sql:
+        raise ValueError(f'{type(policy).__name__} does not implement discount_sql')
+    _category_policies[category] = policy
+
+
+def get_policy(category: Optional[str]) -> PricingPolicy:
+    """Get the pricing policy for a category."""
+    return _category_policies.get(category, DEFAULT_POLICY)
+
+
+def category_policies_registered() -> bool:
+    """Whether any category has its own policy (discounts then depend on the category)."""
+    return bool(_category_policies)
+
+
+def max_window_days() -> int:
+    """Largest discount window across all registered policies."""
+    return max([DEFAULT_POLICY.window_days] + [p.window_days for p in _category_policies.values()])
+
+
+def max_days_for_discount(min_discount: float) -> Optional[int]:
+    """
+    Turn a minimum discount into an expiry bound for filtering.
+
+    Exact while only the default policy applies; with category policies it
+    is the loosest bound of all policies, and the discount itself must be
+    checked as well (see category_policies_registered).
+
+    Args:
+        min_discount: Minimum discount percentage
+
+    Returns:
+        Largest days_to_expiry whose discount can be >= min_discount,
+        None if any non-expired item qualifies, or 0 if none do
+    """
+    bounds = [
+        policy.max_days_for_discount(min_discount)
+        for policy in [DEFAULT_POLICY, *_category_policies.values()]
+    ]
+    return None if None in bounds else max(bounds)
+
+
+def _sql_literal(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+def discount_sql(days_column: str = 'days_to_expiry', category_column: str = 'category') -> str:
+    """
+    SQL expression of the discount percentage under the registered
+    policies, with one CASE branch per category policy.
+
+    Args:
+        days_column: Column or expression holding days_to_expiry
+        category_column: Column holding the category
+
+    Returns:
+        SQL expression evaluating to the discount percentage of a row
+    """
+    default = DEFAULT_POLICY.discount_sql(days_column)
+    if not _category_policies:
+        return default
+    branches = ' '.join(
+        f'WHEN {_sql_literal(category)} THEN {policy.discount_sql(days_column)}'
+        for category, policy in _category_policies.items()
+    )
+    return f'CASE {category_column} {branches} ELSE {default} END'
+
+
+def days_until(expiry_date, today: Optional[date] = None) -> int:
+    """
+    Days remaining until one expiry date.
+
+    Args:
+        expiry_date: ISO date string or date object
+        today: Reference date (default: date.today())
+
+    Returns:
+        Days to expiry (negative if expired)
+    """
+    if isinstance(expiry_date, datetime):
+        expiry_date = expiry_date.date()
+    elif not isinstance(expiry_date, date):
+        expiry_date = date.fromisoformat(str(expiry_date))
+    return (expiry_date - (today or date.today())).days
+
+
+def days_to_expiry(expiry_dates: Iterable, today: Optional[date] = None) -> 'np.ndarray':
+    """
+    Convert expiry dates into a days-to-expiry column.
+
+    Args:
+        expiry_dates: ISO date strings or date objects
+        today: Reference date (default: date.today())
+
+    Returns:
+        Int array of days remaining until expiry
+    """
+    today = today or date.today()
+    expiry = np.array([str(d) for d in expiry_dates], dtype='datetime64[D]')
+    return (expiry - np.datetime64(today.isoformat(), 'D')).astype(np.int64)
+
+
+def apply_discounts(base_prices: 'np.ndarray', discounts: 'np.ndarray') -> 'np.ndarray':
+    """
+    discounted_price = base_price * (1 - discount_percentage / 100), rounded to cents.
+    """
+    return np.round(base_prices * (1 - discounts / 100), 2)
+
+
+def discounted_price(base_price: float, discount_percentage: float) -> float:
+    """Scalar form of apply_discounts with identical rounding."""
+    return _round_cents(float(base_price) * (1 - float(discount_percentage) / 100))
+
+
+def price_batch(
+    expiry_dates: Sequence,
+    quantities: Sequence[int],
+    base_prices: Sequence[float],
+    categories: Optional[Sequence[Optional[str]]] = None,
+    today: Optional[date] = None
+) -> Tuple['np.ndarray', 'np.ndarray']:
+    """
+    Price a batch of items in one vectorized pass per policy.
+
+    Args:
+        expiry_dates: Column of ISO expiry dates
+        quantities: Column of stock levels
+        base_prices: Column of base prices
+        categories: Column of categories selecting the policy (optional)
+        today: Reference date (default: date.today())
+
+    Returns:
+        Tuple of (discount_percentages, discounted_prices) float arrays
+    """
+    prices = np.asarray(base_prices, dtype=np.float64)
+    discounts = discount_batch(days_to_expiry(expiry_dates, today), quantities, prices, categories)
+    return discounts, apply_discounts(prices, discounts)
+
+
+def discount_batch(
+    days: 'np.ndarray',
+    quantities: Sequence[int],
+    base_prices: Sequence[float],
+    categories: Optional[Sequence[Optional[str]]] = None
+) -> 'np.ndarray':
+    """
+    Discount percentages of columns already in days-to-expiry form, one
+    vectorized pass per policy.
+
+    Args:
+        days: Days to expiry (int array)
+        quantities: Column of stock levels
+        base_prices: Column of base prices
+        categories: Column of categories selecting the policy (optional)
+
+    Returns:
+        Float array of discount percentages
+    """
+    days = np.asarray(days, dtype=np.int64)
+    qty = np.asarray(quantities, dtype=np.int64)
+    prices = np.asarray(base_prices, dtype=np.float64)
+
+    if categories is None or not _category_policies:
+        discounts = DEFAULT_POLICY.discounts(days, qty, prices)
+    else:
+        discounts = np.empty(len(days), dtype=np.float64)
+        cats = np.asarray([c if c is not None else '' for c in categories], dtype=object)
+        custom = np.zeros(len(days), dtype=bool)
+        for category, policy in _category_policies.items():
+            mask = cats == category
+            if mask.any():
+                discounts[mask] = policy.discounts(days[mask], qty[mask], prices[mask])
+                custom |= mask
+        rest = ~custom
+        if rest.any():
+            discounts[rest] = DEFAULT_POLICY.discounts(days[rest], qty[rest], prices[rest])
+    return discounts
+
+
+def price_one(
+    expiry_date,
+    quantity: int,
+    base_price: float,
+    category: Optional[str] = None,
+    today: Optional[date] = None
+) -> Tuple[float, float]:
+    """
+    Price a single item through the same policies as price_batch, without
+    building arrays.
+
+    Returns:
+        Tuple of (discount_percentage, discounted_price)
+    """
+    discount = float(get_policy(category).discount(
+        days_until(expiry_date, today), int(quantity), float(base_price)
+    ))
+    return discount, discounted_price(base_price, discount)
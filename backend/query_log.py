@@ -0,0 +1,215 @@
+"""
+Slow-Query Log for Basket Buddy 2.0
+Captures statements over a latency threshold together with their query plan
+
+Capture Foundation:
+- A statement s is slow iff elapsed(s) ≥ threshold (execute plus all fetches)
+- Each capture records the statement shape (SQL text and parameter types,
+  never values), elapsed time, rows returned and EXPLAIN QUERY PLAN output
+- Plans are cached per SQL text, so a hot slow query is explained once
+  per refresh interval rather than on every execution
+"""
+
+from collections import OrderedDict, deque
+from datetime import datetime
+from logging.handlers import WatchedFileHandler
+from typing import Any, Dict, List, Optional
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+
+
+DEFAULT_SLOW_QUERY_MS = 100.0
+
+# Entries kept in memory for the admin endpoint
+MAX_LOGGED_QUERIES = 500
+
+# Distinct statements whose plan is cached, and how long a plan is reused
+PLAN_CACHE_SIZE = 256
+PLAN_REFRESH_SECONDS = 600
+
+# Plan rows reading a whole table: "SCAN <table>" without an index
+FULL_SCAN_PATTERN = re.compile(r'^SCAN (?:TABLE )?(\w+)(?!.*\bINDEX\b)')
+
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+
+def normalize_sql(sql: str) -> str:
+    """Collapse whitespace so equal statements share one key."""
+    return WHITESPACE_PATTERN.sub(' ', sql).strip()
+
+
+def parameter_shape(parameters: Any) -> Any:
+    """
+    Describe bound parameters by type only (values may be personal data).
+
+    Returns:
+        List of type names, dict of name -> type name, or None
+    """
+    if parameters is None:
+        return None
+    if isinstance(parameters, dict):
+        return {name: type(value).__name__ for name, value in parameters.items()}
+    return [type(value).__name__ for value in parameters]
+
+
+class SlowQueryLog:
+    """
+    Query observer recording statements slower than a threshold.
+
+    Entries go to an in-memory ring buffer (for the admin endpoint) and,
+    if a path is given, to a JSON-lines log file. Every worker process
+    appends to the same file, so it is rotated externally (logrotate): the
+    handler reopens the file once it has been moved. Query plans are taken
+    on a separate, uninstrumented connection.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        threshold_ms: Optional[float] = DEFAULT_SLOW_QUERY_MS,
+        log_path: Optional[str] = None,
+        max_entries: int = MAX_LOGGED_QUERIES
+    ):
+        """
+        Initialize the log.
+
+        Args:
+            db_path: Database file the statements run against (for EXPLAIN)
+            threshold_ms: Minimum elapsed milliseconds to log; None disables
+            log_path: Log file (optional)
+            max_entries: Entries kept in memory
+        """
+        self.db_path = db_path
+        self.threshold_ms = threshold_ms
+        self._entries: deque = deque(maxlen=max_entries)
+        self._plans: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._explain_lock = threading.Lock()
+        self._explain_conn: Optional[sqlite3.Connection] = None
+        self._logged = 0
+
+        self._logger = None
+        if log_path:
+            self._logger = logging.getLogger(f'basketbuddy.slow_queries.{log_path}')
+            self._logger.setLevel(logging.INFO)
+            self._logger.propagate = False
+            # Databases on the same file share the logger and its handler
+            if not self._logger.handlers:
+                handler = WatchedFileHandler(log_path)
+                handler.setFormatter(logging.Formatter('%(message)s'))
+                self._logger.addHandler(handler)
+
+    def observe(self, sql: str, parameters: Any, elapsed: float, rows: int) -> None:
+        """Database query observer: record the statement if it is slow."""
+        threshold = self.threshold_ms
+        elapsed_ms = elapsed * 1000
+        if threshold is None or elapsed_ms < threshold:
+            return
+
+        statement = normalize_sql(sql)
+        plan = self._plan(statement, parameters)
+        entry = {
+            'logged_at': datetime.now().isoformat(),
+            'sql': statement,
+            'parameters': parameter_shape(parameters),
+            'elapsed_ms': round(elapsed_ms, 3),
+            'rows': rows,
+            'plan': plan,
+            'full_scans': sorted({
+                match.group(1) for line in plan or [] for match in [FULL_SCAN_PATTERN.match(line)] if match
+            })
+        }
+
+        with self._lock:
+            self._entries.append(entry)
+            self._logged += 1
+        if self._logger is not None:
+            self._logger.info(json.dumps(entry))
+
+    def _plan(self, statement: str, parameters: Any) -> Optional[List[str]]:
+        """EXPLAIN QUERY PLAN of a statement, cached per SQL text."""
+        now = time.monotonic()
+        with self._lock:
+            cached = self._plans.get(statement)
+            if cached is not None and now - cached[0] < PLAN_REFRESH_SECONDS:
+                self._plans.move_to_end(statement)
+                return cached[1]
+
+        plan = None
+        # Plans only exist for DML; parameters are needed for binding only
+        if parameters is not None and statement.split(' ', 1)[0].upper() in (
+            'SELECT', 'WITH', 'INSERT', 'UPDATE', 'DELETE', 'REPLACE'
+        ):
+            try:
+                with self._explain_lock:
+                    if self._explain_conn is None:
+                        self._explain_conn = sqlite3.connect(self.db_path, check_same_thread=False)
+                    rows = self._explain_conn.execute(f'EXPLAIN QUERY PLAN {statement}', parameters).fetchall()
+                plan = [row[3] for row in rows]
+            except sqlite3.Error:
+                plan = None
+
+        with self._lock:
+            self._plans[statement] = (now, plan)
+            self._plans.move_to_end(statement)
+            while len(self._plans) > PLAN_CACHE_SIZE:
+                self._plans.popitem(last=False)
+        return plan
+
+    def entries(self, limit: int = 100, full_scan_only: bool = False) -> List[Dict[str, Any]]:
+        """
+        Get logged statements, most recent first.
+
+        Args:
+            limit: Maximum number of entries
+            full_scan_only: Only statements whose plan scans a whole table
+
+        Returns:
+            List of entry dictionaries
+        """
+        with self._lock:
+            entries = list(self._entries)
+        entries.reverse()
+        if full_scan_only:
+            entries = [entry for entry in entries if entry['full_scans']]
+        return entries[:limit]
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """
+        Aggregate the in-memory entries per statement, slowest total first.
+
+        Returns:
+            List of dictionaries with sql, count, total_ms, max_ms and full_scans
+        """
+        with self._lock:
+            entries = list(self._entries)
+
+        groups: Dict[str, Dict[str, Any]] = {}
+        for entry in entries:
+            group = groups.setdefault(entry['sql'], {
+                'sql': entry['sql'], 'count': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+                'full_scans': entry['full_scans']
+            })
+            group['count'] += 1
+            group['total_ms'] = round(group['total_ms'] + entry['elapsed_ms'], 3)
+            group['max_ms'] = max(group['max_ms'], entry['elapsed_ms'])
+        return sorted(groups.values(), key=lambda group: group['total_ms'], reverse=True)
+
+    def clear(self) -> None:
+        """Drop the in-memory entries and cached plans."""
+        with self._lock:
+            self._entries.clear()
+            self._plans.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Threshold and counters of the log."""
+        with self._lock:
+            return {
+                'threshold_ms': self.threshold_ms,
+                'logged_total': self._logged,
+                'entries_in_memory': len(self._entries)
+            }
@@ -0,0 +1,234 @@
+"""
+Public Endpoint Handlers for Basket Buddy 2.0
+Request handling shared by the Flask public routes and the ASGI public API
+
+Each handler takes its data source and the query arguments (Flask's
+request.args or anything with the same get(name, default, type) lookup)
+and returns the response payload. Client errors are raised as
+PublicAPIError; the front end turns the payload or error into a response.
+"""
+
+from typing import Any, Dict
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import serialize_db_items
+from pagination import parse_page_args, page_metadata, MAX_PAGE_LIMIT
+
+
+class PublicAPIError(Exception):
+    """Error answered with {'success': False, 'error': message} and a status code."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def public_filters(args) -> Dict[str, Any]:
+    """
+    Read the listing filters of /public.
+
+    Args:
+        args: Query arguments
+
+    Returns:
+        Dictionary of filter keyword arguments for query_public_items
+    """
+    return {
+        'category': args.get('category'),
+        'min_discount': args.get('min_discount', type=float),
+        'max_price': args.get('max_price', type=float),
+        'seller_name': args.get('seller_name'),
+        # Sort by discount percentage (highest first) by default
+        'sort_by': args.get('sort_by', 'discount')
+    }
+
+
+def public_items(catalog, args) -> Dict[str, Any]:
+    """
+    Payload of /public (unstreamed): one page, or the full listing.
+
+    Args:
+        catalog: Catalog snapshot store (or Database)
+        args: Query arguments
+
+    Returns:
+        Response payload
+
+    Raises:
+        PublicAPIError: 400 for an invalid filter, limit or cursor
+    """
+    filters = public_filters(args)
+    try:
+        # Filter and sort over the shared snapshot columns (or one indexed query)
+        page = parse_page_args(args)
+        if page:
+            db_items = catalog.query_public_items(limit=page['limit'] + 1, after=page['after'], **filters)
+            page_info = page_metadata(db_items, page['limit'])
+        else:
+            db_items = catalog.query_public_items(**filters)
+            page_info = {}
+    except ValueError as e:
+        raise PublicAPIError(400, str(e))
+
+    public_items = serialize_db_items(db_items)
+    return {
+        'success': True,
+        'count': len(public_items),
+        'data': public_items,
+        'filters_applied': filters,
+        **page_info
+    }
+
+
+def search_items(db, args) -> Dict[str, Any]:
+    """
+    Payload of /public/search.
+
+    Args:
+        db: Database instance
+        args: Query arguments
+
+    Returns:
+        Response payload
+
+    Raises:
+        PublicAPIError: 400 if q is missing or limit is invalid
+    """
+    text = args.get('q', '').strip()
+    if not text:
+        raise PublicAPIError(400, 'Query parameter q is required')
+
+    limit = args.get('limit', 50, type=int)
+    if limit is None or limit < 1:
+        raise PublicAPIError(400, 'limit must be a positive integer')
+
+    filters = {
+        'category': args.get('category'),
+        'min_discount': args.get('min_discount', type=float),
+        'max_price': args.get('max_price', type=float),
+        'seller_name': args.get('seller_name')
+    }
+
+    results = serialize_db_items(
+        db.search_public_items(text, limit=min(limit, MAX_PAGE_LIMIT), **filters)
+    )
+    return {
+        'success': True,
+        'query': text,
+        'count': len(results),
+        'data': results,
+        'filters_applied': filters
+    }
+
+
+def autocomplete(db, args) -> Dict[str, Any]:
+    """
+    Payload of /public/autocomplete.
+
+    Args:
+        db: Database instance
+        args: Query arguments
+
+    Returns:
+        Response payload
+    """
+    prefix = args.get('q', '').strip()
+    limit = args.get('limit', 10, type=int) or 10
+
+    suggestions = db.autocomplete_item_names(prefix, min(max(limit, 1), 50)) if prefix else []
+    return {
+        'success': True,
+        'query': prefix,
+        'data': suggestions
+    }
+
+
+def categories(catalog, args) -> Dict[str, Any]:
+    """
+    Payload of /public/categories.
+
+    Args:
+        catalog: Catalog snapshot store (or Database)
+        args: Query arguments (unused)
+
+    Returns:
+        Response payload
+    """
+    return {
+        'success': True,
+        'data': [
+            {
+                'category': row['category'] or 'Other',
+                'count': row['item_count'],
+                'avg_discount': row['avg_discount']
+            }
+            for row in catalog.get_public_group_stats('category')
+        ]
+    }
+
+
+def sellers(catalog, args) -> Dict[str, Any]:
+    """
+    Payload of /public/sellers.
+
+    Args:
+        catalog: Catalog snapshot store (or Database)
+        args: Query arguments (unused)
+
+    Returns:
+        Response payload
+    """
+    return {
+        'success': True,
+        'data': [
+            {
+                'seller_name': row['seller_name'] or 'Unknown',
+                'active_items': row['item_count'],
+                'avg_discount': row['avg_discount']
+            }
+            for row in catalog.get_public_group_stats('seller_name')
+        ]
+    }
+
+
+def deals(catalog, args) -> Dict[str, Any]:
+    """
+    Payload of /public/deals.
+
+    Args:
+        catalog: Catalog snapshot store (or Database)
+        args: Query arguments
+
+    Returns:
+        Response payload
+
+    Raises:
+        PublicAPIError: 400 if limit is not a positive integer
+    """
+    try:
+        limit = int(args.get('limit', 10))
+    except ValueError:
+        limit = 0
+    if limit < 1:
+        raise PublicAPIError(400, 'limit must be a positive integer')
+    limit = min(limit, MAX_PAGE_LIMIT)
+    category = args.get('category')
+    seller_name = args.get('seller_name')
+
+    best_deals = serialize_db_items(
+        catalog.get_top_deals(limit, category=category, seller_name=seller_name)
+    )
+    return {
+        'success': True,
+        'count': len(best_deals),
+        'data': best_deals,
+        'filters_applied': {
+            'category': category,
+            'seller_name': seller_name,
+            'limit': limit
+        }
+    }
@@ -1,24 +1,55 @@
 """
 Public Routes for Basket Buddy 2.0
 Provides public access to active perishable items for users
+
+The request handling itself lives in routes/public_handlers.py, shared with
+the ASGI public API (asgi.py).
 """
 
 from flask import Blueprint, request, jsonify
-from datetime import date
 import sys
 import os
 
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from models import PerishableItem
-from database import Database
+from models import serialize_db_items
+from database import get_database
+from cache import cached_response, conditional_get
+from snapshot import get_snapshot_store
+from pagination import is_stream_requested, stream_json_array
+from routes import public_handlers
+from routes.public_handlers import PublicAPIError, public_filters
 
 public_bp = Blueprint('public', __name__, url_prefix='/api/perishables')
-db = Database('perishable_items.db')
+db = get_database('perishable_items.db')
+
+# Shared memory-mapped catalog snapshot (falls back to SQL while stale)
+catalog = get_snapshot_store(db)
+
+
+def respond(handler, source):
+    """
+    Answer the current request with a shared handler (see public_handlers).
+
+    Args:
+        handler: Handler function taking (source, args)
+        source: Catalog snapshot store or Database passed to the handler
+
+    Returns:
+        JSON response, with the handler's status code for client errors
+    """
+    try:
+        return jsonify(handler(source, request.args))
+    except PublicAPIError as e:
+        return jsonify({'success': False, 'error': str(e)}), e.status
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
 
 
 @public_bp.route('/public', methods=['GET'])
+@conditional_get(db.get_catalog_version)
+@cached_response(db.get_write_generation)
 def get_public_items():
     """
     Get all active, non-expired perishable items for public viewing.
@@ -29,182 +60,84 @@ def get_public_items():
     - min_discount: Minimum discount percentage (optional)
     - max_price: Maximum discounted price (optional)
     - seller_name: Filter by seller (optional)
+    - sort_by: 'discount' (default), 'price' or 'expiry' (optional)
+    - limit, cursor: Keyset pagination on (expiry_date, id) (optional)
+    - stream: Set to 1 to stream the full listing incrementally (optional)
     """
-    try:
-        # Get all items
-        all_items = db.get_all_items()
-        
-        # Filter for active, non-expired items
-        public_items = [
-            item for item in all_items
-            if item.get('is_active', True) and not item.get('is_expired', False)
-        ]
-        
-        # Apply filters from query params
-        category = request.args.get('category')
-        min_discount = request.args.get('min_discount', type=float)
-        max_price = request.args.get('max_price', type=float)
-        seller_name = request.args.get('seller_name')
-        
-        if category:
-            public_items = [item for item in public_items if item.get('category') == category]
-        
-        if min_discount is not None:
-            public_items = [
-                item for item in public_items
-                if item.get('discount_percentage', 0) >= min_discount
-            ]
-        
-        if max_price is not None:
-            public_items = [
-                item for item in public_items
-                if item.get('discounted_price', float('inf')) <= max_price
-            ]
-        
-        if seller_name:
-            public_items = [item for item in public_items if item.get('seller_name') == seller_name]
-        
-        # Sort by discount percentage (highest first) by default
-        sort_by = request.args.get('sort_by', 'discount')
-        if sort_by == 'discount':
-            public_items.sort(key=lambda x: x.get('discount_percentage', 0), reverse=True)
-        elif sort_by == 'price':
-            public_items.sort(key=lambda x: x.get('discounted_price', 0))
-        elif sort_by == 'expiry':
-            public_items.sort(key=lambda x: x.get('days_to_expiry', 999))
-        
-        return jsonify({
-            'success': True,
-            'count': len(public_items),
-            'data': public_items,
-            'filters_applied': {
-                'category': category,
-                'min_discount': min_discount,
-                'max_price': max_price,
-                'seller_name': seller_name,
-                'sort_by': sort_by
-            }
-        })
-        
-    except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+    if is_stream_requested():
+        filters = public_filters(request.args)
+        return stream_json_array(
+            db.iter_public_items(**filters),
+            serialize_db_items,
+            {'filters_applied': filters}
+        )
+    return respond(public_handlers.public_items, catalog)
+
+
+@public_bp.route('/public/search', methods=['GET'])
+@conditional_get(db.get_catalog_version)
+@cached_response(db.get_write_generation)
+def search_public_items():
+    """
+    Full-text search over public items, ranked by relevance.
+    The last word matches as a prefix ("straw" finds "Strawberries").
+    
+    Query params:
+    - q: Search text (required)
+    - category, min_discount, max_price, seller_name: Same filters as /public (optional)
+    - limit: Maximum number of results (default: 50, max: 1000)
+    """
+    return respond(public_handlers.search_items, db)
+
+
+@public_bp.route('/public/autocomplete', methods=['GET'])
+@conditional_get(db.get_catalog_version)
+@cached_response(db.get_write_generation)
+def autocomplete_public_items():
+    """
+    Suggest public item names for the text typed so far.
+    
+    Query params:
+    - q: Text typed so far (required)
+    - limit: Maximum number of suggestions (default: 10)
+    """
+    return respond(public_handlers.autocomplete, db)
 
 
 @public_bp.route('/public/categories', methods=['GET'])
+@conditional_get(db.get_catalog_version)
+@cached_response(db.get_write_generation)
 def get_public_categories():
     """
     Get all available categories with item counts (public items only).
     """
-    try:
-        all_items = db.get_all_items()
-        
-        # Filter for active, non-expired items
-        public_items = [
-            item for item in all_items
-            if item.get('is_active', True) and not item.get('is_expired', False)
-        ]
-        
-        # Count items by category
-        categories = {}
-        for item in public_items:
-            category = item.get('category', 'Other')
-            if category not in categories:
-                categories[category] = {
-                    'category': category,
-                    'count': 0,
-                    'avg_discount': 0,
-                    'total_discount': 0
-                }
-            categories[category]['count'] += 1
-            categories[category]['total_discount'] += item.get('discount_percentage', 0)
-        
-        # Calculate average discounts
-        for category in categories.values():
-            if category['count'] > 0:
-                category['avg_discount'] = round(category['total_discount'] / category['count'], 2)
-            del category['total_discount']
-        
-        return jsonify({
-            'success': True,
-            'data': list(categories.values())
-        })
-        
-    except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+    return respond(public_handlers.categories, catalog)
 
 
 @public_bp.route('/public/sellers', methods=['GET'])
+@conditional_get(db.get_catalog_version)
+@cached_response(db.get_write_generation)
 def get_public_sellers():
     """
     Get all sellers with their active item counts.
     """
-    try:
-        all_items = db.get_all_items()
-        
-        # Filter for active, non-expired items
-        public_items = [
-            item for item in all_items
-            if item.get('is_active', True) and not item.get('is_expired', False)
-        ]
-        
-        # Count items by seller
-        sellers = {}
-        for item in public_items:
-            seller = item.get('seller_name', 'Unknown')
-            if seller not in sellers:
-                sellers[seller] = {
-                    'seller_name': seller,
-                    'active_items': 0,
-                    'avg_discount': 0,
-                    'total_discount': 0
-                }
-            sellers[seller]['active_items'] += 1
-            sellers[seller]['total_discount'] += item.get('discount_percentage', 0)
-        
-        # Calculate average discounts
-        for seller in sellers.values():
-            if seller['active_items'] > 0:
-                seller['avg_discount'] = round(seller['total_discount'] / seller['active_items'], 2)
-            del seller['total_discount']
-        
-        return jsonify({
-            'success': True,
-            'data': list(sellers.values())
-        })
-        
-    except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+    return respond(public_handlers.sellers, catalog)
 
 
 @public_bp.route('/public/deals', methods=['GET'])
+@conditional_get(db.get_catalog_version)
+@cached_response(db.get_write_generation)
 def get_best_deals():
     """
     Get items with the highest discounts (best deals).
+    Under a single policy discount grows as expiry nears, so the best deals
+    are the soonest expiring items. Top-K is read from the catalog snapshot,
+    or from an expiry-ordered index while the snapshot is being rebuilt;
+    with category policies registered both rank by the computed discount.
+    
     Query params:
-    - limit: Number of items to return (default: 10)
+    - limit: Number of items to return (default: 10, max: 1000)
+    - category: Top deals within a category (optional)
+    - seller_name: Top deals of a seller (optional)
     """
-    try:
-        limit = request.args.get('limit', 10, type=int)
-        
-        all_items = db.get_all_items()
-        
-        # Filter for active, non-expired items
-        public_items = [
-            item for item in all_items
-            if item.get('is_active', True) and not item.get('is_expired', False)
-        ]
-        
-        # Sort by discount percentage (highest first)
-        public_items.sort(key=lambda x: x.get('discount_percentage', 0), reverse=True)
-        
-        # Limit results
-        best_deals = public_items[:limit]
-        
-        return jsonify({
-            'success': True,
-            'count': len(best_deals),
-            'data': best_deals
-        })
-        
-    except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+    return respond(public_handlers.deals, catalog)
@@ -5,41 +5,184 @@ Handles seller-specific operations for perishable item management
 
 from flask import Blueprint, request, jsonify
 from datetime import datetime, date
+import sqlite3
 import sys
 import os
 
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from models import PerishableItem
-from database import Database
+from models import PerishableItem, create_perishable_item_from_db, serialize_db_items
+from database import get_database
+from sharding import CrossShardTransactionError
+from cache import conditional_get
+from pagination import parse_page_args, page_metadata, is_stream_requested, stream_json_array
 
 seller_bp = Blueprint('seller', __name__, url_prefix='/api/seller')
-db = Database('perishable_items.db')
+db = get_database('perishable_items.db')
+
+# Maximum operations accepted by one batch request
+MAX_BATCH_OPERATIONS = 1000
+
+BATCH_OPERATIONS = ('create', 'update', 'delete', 'toggle')
+
+
+def _build_seller_item(data):
+    """
+    Validate a seller create payload and build the database record.
+    Supports shelf_life auto-calculation of expiry_date.
+    
+    Raises:
+        ValueError: If the payload is invalid
+    """
+    # Validate required fields
+    required_fields = ['item_name', 'category', 'quantity', 'base_price', 'seller_name']
+    for field in required_fields:
+        if field not in data:
+            raise ValueError(f'Missing required field: {field}')
+    
+    # Validate that either shelf_life or expiry_date is provided
+    if 'shelf_life' not in data and 'expiry_date' not in data:
+        raise ValueError('Either shelf_life or expiry_date must be provided')
+    
+    # Validate expiry_date is not in the past if provided
+    if 'expiry_date' in data:
+        _validate_expiry_date(data['expiry_date'])
+    
+    # Create temporary item to calculate discount
+    temp_item = PerishableItem(
+        id=0,  # Temporary ID
+        item_name=data['item_name'],
+        category=data['category'],
+        quantity=int(data['quantity']),
+        base_price=float(data['base_price']),
+        cost_price=float(data.get('cost_price', data['base_price'] * 0.7)),
+        shelf_life=int(data['shelf_life']) if 'shelf_life' in data else None,
+        expiry_date=data.get('expiry_date'),
+        seller_name=data['seller_name'],
+        is_active=data.get('is_active', True)
+    )
+    
+    # Prepare data for database insertion
+    return {
+        'item_name': temp_item.item_name,
+        'category': temp_item.category,
+        'quantity': temp_item.quantity,
+        'base_price': temp_item.base_price,
+        'cost_price': temp_item.cost_price,
+        'shelf_life': temp_item.shelf_life,
+        'expiry_date': temp_item.expiry_date.isoformat(),
+        'discounted_price': temp_item.discounted_price,
+        'seller_name': temp_item.seller_name,
+        'is_active': 1 if temp_item.is_active else 0
+    }
+
+
+def _validate_expiry_date(value):
+    """
+    Check that an expiry date is well-formed and not in the past.
+    
+    Raises:
+        ValueError: If the expiry date is malformed or in the past
+    """
+    expiry_date = datetime.strptime(value, '%Y-%m-%d').date()
+    if expiry_date < date.today():
+        raise ValueError('Expiry date cannot be in the past')
+
+
+class _BatchAborted(Exception):
+    """Raised inside the batch transaction to roll back an atomic batch."""
+
+
+def _apply_batch_operation(index, operation):
+    """
+    Apply one batch operation inside the open transaction.
+    
+    Returns:
+        Result dictionary with index, op, success, status and id or error
+    """
+    op = operation.get('op') if isinstance(operation, dict) else None
+    result = {'index': index, 'op': op, 'success': False}
+    
+    if op not in BATCH_OPERATIONS:
+        result.update(status=400, error=f"op must be one of: {', '.join(BATCH_OPERATIONS)}")
+        return result
+    
+    item_id = operation.get('id')
+    if op != 'create' and not isinstance(item_id, int):
+        result.update(status=400, error='id is required')
+        return result
+    
+    try:
+        if op == 'create':
+            item_id = db.create_item(_build_seller_item(operation.get('data') or {}))
+            result.update(success=True, status=201, id=item_id)
+            return result
+        
+        if op == 'update':
+            data = operation.get('data') or {}
+            if 'expiry_date' in data:
+                _validate_expiry_date(data['expiry_date'])
+            found = db.update_item(item_id, data)
+        elif op == 'delete':
+            found = db.delete_item(item_id)
+        else:
+            is_active = db.toggle_item_active(item_id)
+            found = is_active is not None
+            if found:
+                result['is_active'] = is_active
+        
+        result['id'] = item_id
+        if found:
+            result.update(success=True, status=200)
+        else:
+            result.update(status=404, error='Item not found')
+        return result
+        
+    except (ValueError, TypeError, sqlite3.IntegrityError) as e:
+        # A failed statement is undone on its own; the batch carries on
+        result.update(status=400, error=str(e))
+        return result
 
 
 @seller_bp.route('/items', methods=['GET'])
+@conditional_get(db.get_catalog_version)
 def get_seller_items():
     """
     Get all items for a specific seller.
-    Query params: seller_name (optional)
+    Query params:
+    - seller_name: Filter by seller (optional)
+    - limit, cursor: Keyset pagination on (expiry_date, id) (optional)
+    - stream: Set to 1 to stream the full listing incrementally (optional)
     """
     seller_name = request.args.get('seller_name')
     
     try:
-        all_items = db.get_all_items()
+        if is_stream_requested():
+            return stream_json_array(db.iter_items(seller_name))
         
-        # Filter by seller if specified
-        if seller_name:
-            items = [item for item in all_items if item.get('seller_name') == seller_name]
+        page = parse_page_args()
+        if page:
+            items = db.get_items_page(page['limit'] + 1, page['after'], seller_name)
+            page_info = page_metadata(items, page['limit'])
         else:
-            items = all_items
+            all_items = db.get_all_items()
+            page_info = {}
+            
+            # Filter by seller if specified
+            if seller_name:
+                items = [item for item in all_items if item.get('seller_name') == seller_name]
+            else:
+                items = all_items
         
         return jsonify({
             'success': True,
             'count': len(items),
-            'data': items
+            'data': items,
+            **page_info
         })
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
@@ -52,63 +195,13 @@ def create_seller_item():
     """
     try:
         data = request.get_json()
-        
-        # Validate required fields
-        required_fields = ['item_name', 'category', 'quantity', 'base_price', 'seller_name']
-        for field in required_fields:
-            if field not in data:
-                return jsonify({'success': False, 'error': f'Missing required field: {field}'}), 400
-        
-        # Validate that either shelf_life or expiry_date is provided
-        if 'shelf_life' not in data and 'expiry_date' not in data:
-            return jsonify({
-                'success': False,
-                'error': 'Either shelf_life or expiry_date must be provided'
-            }), 400
-        
-        # Validate expiry_date is not in the past if provided
-        if 'expiry_date' in data:
-            expiry_date = datetime.strptime(data['expiry_date'], '%Y-%m-%d').date()
-            if expiry_date < date.today():
-                return jsonify({
-                    'success': False,
-                    'error': 'Expiry date cannot be in the past'
-                }), 400
-        
-        # Create temporary item to calculate discount
-        temp_item = PerishableItem(
-            id=0,  # Temporary ID
-            item_name=data['item_name'],
-            category=data['category'],
-            quantity=int(data['quantity']),
-            base_price=float(data['base_price']),
-            cost_price=float(data.get('cost_price', data['base_price'] * 0.7)),
-            shelf_life=int(data['shelf_life']) if 'shelf_life' in data else None,
-            expiry_date=data.get('expiry_date'),
-            seller_name=data['seller_name'],
-            is_active=data.get('is_active', True)
-        )
-        
-        # Prepare data for database insertion
-        db_data = {
-            'item_name': temp_item.item_name,
-            'category': temp_item.category,
-            'quantity': temp_item.quantity,
-            'base_price': temp_item.base_price,
-            'cost_price': temp_item.cost_price,
-            'shelf_life': temp_item.shelf_life,
-            'expiry_date': temp_item.expiry_date.isoformat(),
-            'discounted_price': temp_item.discounted_price,
-            'seller_name': temp_item.seller_name,
-            'is_active': 1 if temp_item.is_active else 0
-        }
+        db_data = _build_seller_item(data)
         
         item_id = db.create_item(db_data)
         
         # Fetch the created item
         created_item_data = db.get_item_by_id(item_id)
         if created_item_data:
-            from app import create_perishable_item_from_db
             created_item = create_perishable_item_from_db(created_item_data)
             
             return jsonify({
@@ -135,12 +228,10 @@ def update_seller_item(item_id: int):
         
         # Validate expiry_date if provided
         if 'expiry_date' in data:
-            expiry_date = datetime.strptime(data['expiry_date'], '%Y-%m-%d').date()
-            if expiry_date < date.today():
-                return jsonify({
-                    'success': False,
-                    'error': 'Expiry date cannot be in the past'
-                }), 400
+            try:
+                _validate_expiry_date(data['expiry_date'])
+            except ValueError as e:
+                return jsonify({'success': False, 'error': str(e)}), 400
         
         # Update the item
         success = db.update_item(item_id, data)
@@ -148,7 +239,6 @@ def update_seller_item(item_id: int):
         if success:
             updated_item_data = db.get_item_by_id(item_id)
             if updated_item_data:
-                from app import create_perishable_item_from_db
                 updated_item = create_perishable_item_from_db(updated_item_data)
                 
                 return jsonify({
@@ -189,23 +279,102 @@ def toggle_item_active(item_id: int):
     Toggle item active status (for public visibility).
     """
     try:
-        item_data = db.get_item_by_id(item_id)
-        if not item_data:
+        # Flip the flag in one statement instead of read-then-write
+        new_status = db.toggle_item_active(item_id)
+        if new_status is None:
             return jsonify({'success': False, 'error': 'Item not found'}), 404
         
-        current_status = bool(item_data.get('is_active', 1))
-        new_status = not current_status
+        return jsonify({
+            'success': True,
+            'message': f'Item {"activated" if new_status else "deactivated"} successfully',
+            'is_active': new_status
+        })
+        
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@seller_bp.route('/items/batch', methods=['POST'])
+def batch_seller_items():
+    """
+    Apply many create/update/delete/toggle operations in one transaction.
+    
+    Request body:
+    {
+        "operations": [
+            {"op": "create", "data": {...}},
+            {"op": "update", "id": 1, "data": {...}},
+            {"op": "delete", "id": 2},
+            {"op": "toggle", "id": 3}
+        ],
+        "atomic": false
+    }
+    
+    Every operation gets a result entry in request order. Failed operations
+    are skipped; with "atomic": true any failure rolls back the whole batch.
+    With sharded storage an atomic batch must stay within one shard (one
+    seller, or sellers stored together); otherwise it is rejected with 400.
+    """
+    try:
+        payload = request.get_json(silent=True) or {}
+        operations = payload.get('operations')
+        atomic = bool(payload.get('atomic', False))
+        
+        if not isinstance(operations, list) or not operations:
+            return jsonify({'success': False, 'error': 'operations must be a non-empty list'}), 400
         
-        success = db.update_item(item_id, {'is_active': 1 if new_status else 0})
+        if len(operations) > MAX_BATCH_OPERATIONS:
+            return jsonify({
+                'success': False,
+                'error': f'At most {MAX_BATCH_OPERATIONS} operations per batch'
+            }), 400
         
-        if success:
+        results = []
+        try:
+            # One write lock for the whole batch; each database call reuses
+            # the cached prepared statement on the same connection
+            with db.transaction(single_shard=atomic):
+                for index, operation in enumerate(operations):
+                    result = _apply_batch_operation(index, operation)
+                    results.append(result)
+                    if atomic and not result['success']:
+                        raise _BatchAborted()
+        except _BatchAborted:
             return jsonify({
-                'success': True,
-                'message': f'Item {"activated" if new_status else "deactivated"} successfully',
-                'is_active': new_status
-            })
+                'success': False,
+                'error': f"Operation {len(results) - 1} failed; batch rolled back",
+                'rolled_back': True,
+                'results': results
+            }), 400
+        except CrossShardTransactionError:
+            return jsonify({
+                'success': False,
+                'error': f"Operation {len(results)} writes to another shard; "
+                         'atomic batches must stay within one shard. Batch rolled back',
+                'rolled_back': True,
+                'results': results
+            }), 400
+        
+        # Attach the stored state of created and updated items in one read
+        changed_ids = [
+            result['id'] for result in results
+            if result['success'] and result['op'] in ('create', 'update')
+        ]
+        rows = db.get_items_by_ids(changed_ids)
+        items = dict(zip(rows.keys(), serialize_db_items(list(rows.values()))))
+        for result in results:
+            if result['success'] and result['op'] in ('create', 'update'):
+                result['data'] = items.get(result['id'])
         
-        return jsonify({'success': False, 'error': 'Failed to update item'}), 500
+        failed = sum(1 for result in results if not result['success'])
+        
+        return jsonify({
+            'success': failed == 0,
+            'count': len(results),
+            'succeeded': len(results) - failed,
+            'failed': failed,
+            'results': results
+        })
         
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -223,27 +392,20 @@ def get_seller_stats():
         return jsonify({'success': False, 'error': 'seller_name is required'}), 400
     
     try:
-        all_items = db.get_all_items()
-        seller_items = [item for item in all_items if item.get('seller_name') == seller_name]
+        # O(1) in catalog size: read the trigger-maintained seller summary
+        summary = db.get_seller_summary(seller_name)
         
-        total_items = len(seller_items)
-        active_items = len([item for item in seller_items if item.get('is_active', True)])
-        near_expiry = len([item for item in seller_items if item.get('is_near_expiry', False)])
-        expired = len([item for item in seller_items if item.get('is_expired', False)])
+        total_items = summary['total_items']
+        active_items = summary['active_items']
+        near_expiry = summary['near_expiry']
+        expired = summary['expired']
         
         avg_discount = 0
-        if seller_items:
-            avg_discount = sum(item.get('discount_percentage', 0) for item in seller_items) / total_items
-        
-        total_revenue = sum(
-            item.get('discounted_price', 0) * item.get('quantity', 0)
-            for item in seller_items if item.get('is_active', True)
-        )
+        if total_items:
+            avg_discount = summary['discount_sum'] / total_items
         
-        total_cost = sum(
-            item.get('cost_price', 0) * item.get('quantity', 0)
-            for item in seller_items if item.get('is_active', True)
-        )
+        total_revenue = summary['total_revenue']
+        total_cost = summary['total_cost']
         
         profit_margin = ((total_revenue - total_cost) / total_revenue * 100) if total_revenue > 0 else 0
         
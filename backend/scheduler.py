@@ -0,0 +1,286 @@
+"""
+Nightly Scheduler for Basket Buddy 2.0
+In-process discount rollover and archival at local midnight with run history
+
+Scheduling Foundation:
+- Discounts f(x) only change when x (days to expiry) does, i.e. at local midnight
+- Each day d gets exactly one recompute R(d): every worker wakes at midnight,
+  the first to claim (job, d) in the run table executes R(d) and the others
+  wait for it, then every worker warms its own read caches
+- The archival of long-expired items (opt-in, BASKETBUDDY_ARCHIVE_AFTER_DAYS)
+  is claimed the same way, but nobody waits for it: it only removes rows
+  that no public read returns
+"""
+
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Optional
+import os
+import socket
+import threading
+import time
+
+from database import Database
+from discount_engine import recompute_discounts
+from archiver import archive_expired_items, archive_after_days
+
+
+DISCOUNT_JOB = 'discount_rollover'
+ARCHIVE_JOB = 'expired_archival'
+
+# Seconds after midnight to wake, so date.today() has certainly rolled over
+MIDNIGHT_DELAY_SECONDS = 5
+
+# A claimed run still 'running' after this long is considered abandoned
+STALE_RUN_SECONDS = 30 * 60
+
+# How often and how long a non-claiming worker waits for the claimed run
+FOLLOWER_POLL_SECONDS = 2
+FOLLOWER_WAIT_SECONDS = 15 * 60
+
+# Set to 0 to disable the scheduler (e.g. when an external cron is used)
+SCHEDULER_ENV = 'BASKETBUDDY_SCHEDULER'
+
+# Read endpoints requested after a rollover to refill the response cache
+CACHE_WARM_PATHS = [
+    '/api/perishables',
+    '/api/perishables/public',
+    '/api/perishables/public/categories',
+    '/api/perishables/public/sellers',
+    '/api/perishables/public/deals',
+]
+
+
+def worker_id() -> str:
+    """Identifier of this worker process (host:pid)."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def seconds_until_midnight(now: Optional[datetime] = None) -> float:
+    """
+    Seconds from `now` until the next local midnight.
+
+    Args:
+        now: Reference time (default: datetime.now())
+
+    Returns:
+        Seconds to wait
+    """
+    now = now or datetime.now()
+    midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+    return (midnight - now).total_seconds()
+
+
+def run_discount_job(db: Database, run_id: int, full: bool = False) -> Dict[str, Any]:
+    """
+    Execute the discount rollover and record its outcome in the run history.
+    Also prunes the change log past its retention period.
+
+    Args:
+        db: Database instance
+        run_id: Run ID from Database.start_job_run
+        full: Recompute every row instead of the discount window only
+
+    Returns:
+        Recompute statistics plus run_id and change_log_pruned
+
+    Raises:
+        Exception: Re-raises the failure after recording it
+    """
+    started = time.perf_counter()
+    try:
+        stats = recompute_discounts(db, full=full)
+        stats['change_log_pruned'] = db.prune_change_log()
+    except Exception as e:
+        db.finish_job_run(
+            run_id, 'failed', round((time.perf_counter() - started) * 1000, 2), error=str(e)
+        )
+        raise
+
+    db.finish_job_run(
+        run_id, 'succeeded', round((time.perf_counter() - started) * 1000, 2),
+        stats['rows_scanned'], stats['rows_changed']
+    )
+    stats['run_id'] = run_id
+    return stats
+
+
+def run_archive_job(db: Database, run_id: int, older_than_days: int) -> Dict[str, Any]:
+    """
+    Execute the archival of long-expired items and record its outcome in the
+    run history.
+
+    Args:
+        db: Database instance
+        run_id: Run ID from Database.start_job_run
+        older_than_days: Archive items expired for more than this many days
+
+    Returns:
+        Archival statistics plus run_id
+
+    Raises:
+        Exception: Re-raises the failure after recording it
+    """
+    started = time.perf_counter()
+    try:
+        stats = archive_expired_items(db, older_than_days)
+    except Exception as e:
+        db.finish_job_run(
+            run_id, 'failed', round((time.perf_counter() - started) * 1000, 2), error=str(e)
+        )
+        raise
+
+    db.finish_job_run(
+        run_id, 'succeeded', round((time.perf_counter() - started) * 1000, 2),
+        stats['rows_archived'], stats['rows_archived']
+    )
+    stats['run_id'] = run_id
+    return stats
+
+
+class NightlyScheduler:
+    """
+    Background thread running the discount rollover and, if enabled, the
+    archival of long-expired items at local midnight.
+
+    Every worker process runs one scheduler. The scheduled run of a day is
+    claimed through a unique row in the run history, so exactly one worker
+    recomputes; the others wait for it to finish. Each worker then brings
+    the catalog snapshot up to date (the first one rebuilds it, the others
+    remap it) and warms its own response cache. On startup, a missed run
+    for today is executed immediately (catch-up).
+    """
+
+    def __init__(self, db: Database, app=None, snapshots=None):
+        """
+        Initialize the scheduler.
+
+        Args:
+            db: Database instance
+            app: Flask app whose read endpoints are warmed after a run (optional)
+            snapshots: CatalogSnapshotStore refreshed after a run (optional)
+        """
+        self.db = db
+        self.app = app
+        self.snapshots = snapshots
+        self.worker = worker_id()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.next_run_at: Optional[datetime] = None
+        self.last_run_date: Optional[str] = None
+        self.last_role: Optional[str] = None
+        self.last_warm_ms: Optional[float] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """Start the scheduler thread (no-op if already running)."""
+        with self._lock:
+            if self.running:
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._loop, name='nightly-scheduler', daemon=True
+            )
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Ask the scheduler thread to exit."""
+        self._stop.set()
+
+    def _loop(self) -> None:
+        self._run_for(date.today())
+        while True:
+            delay = seconds_until_midnight() + MIDNIGHT_DELAY_SECONDS
+            self.next_run_at = datetime.now() + timedelta(seconds=delay)
+            if self._stop.wait(delay):
+                return
+            self._run_for(date.today())
+
+    def _run_for(self, day: date) -> None:
+        """Claim and execute (or wait for) the rollover of one day, then warm caches."""
+        run_date = day.isoformat()
+        try:
+            run_id = self.db.start_job_run(
+                DISCOUNT_JOB, run_date, self.worker, 'scheduled', STALE_RUN_SECONDS
+            )
+            if run_id is not None:
+                self.last_role = 'runner'
+                try:
+                    run_discount_job(self.db, run_id)
+                except Exception:
+                    pass  # Recorded in the run history
+            else:
+                self.last_role = 'follower'
+                self._wait_for_run(run_date)
+
+            self._run_archival(run_date)
+            self.last_run_date = run_date
+            if self.snapshots is not None:
+                self.snapshots.refresh()
+            self.warm_caches()
+        except Exception as e:
+            print(f"Scheduler error for {run_date}: {e}")
+
+    def _run_archival(self, run_date: str) -> None:
+        """Archive long-expired items if this worker claims the day's archival run."""
+        older_than_days = archive_after_days()
+        if older_than_days is None:
+            return
+        run_id = self.db.start_job_run(
+            ARCHIVE_JOB, run_date, self.worker, 'scheduled', STALE_RUN_SECONDS
+        )
+        if run_id is not None:
+            try:
+                run_archive_job(self.db, run_id, older_than_days)
+            except Exception:
+                pass  # Recorded in the run history
+
+    def _wait_for_run(self, run_date: str) -> None:
+        """Block until the claimed run of run_date is no longer running."""
+        deadline = time.monotonic() + FOLLOWER_WAIT_SECONDS
+        while time.monotonic() < deadline:
+            runs = self.db.get_job_runs(DISCOUNT_JOB, run_date=run_date, limit=10)
+            scheduled = [run for run in runs if run['trigger'] == 'scheduled']
+            if not scheduled or scheduled[0]['status'] != 'running':
+                return
+            if self._stop.wait(FOLLOWER_POLL_SECONDS):
+                return
+
+    def warm_caches(self) -> int:
+        """
+        Request the hot read endpoints so their responses are cached.
+
+        Returns:
+            Number of endpoints warmed
+        """
+        if self.app is None:
+            return 0
+
+        started = time.perf_counter()
+        warmed = 0
+        with self.app.test_client() as client:
+            for path in CACHE_WARM_PATHS:
+                if client.get(path).status_code == 200:
+                    warmed += 1
+        self.last_warm_ms = round((time.perf_counter() - started) * 1000, 2)
+        return warmed
+
+    def state(self) -> Dict[str, Any]:
+        """
+        Get the scheduler state of this worker.
+
+        Returns:
+            Dictionary with running, worker, next_run_at, last_run_date,
+            last_role and last_warm_ms
+        """
+        return {
+            'running': self.running,
+            'worker': self.worker,
+            'next_run_at': self.next_run_at.isoformat() if self.next_run_at else None,
+            'last_run_date': self.last_run_date,
+            'last_role': self.last_role,
+            'last_warm_ms': self.last_warm_ms
+        }
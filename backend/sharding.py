@@ -0,0 +1,633 @@
+"""
+Sharded Storage for Basket Buddy 2.0
+Per-seller partitioning of the catalog over several SQLite files
+
+Partitioning Foundation:
+- The universal set U is split into disjoint shards U = U₀ ∪ U₁ ∪ ... ∪ Uₙ₋₁,
+  one SQLite file each; every seller s lives in exactly one shard σ(s)
+- σ(s) = hash(s) mod n for new sellers, recorded in a directory so it never
+  changes; sellers that already had items in the original file stay in U₀
+- Item ids carry their shard: shard k allocates ids from k · 2⁴⁰, so an id
+  is routed without a lookup
+- Writes of sellers on different shards take different SQLite locks, so
+  write throughput grows with the number of shards; cross-seller reads run
+  on every shard in parallel and are merged in the order SQL would return
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+from datetime import date
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+import hashlib
+import heapq
+import os
+import threading
+
+from database import (
+    Database, PUBLIC_SORT_ORDERS, KEYSET_SORT_ORDERS, CHANGE_LOG_RETENTION_DAYS,
+    group_stats_from_totals, sorts_by_policy_discount
+)
+from pricing import days_until, get_policy
+
+
+# Item ids of shard k start at k << SHARD_ID_BITS (2^40 ids per shard;
+# ids stay below 2^53, so JavaScript clients keep exact integers)
+SHARD_ID_BITS = 40
+
+# Seller of items created without one (as in Database.create_item)
+DEFAULT_SELLER = 'Admin'
+
+CHANGE_LOG_UNAVAILABLE = 'The change log is not available in sharded storage mode'
+
+
+class CrossShardTransactionError(Exception):
+    """A single-shard transaction() block tried to write to a second shard."""
+
+
+def shard_path(db_path: str, index: int) -> str:
+    """
+    Path of a shard file. Shard 0 is the original database file.
+
+    Args:
+        db_path: Path of the unsharded database
+        index: Shard number
+
+    Returns:
+        Path to the shard's SQLite file
+    """
+    if index == 0:
+        return db_path
+    root, extension = os.path.splitext(db_path)
+    return f'{root}.shard{index}{extension or ".db"}'
+
+
+def seller_hash_shard(seller_name: str, shard_count: int) -> int:
+    """Stable hash partition of a seller (identical in every process)."""
+    digest = hashlib.blake2s(seller_name.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big') % shard_count
+
+
+def _expiry_key(row: Dict[str, Any]) -> Tuple:
+    return (row['expiry_date'], row['id'])
+
+
+def _price_key(row: Dict[str, Any]) -> Tuple:
+    # discounted_price ASC with NULL first (SQLite), then id
+    price = row['discounted_price']
+    return (price is not None, price or 0, row['id'])
+
+
+def _public_key(sort_by: str) -> Callable[[Dict[str, Any]], Tuple]:
+    """Merge key matching public_order_by for a public sort."""
+    if sorts_by_policy_discount(sort_by):
+        day = date.today()
+
+        def discount_key(row: Dict[str, Any]) -> Tuple:
+            # discount DESC under the category policies, then expiry_date, id
+            discount = get_policy(row['category']).discount(
+                days_until(row['expiry_date'], day), row['quantity'], row['base_price']
+            )
+            return (-discount, row['expiry_date'], row['id'])
+        return discount_key
+    order_by = PUBLIC_SORT_ORDERS.get(sort_by, PUBLIC_SORT_ORDERS['expiry'])
+    return _expiry_key if order_by in KEYSET_SORT_ORDERS else _price_key
+
+
+class ShardedDatabase:
+    """
+    Database facade routing each operation to the shard that owns it.
+
+    Exposes the same methods as Database, so routes, importer, exporter,
+    scheduler and snapshot work unchanged. Seller-scoped operations touch a
+    single shard; cross-seller reads fan out over a thread pool. A
+    transaction() block enters each shard's transaction the first time the
+    block writes to it and commits them in turn on exit, so a batch is
+    atomic within each shard; transaction(single_shard=True) refuses to
+    span shards instead.
+
+    Every public Database method exists here too, except the per-file
+    plumbing (get_connection, init_database, stream_rows) and the change
+    log reads: sequence numbers are per shard and cannot be merged into
+    one ordered feed, so callers check change_log_available first.
+    """
+
+    change_log_available = False
+
+    def __init__(self, db_path: str = 'perishable_items.db', shard_count: int = 2):
+        """
+        Open (and create) every shard.
+
+        Args:
+            db_path: Path of the original database file (shard 0)
+            shard_count: Number of shards; may grow later, never shrink
+        """
+        if shard_count < 1:
+            raise ValueError('shard_count must be at least 1')
+
+        self.db_path = db_path
+        self.shard_count = shard_count
+        self.shards = [Database(shard_path(db_path, index)) for index in range(shard_count)]
+        self.primary = self.shards[0]
+        self.slow_queries = self.primary.slow_queries
+        self._local = threading.local()
+        self._directory: Dict[str, int] = {}
+        self._directory_lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_pid: Optional[int] = None
+
+        # One slow-query log for all shards (they share a schema, so plans
+        # explained against shard 0 are the plans of every shard)
+        for shard in self.shards[1:]:
+            shard.pool.observers.remove(shard.slow_queries.observe)
+            shard.add_query_observer(self.slow_queries.observe)
+
+        self._init_shards()
+
+    def _init_shards(self) -> None:
+        """Create the seller directory and reserve each shard's id range."""
+        with self.primary.get_connection() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS seller_shards (
+                    seller_name TEXT PRIMARY KEY,
+                    shard INTEGER NOT NULL
+                )
+            ''')
+
+        for index, shard in enumerate(self.shards):
+            with shard.get_connection() as conn:
+                if index > 0:
+                    conn.execute('''
+                        INSERT INTO sqlite_sequence (name, seq)
+                        SELECT 'perishable_items', ?
+                        WHERE NOT EXISTS (
+                            SELECT 1 FROM sqlite_sequence WHERE name = 'perishable_items'
+                        )
+                    ''', (index << SHARD_ID_BITS,))
+                sellers = [
+                    (row[0], index) for row in conn.execute(
+                        'SELECT DISTINCT COALESCE(seller_name, ?) FROM perishable_items',
+                        (DEFAULT_SELLER,)
+                    ).fetchall()
+                ]
+
+            # Sellers that already have items stay where their items are
+            if sellers:
+                with self.primary.get_connection() as conn:
+                    conn.executemany(
+                        'INSERT OR IGNORE INTO seller_shards (seller_name, shard) VALUES (?, ?)',
+                        sellers
+                    )
+
+    # ------------------------------------------------------------------
+    # Routing
+    # ------------------------------------------------------------------
+
+    def seller_shard(self, seller_name: Optional[str], assign: bool = False) -> Optional[int]:
+        """
+        Look up the shard of a seller.
+
+        Args:
+            seller_name: Seller name (None means the default seller)
+            assign: Place an unknown seller by hash and record it
+
+        Returns:
+            Shard number, or None for an unknown seller when not assigning
+        """
+        seller_name = seller_name or DEFAULT_SELLER
+        index = self._directory.get(seller_name)
+        if index is not None:
+            return index
+
+        with self.primary.get_connection() as conn:
+            if assign:
+                conn.execute(
+                    'INSERT OR IGNORE INTO seller_shards (seller_name, shard) VALUES (?, ?)',
+                    (seller_name, seller_hash_shard(seller_name, self.shard_count))
+                )
+            row = conn.execute(
+                'SELECT shard FROM seller_shards WHERE seller_name = ?', (seller_name,)
+            ).fetchone()
+
+        if row is None:
+            return None
+        with self._directory_lock:
+            self._directory[seller_name] = row[0]
+        return row[0]
+
+    def item_shard(self, item_id: int) -> Optional[int]:
+        """Shard owning an item id, or None if no shard can hold it."""
+        index = item_id >> SHARD_ID_BITS
+        return index if 0 <= index < self.shard_count else None
+
+    def _enter(self, index: int) -> Database:
+        """
+        Get a shard for a write, joining it to the open transaction() block.
+        """
+        shard = self.shards[index]
+        stack = getattr(self._local, 'stack', None)
+        if stack is not None and index not in self._local.entered:
+            if self._local.single_shard and self._local.entered:
+                raise CrossShardTransactionError('The transaction writes to more than one shard')
+            stack.enter_context(shard.transaction())
+            self._local.entered.add(index)
+        return shard
+
+    def _fan_out(self, call: Callable[[Database], Any], shards: Optional[List[int]] = None) -> List[Any]:
+        """
+        Run a call on several shards in parallel.
+
+        Inside a transaction() block the calls run on this thread instead,
+        so they see the block's uncommitted writes.
+
+        Args:
+            call: Function taking a shard Database
+            shards: Shard numbers (default: all)
+
+        Returns:
+            Results in shard order
+        """
+        targets = [self.shards[index] for index in (range(self.shard_count) if shards is None else shards)]
+        if len(targets) == 1 or getattr(self._local, 'stack', None) is not None:
+            return [call(shard) for shard in targets]
+
+        if self._executor is None or self._executor_pid != os.getpid():
+            # Pool threads do not survive a fork
+            self._executor = ThreadPoolExecutor(self.shard_count, thread_name_prefix='shard-read')
+            self._executor_pid = os.getpid()
+        return list(self._executor.map(call, targets))
+
+    def _seller_shards(self, seller_name: Optional[str]) -> Optional[List[int]]:
+        """Shards to read for an optional seller filter ([] for an unknown seller)."""
+        if not seller_name:
+            return None
+        index = self.seller_shard(seller_name)
+        return [] if index is None else [index]
+
+    @staticmethod
+    def _merge(results: Iterable[List[Dict[str, Any]]], key: Callable, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Merge per-shard sorted results into one sorted list."""
+        merged = heapq.merge(*results, key=key)
+        if limit is not None and limit >= 0:
+            merged = islice(merged, limit)
+        return list(merged)
+
+    @staticmethod
+    def _merge_streams(streams: List[Iterator[Dict[str, Any]]], key: Callable) -> Iterator[Dict[str, Any]]:
+        """Merge per-shard sorted row streams, closing every cursor when done."""
+        try:
+            yield from heapq.merge(*streams, key=key)
+        finally:
+            for stream in streams:
+                stream.close()
+
+    # ------------------------------------------------------------------
+    # Transactions, monitoring and catalog version
+    # ------------------------------------------------------------------
+
+    @contextmanager
+    def transaction(self, single_shard: bool = False):
+        """
+        Context manager for a write transaction spanning the shards written
+        inside the block. Nested blocks join the outermost one.
+
+        Args:
+            single_shard: Raise CrossShardTransactionError (rolling the block
+                          back) on a write to a second shard, so the block
+                          is atomic as a whole
+        """
+        if getattr(self._local, 'stack', None) is not None:
+            yield self
+            return
+
+        with ExitStack() as stack:
+            self._local.stack = stack
+            self._local.entered = set()
+            self._local.single_shard = single_shard
+            try:
+                yield self
+            finally:
+                # Shard transactions commit (or roll back) as the stack unwinds
+                self._local.stack = None
+
+    @property
+    def search_available(self) -> bool:
+        return all(shard.search_available for shard in self.shards)
+
+    def add_query_observer(self, observer: Callable[[str, Any, float, int], None]) -> None:
+        """Register a statement observer on every shard."""
+        for shard in self.shards:
+            shard.add_query_observer(observer)
+
+    def set_slow_query_threshold(self, threshold_ms: Optional[float]) -> None:
+        self.slow_queries.threshold_ms = threshold_ms
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """
+        Get connection pool statistics summed over the shards.
+
+        Returns:
+            Dictionary of pool counters plus per-shard statistics under 'shards'
+        """
+        shard_stats = [shard.pool_stats() for shard in self.shards]
+        stats = {
+            key: sum(entry[key] for entry in shard_stats)
+            for key in ('connections_opened', 'connections_closed', 'checkouts', 'reuses', 'open_connections')
+        }
+        stats.update({
+            'db_path': self.db_path,
+            'pid': os.getpid(),
+            'pragmas': shard_stats[0]['pragmas'],
+            'shard_count': self.shard_count,
+            'shards': shard_stats
+        })
+        queues = [entry['write_queue'] for entry in shard_stats if 'write_queue' in entry]
+        if queues:
+            stats['write_queue'] = {
+                key: sum(entry[key] for entry in queues)
+                for key in ('operations', 'transactions', 'failed_operations', 'failed_transactions', 'pending')
+            }
+        return stats
+
+    def get_write_generation(self) -> int:
+        """Sum of the shard write generations (grows on any shard's write)."""
+        return sum(self._fan_out(lambda shard: shard.get_write_generation()))
+
+    def get_catalog_version(self) -> Tuple[int, int]:
+        """Summed write generation and the latest write time of any shard."""
+        versions = self._fan_out(lambda shard: shard.get_catalog_version())
+        return sum(version[0] for version in versions), max(version[1] for version in versions)
+
+    def read_snapshot_rows(self, day: date) -> Tuple[int, List[Tuple]]:
+        """Rows of a catalog snapshot from every shard, merged by (expiry_date, id)."""
+        results = self._fan_out(lambda shard: shard.read_snapshot_rows(day))
+        rows = heapq.merge(*(result[1] for result in results), key=lambda row: (row[7], row[0]))
+        return sum(result[0] for result in results), list(rows)
+
+    def read_expiry_entries(self, from_date: Optional[str] = None) -> Tuple[int, Optional[int], List[Tuple[int, str, int]]]:
+        """Expiry entries of every shard (no change log position: see change_log_available)."""
+        results = self._fan_out(lambda shard: shard.read_expiry_entries(from_date))
+        return sum(result[0] for result in results), None, [row for result in results for row in result[2]]
+
+    def rebuild_summaries(self) -> None:
+        self._fan_out(lambda shard: shard.rebuild_summaries())
+
+    # ------------------------------------------------------------------
+    # Seller-scoped operations (one shard)
+    # ------------------------------------------------------------------
+
+    def create_item(self, item_data: Dict[str, Any]) -> int:
+        index = self.seller_shard(item_data.get('seller_name'), assign=True)
+        return self._enter(index).create_item(item_data)
+
+    def bulk_insert(self, items: List[Dict[str, Any]]) -> int:
+        groups: Dict[int, List[Dict[str, Any]]] = {}
+        for item in items:
+            groups.setdefault(self.seller_shard(item.get('seller_name'), assign=True), []).append(item)
+
+        with self.transaction():
+            return sum(self._enter(index).bulk_insert(group) for index, group in groups.items())
+
+    def get_item_by_id(self, item_id: int) -> Optional[Dict[str, Any]]:
+        index = self.item_shard(item_id)
+        return None if index is None else self.shards[index].get_item_by_id(item_id)
+
+    def get_items_by_ids(self, item_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        groups: Dict[int, List[int]] = {}
+        for item_id in item_ids:
+            index = self.item_shard(item_id)
+            if index is not None:
+                groups.setdefault(index, []).append(item_id)
+
+        items: Dict[int, Dict[str, Any]] = {}
+        for index, ids in groups.items():
+            items.update(self.shards[index].get_items_by_ids(ids))
+        return items
+
+    def update_item(self, item_id: int, item_data: Dict[str, Any]) -> bool:
+        index = self.item_shard(item_id)
+        if index is None:
+            return False
+        if 'seller_name' in item_data and self.seller_shard(item_data['seller_name'], assign=True) != index:
+            raise ValueError('Cannot move an item to a seller on another shard')
+        return self._enter(index).update_item(item_id, item_data)
+
+    def delete_item(self, item_id: int) -> bool:
+        index = self.item_shard(item_id)
+        return index is not None and self._enter(index).delete_item(item_id)
+
+    def toggle_item_active(self, item_id: int) -> Optional[bool]:
+        index = self.item_shard(item_id)
+        return None if index is None else self._enter(index).toggle_item_active(item_id)
+
+    def get_seller_summary(self, seller_name: str) -> Dict[str, Any]:
+        index = self.seller_shard(seller_name)
+        return self.shards[0 if index is None else index].get_seller_summary(seller_name)
+
+    # ------------------------------------------------------------------
+    # Cross-seller reads (fan out and merge)
+    # ------------------------------------------------------------------
+
+    def get_all_items(self) -> List[Dict[str, Any]]:
+        return self._merge(self._fan_out(lambda shard: shard.get_all_items()), _expiry_key)
+
+    def get_items_page(
+        self,
+        limit: int,
+        after: Optional[Tuple[str, int]] = None,
+        seller_name: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        results = self._fan_out(
+            lambda shard: shard.get_items_page(limit, after, seller_name), self._seller_shards(seller_name)
+        )
+        return self._merge(results, _expiry_key, limit)
+
+    def iter_items(self, seller_name: Optional[str] = None, batch_size: int = 500) -> Iterator[Dict[str, Any]]:
+        shards = self._seller_shards(seller_name)
+        targets = range(self.shard_count) if shards is None else shards
+        streams = [self.shards[index].iter_items(seller_name, batch_size) for index in targets]
+        return self._merge_streams(streams, _expiry_key)
+
+    def get_items_by_category(self, category: str) -> List[Dict[str, Any]]:
+        return self._merge(self._fan_out(lambda shard: shard.get_items_by_category(category)), _expiry_key)
+
+    def get_expiring_items(self, days: int = 2) -> List[Dict[str, Any]]:
+        return self._merge(self._fan_out(lambda shard: shard.get_expiring_items(days)), _expiry_key)
+
+    def get_items_expired_before(self, before: str) -> List[Dict[str, Any]]:
+        return self._merge(self._fan_out(lambda shard: shard.get_items_expired_before(before)), _expiry_key)
+
+    def count_items_expired_before(self, before: str) -> Tuple[int, int]:
+        counts = self._fan_out(lambda shard: shard.count_items_expired_before(before))
+        return sum(count[0] for count in counts), sum(count[1] for count in counts)
+
+    def query_public_items(self, limit: Optional[int] = None, **filters: Any) -> List[Dict[str, Any]]:
+        results = self._fan_out(
+            lambda shard: shard.query_public_items(limit=limit, **filters),
+            self._seller_shards(filters.get('seller_name'))
+        )
+        return self._merge(results, _public_key(filters.get('sort_by', 'discount')), limit)
+
+    def iter_public_items(self, batch_size: int = 500, **filters: Any) -> Iterator[Dict[str, Any]]:
+        shards = self._seller_shards(filters.get('seller_name'))
+        targets = range(self.shard_count) if shards is None else shards
+        streams = [self.shards[index].iter_public_items(batch_size, **filters) for index in targets]
+        return self._merge_streams(streams, _public_key(filters.get('sort_by', 'discount')))
+
+    def get_top_deals(
+        self,
+        limit: int = 10,
+        category: Optional[str] = None,
+        seller_name: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        results = self._fan_out(
+            lambda shard: shard.get_top_deals(limit, category, seller_name), self._seller_shards(seller_name)
+        )
+        return self._merge(results, _public_key('discount'), limit)
+
+    def search_public_items(self, text: str, limit: int = 50, **filters: Any) -> List[Dict[str, Any]]:
+        """
+        Full-text search on every shard. bm25 scores depend on each shard's
+        own index statistics and are not comparable, so the ranked lists
+        are interleaved (best match of each shard first).
+        """
+        results = self._fan_out(
+            lambda shard: shard.search_public_items(text, limit=limit, **filters),
+            self._seller_shards(filters.get('seller_name'))
+        )
+        interleaved = []
+        for rank in range(max((len(result) for result in results), default=0)):
+            interleaved.extend(result[rank] for result in results if rank < len(result))
+        return interleaved[:limit]
+
+    def autocomplete_item_names(self, prefix: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Suggestions of every shard with their counts summed per name."""
+        counts: Dict[str, int] = {}
+        for result in self._fan_out(lambda shard: shard.autocomplete_item_names(prefix, limit)):
+            for row in result:
+                counts[row['item_name']] = counts.get(row['item_name'], 0) + row['item_count']
+        ranked = sorted(counts.items(), key=lambda entry: (-entry[1], entry[0]))
+        return [{'item_name': name, 'item_count': count} for name, count in ranked[:limit]]
+
+    def get_public_group_totals(self, group_by: str) -> List[Tuple]:
+        """Per-group counts and discount sums of every shard, combined exactly."""
+        groups: Dict[str, List[Any]] = {}
+        for result in self._fan_out(lambda shard: shard.get_public_group_totals(group_by)):
+            for key, count, discount_sum, min_expiry in result:
+                group = groups.setdefault(key, [0, 0.0, min_expiry])
+                group[0] += count
+                group[1] += discount_sum
+                group[2] = min(group[2], min_expiry)
+        return [(key, count, discount_sum, min_expiry) for key, (count, discount_sum, min_expiry) in groups.items()]
+
+    def get_public_group_stats(self, group_by: str) -> List[Dict[str, Any]]:
+        return group_stats_from_totals(group_by, self.get_public_group_totals(group_by))
+
+    def get_category_stats(self) -> List[Dict[str, Any]]:
+        """Category statistics of every shard, combined exactly."""
+        def totals(shard: Database) -> List[Tuple]:
+            with shard.get_connection() as conn:
+                return [tuple(row) for row in conn.execute('''
+                    SELECT category, COUNT(*), SUM(quantity), SUM(base_price)
+                    FROM perishable_items
+                    GROUP BY category
+                ''').fetchall()]
+
+        groups: Dict[str, List[Any]] = {}
+        for result in self._fan_out(totals):
+            for category, count, quantity, price_sum in result:
+                group = groups.setdefault(category, [0, 0, 0.0])
+                group[0] += count
+                group[1] += quantity or 0
+                group[2] += price_sum or 0.0
+
+        ordered = sorted(groups.items(), key=lambda entry: -entry[1][0])
+        return [
+            {
+                'category': category,
+                'item_count': count,
+                'total_quantity': quantity,
+                'avg_price': price_sum / count
+            }
+            for category, (count, quantity, price_sum) in ordered
+        ]
+
+    # ------------------------------------------------------------------
+    # Maintenance (discount recompute, change log, job runs)
+    # ------------------------------------------------------------------
+
+    def get_repricing_candidates(self, window_end: Optional[str] = None) -> List[Dict[str, Any]]:
+        results = []
+        for index in range(self.shard_count):
+            results.extend(self._enter(index).get_repricing_candidates(window_end))
+        return results
+
+    def update_discounted_prices(self, updates: List[Tuple[float, int]]) -> int:
+        groups: Dict[int, List[Tuple[float, int]]] = {}
+        for price, item_id in updates:
+            index = self.item_shard(item_id)
+            if index is not None:
+                groups.setdefault(index, []).append((price, item_id))
+
+        with self.transaction():
+            return sum(self._enter(index).update_discounted_prices(group) for index, group in groups.items())
+
+    def prune_change_log(self, retention_days: int = CHANGE_LOG_RETENTION_DAYS) -> int:
+        return sum(self._fan_out(lambda shard: shard.prune_change_log(retention_days)))
+
+    def start_job_run(self, *args: Any, **kwargs: Any) -> Optional[int]:
+        return self.primary.start_job_run(*args, **kwargs)
+
+    def finish_job_run(self, *args: Any, **kwargs: Any) -> None:
+        self.primary.finish_job_run(*args, **kwargs)
+
+    def get_job_runs(self, *args: Any, **kwargs: Any) -> List[Dict[str, Any]]:
+        return self.primary.get_job_runs(*args, **kwargs)
+
+    def save_import_job(self, job: Dict[str, Any]) -> None:
+        self.primary.save_import_job(job)
+
+    def get_import_jobs(self, *args: Any, **kwargs: Any) -> List[Dict[str, Any]]:
+        return self.primary.get_import_jobs(*args, **kwargs)
+
+    def prune_import_jobs(self, keep: int) -> int:
+        return self.primary.prune_import_jobs(keep)
+
+    def create_archive_partitions(self, cutoff: str) -> List[str]:
+        created = self._fan_out(lambda shard: shard.create_archive_partitions(cutoff))
+        return sorted({month for months in created for month in months})
+
+    def archive_expired_batch(self, cutoff: str, batch_size: int = 500) -> Dict[str, int]:
+        """Archive one batch on every shard (one short transaction per shard)."""
+        moved: Dict[str, int] = {}
+        for shard in self.shards:
+            for month, count in shard.archive_expired_batch(cutoff, batch_size).items():
+                moved[month] = moved.get(month, 0) + count
+        return moved
+
+    def get_archive_partitions(self) -> List[Dict[str, Any]]:
+        """Archive partitions of every shard with their counts summed per month."""
+        partitions: Dict[str, Dict[str, Any]] = {}
+        for result in self._fan_out(lambda shard: shard.get_archive_partitions()):
+            for partition in result:
+                merged = partitions.setdefault(partition['month'], dict(partition, item_count=0))
+                merged['item_count'] += partition['item_count']
+        return [partitions[month] for month in sorted(partitions)]
+
+    def query_archive(
+        self,
+        month: Optional[str] = None,
+        seller_name: Optional[str] = None,
+        category: Optional[str] = None,
+        limit: int = 100,
+        after: Optional[Tuple[str, int]] = None
+    ) -> List[Dict[str, Any]]:
+        results = self._fan_out(
+            lambda shard: shard.query_archive(month, seller_name, category, limit, after),
+            self._seller_shards(seller_name)
+        )
+        return self._merge(results, _expiry_key, limit)
+
+    def clear_all_items(self) -> int:
+        with self.transaction():
+            return sum(self._enter(index).clear_all_items() for index in range(self.shard_count))
@@ -0,0 +1,664 @@
+"""
+Catalog Snapshot for Basket Buddy 2.0
+Read-optimized, memory-mapped columnar copy of the public catalog
+
+Sharing Foundation:
+- The public catalog P(d) = {i ∈ U : active(i), expiry(i) > d} only changes
+  on a write (write generation g) or at local midnight (date d)
+- One file holds P(d) at (g, d) column by column; every worker maps it
+  read-only, so all processes share the same page-cache pages and memory
+  stays constant in the number of workers
+- A snapshot is used only while (g, d) is current; otherwise readers fall
+  back to SQL and a rebuild is requested, so results are never stale
+- Rebuilds cost O(|P(d)|), so they are at least BASKETBUDDY_SNAPSHOT_MIN_INTERVAL
+  seconds apart; under steady writes reads use SQL in between, and
+  hit_ratio in the stats shows how often the snapshot answered
+- Discounts come from the pricing policies (pricing.discount_batch), the
+  same ones SQL and the served discount_percentage use
+"""
+
+from contextlib import contextmanager
+from datetime import date
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import json
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from database import (
+    Database, SNAPSHOT_COLUMNS, PUBLIC_SORT_ORDERS, KEYSET_SORT_ORDERS, group_stats_from_totals,
+    sorts_by_policy_discount
+)
+from pricing import category_policies_registered, discount_batch, max_days_for_discount
+
+try:
+    import fcntl
+except ImportError:  # Windows: rebuilds are not serialized across processes
+    fcntl = None
+
+
+# Snapshot file; empty disables snapshots (default: catalog_snapshot.bin
+# next to the database)
+SNAPSHOT_PATH_ENV = 'BASKETBUDDY_SNAPSHOT'
+
+MAGIC = b'BBSNAP01'
+PREAMBLE = struct.Struct('<8sQ')  # magic, header length
+ALIGNMENT = 8
+
+# Seconds the rebuilder waits after a write, so a burst of writes
+# (a batch request, an import) is folded into one rebuild
+REBUILD_DELAY_SECONDS = 0.05
+
+# Minimum seconds between the starts of two background rebuilds
+SNAPSHOT_MIN_INTERVAL_ENV = 'BASKETBUDDY_SNAPSHOT_MIN_INTERVAL'
+DEFAULT_SNAPSHOT_MIN_INTERVAL = 1.0
+
+# Column encodings
+NUMERIC_COLUMNS = {
+    'id': np.int64,
+    'quantity': np.int64,
+    'base_price': np.float64,
+    'cost_price': np.float64,        # NaN = NULL
+    'shelf_life': np.float64,        # NaN = NULL
+    'discounted_price': np.float64,  # NaN = NULL
+    'is_active': np.int8,            # -1 = NULL
+    'expiry_date': np.int64,         # Days since 1970-01-01
+}
+DICTIONARY_COLUMNS = ('category', 'seller_name')  # Codes into a value list, -1 = NULL
+TEXT_COLUMNS = ('item_name', 'created_at', 'updated_at')  # Offsets + UTF-8 blob
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def epoch_days(day: Any) -> int:
+    """Days since 1970-01-01 of an ISO date string or date."""
+    return int(np.datetime64(str(day), 'D').astype(np.int64))
+
+
+def _numeric_column(values: List[Any], dtype: Any) -> np.ndarray:
+    if dtype is np.int8:
+        return np.array([-1 if value is None else value for value in values], dtype=dtype)
+    if dtype is np.float64:
+        return np.array([np.nan if value is None else value for value in values], dtype=dtype)
+    return np.array(values, dtype=dtype)
+
+
+def _dictionary_column(values: List[Optional[str]]) -> Tuple[np.ndarray, List[str]]:
+    dictionary = sorted({value for value in values if value is not None})
+    codes = {value: code for code, value in enumerate(dictionary)}
+    return np.array([codes.get(value, -1) for value in values], dtype=np.int32), dictionary
+
+
+def _text_column(values: List[Any]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    encoded = [b'' if value is None else str(value).encode('utf-8') for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(value) for value in encoded], out=offsets[1:])
+    blob = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+    nulls = np.array([value is None for value in values], dtype=np.uint8)
+    return offsets, blob, nulls
+
+
+def write_snapshot(path: str, generation: int, day: date, rows: List[Tuple]) -> int:
+    """
+    Encode catalog rows into a snapshot file, replacing it atomically.
+
+    Layout: magic, header length, JSON header (generation, day, row count
+    and the dtype/offset/count of every buffer), then the 8-byte aligned
+    column buffers.
+
+    Args:
+        path: Snapshot file
+        generation: Write generation the rows belong to
+        day: Date the snapshot is built for
+        rows: Rows ordered by (expiry_date, id), columns as SNAPSHOT_COLUMNS
+
+    Returns:
+        Size of the file in bytes
+    """
+    columns = {name: [row[index] for row in rows] for index, name in enumerate(SNAPSHOT_COLUMNS)}
+    columns['expiry_date'] = [epoch_days(value) for value in columns['expiry_date']]
+
+    buffers: List[Tuple[int, np.ndarray]] = []
+    size = 0
+
+    def add(array: np.ndarray) -> List[Any]:
+        nonlocal size
+        array = np.ascontiguousarray(array)
+        buffers.append((size, array))
+        spec = [array.dtype.str, size, int(array.size)]
+        size = _align(size + array.nbytes)
+        return spec
+
+    specs: Dict[str, Dict[str, Any]] = {}
+    for name, dtype in NUMERIC_COLUMNS.items():
+        specs[name] = {'kind': 'numeric', 'buffers': {'values': add(_numeric_column(columns[name], dtype))}}
+    for name in DICTIONARY_COLUMNS:
+        codes, dictionary = _dictionary_column(columns[name])
+        specs[name] = {'kind': 'dictionary', 'values': dictionary, 'buffers': {'codes': add(codes)}}
+    for name in TEXT_COLUMNS:
+        offsets, blob, nulls = _text_column(columns[name])
+        specs[name] = {
+            'kind': 'text',
+            'buffers': {'offsets': add(offsets), 'blob': add(blob), 'nulls': add(nulls)}
+        }
+
+    header = json.dumps({
+        'generation': generation,
+        'day': day.isoformat(),
+        'rows': len(rows),
+        'built_at': round(time.time(), 3),
+        'columns': specs
+    }).encode('utf-8')
+    data_start = _align(PREAMBLE.size + len(header))
+
+    # Written next to the target and renamed over it: readers holding the
+    # old mapping keep their (unlinked) file until they remap
+    fd, temp_path = tempfile.mkstemp(prefix='.catalog-snapshot-', dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            out.write(PREAMBLE.pack(MAGIC, len(header)))
+            out.write(header)
+            for offset, array in buffers:
+                out.seek(data_start + offset)
+                out.write(array.tobytes())
+            out.truncate(data_start + size)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return data_start + size
+
+
+class CatalogSnapshot:
+    """
+    Read-only, zero-copy view of a snapshot file.
+
+    Column arrays are numpy views straight into the shared mapping; only
+    the rows a query returns are decoded into dictionaries. Query methods
+    return exactly what the matching Database methods return for the
+    snapshot's (generation, day).
+    """
+
+    def __init__(self, path: str):
+        """
+        Map a snapshot file.
+
+        Args:
+            path: Snapshot file
+
+        Raises:
+            ValueError: If the file is not a snapshot
+        """
+        with open(path, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        self.identity = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        self.size = stat.st_size
+        magic, header_length = PREAMBLE.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ValueError(f"Not a catalog snapshot: {path}")
+
+        header = json.loads(self._mmap[PREAMBLE.size:PREAMBLE.size + header_length])
+        data_start = _align(PREAMBLE.size + header_length)
+        self.generation: int = header['generation']
+        self.day = date.fromisoformat(header['day'])
+        self.rows: int = header['rows']
+        self.built_at: float = header['built_at']
+
+        self._columns: Dict[str, Dict[str, np.ndarray]] = {}
+        self._dictionaries: Dict[str, List[str]] = {}
+        for name, spec in header['columns'].items():
+            self._columns[name] = {
+                part: np.frombuffer(self._mmap, dtype=np.dtype(dtype), count=count, offset=data_start + offset)
+                for part, (dtype, offset, count) in spec['buffers'].items()
+            }
+            if spec['kind'] == 'dictionary':
+                self._dictionaries[name] = spec['values']
+
+        self._today = epoch_days(self.day)
+
+    def is_current(self, generation: int, day: date) -> bool:
+        """Check whether the snapshot reflects the given write generation and date."""
+        return self.generation == generation and self.day == day
+
+    def _values(self, name: str) -> np.ndarray:
+        return self._columns[name]['values']
+
+    def _codes(self, name: str) -> np.ndarray:
+        return self._columns[name]['codes']
+
+    def _code_mask(self, name: str, value: str, rows: slice) -> Optional[np.ndarray]:
+        """Mask of rows whose dictionary column equals value (None if no row can match)."""
+        try:
+            code = self._dictionaries[name].index(value)
+        except ValueError:
+            return None
+        return self._codes(name)[rows] == code
+
+    def _discounts(self, rows: Any) -> np.ndarray:
+        """Discount percentages of the rows selected by a slice, mask or positions."""
+        categories = np.array(self._dictionaries['category'], dtype=object)
+        return discount_batch(
+            self._values('expiry_date')[rows] - self._today,
+            self._values('quantity')[rows],
+            self._values('base_price')[rows],
+            categories[self._codes('category')[rows]]
+        )
+
+    def _text(self, name: str, index: int) -> Optional[str]:
+        column = self._columns[name]
+        if column['nulls'][index]:
+            return None
+        start, end = column['offsets'][index], column['offsets'][index + 1]
+        return column['blob'][start:end].tobytes().decode('utf-8')
+
+    def hydrate(self, indices: np.ndarray) -> List[Dict[str, Any]]:
+        """
+        Decode rows into the dictionaries Database query methods return.
+
+        Args:
+            indices: Row positions
+
+        Returns:
+            List of dictionaries keyed by SNAPSHOT_COLUMNS
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        expiry = np.datetime_as_string(self._values('expiry_date')[indices].astype('datetime64[D]')).tolist()
+        decoded: Dict[str, List[Any]] = {'expiry_date': expiry}
+
+        for name in ('id', 'quantity', 'base_price'):
+            decoded[name] = self._values(name)[indices].tolist()
+        for name in ('cost_price', 'discounted_price'):
+            decoded[name] = [None if value != value else value for value in self._values(name)[indices].tolist()]
+        decoded['shelf_life'] = [
+            None if value != value else int(value) for value in self._values('shelf_life')[indices].tolist()
+        ]
+        decoded['is_active'] = [None if value < 0 else value for value in self._values('is_active')[indices].tolist()]
+        for name in DICTIONARY_COLUMNS:
+            dictionary = self._dictionaries[name]
+            decoded[name] = [None if code < 0 else dictionary[code] for code in self._codes(name)[indices].tolist()]
+        for name in TEXT_COLUMNS:
+            decoded[name] = [self._text(name, index) for index in indices.tolist()]
+
+        return [dict(zip(SNAPSHOT_COLUMNS, values)) for values in zip(*(decoded[name] for name in SNAPSHOT_COLUMNS))]
+
+    def query_public_items(
+        self,
+        category: Optional[str] = None,
+        min_discount: Optional[float] = None,
+        max_price: Optional[float] = None,
+        seller_name: Optional[str] = None,
+        sort_by: str = 'discount',
+        limit: Optional[int] = None,
+        after: Optional[Tuple[str, int]] = None
+    ) -> List[Dict[str, Any]]:
+        """Snapshot counterpart of Database.query_public_items."""
+        order_by = PUBLIC_SORT_ORDERS.get(sort_by, PUBLIC_SORT_ORDERS['expiry'])
+        by_discount = sorts_by_policy_discount(sort_by)
+        expiry = self._values('expiry_date')
+        ids = self._values('id')
+
+        # Rows are ordered by (expiry_date, id): the keyset position and the
+        # discount bound are both binary searches
+        start, end = 0, self.rows
+        if after is not None:
+            if by_discount or order_by not in KEYSET_SORT_ORDERS:
+                raise ValueError(f"Cursor pagination is not supported for sort_by={sort_by}")
+            after_day = epoch_days(after[0])
+            start = int(np.searchsorted(expiry, after_day, side='left'))
+            same_day_end = int(np.searchsorted(expiry, after_day, side='right'))
+            start += int(np.searchsorted(ids[start:same_day_end], after[1], side='right'))
+
+        if min_discount is not None:
+            max_days = max_days_for_discount(min_discount)
+            if max_days is not None:
+                end = int(np.searchsorted(expiry, self._today + max_days, side='right'))
+
+        rows = slice(start, max(start, end))
+        mask = self._values('is_active')[rows] == 1
+        for name, value in (('category', category), ('seller_name', seller_name)):
+            if value:
+                matches = self._code_mask(name, value, rows)
+                if matches is None:
+                    return []
+                mask &= matches
+        if max_price is not None:
+            mask &= self._values('discounted_price')[rows] <= max_price
+        if min_discount is not None and category_policies_registered():
+            # The expiry bound only bounds the category policies' discounts
+            mask &= self._discounts(rows) >= min_discount
+
+        selected = np.flatnonzero(mask) + start
+        if by_discount:
+            # discount DESC, then (expiry_date, id) ASC: the stable sort keeps row order on ties
+            order = np.argsort(-self._discounts(selected), kind='stable')
+            selected = selected[order]
+        elif order_by not in KEYSET_SORT_ORDERS:
+            # discounted_price ASC (NULL first, as in SQLite), id ASC
+            prices = self._values('discounted_price')[selected]
+            order = np.lexsort((ids[selected], np.nan_to_num(prices), ~np.isnan(prices)))
+            selected = selected[order]
+
+        if limit is not None and limit >= 0:
+            selected = selected[:limit]
+        return self.hydrate(selected)
+
+    def get_top_deals(
+        self,
+        limit: int = 10,
+        category: Optional[str] = None,
+        seller_name: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Snapshot counterpart of Database.get_top_deals."""
+        return self.query_public_items(
+            category=category, seller_name=seller_name, sort_by='discount', limit=limit
+        )
+
+    def get_public_group_stats(self, group_by: str) -> List[Dict[str, Any]]:
+        """Snapshot counterpart of Database.get_public_group_stats."""
+        if group_by not in ('category', 'seller_name'):
+            raise ValueError(f"Unsupported group_by column: {group_by}")
+
+        # Summary tables count COALESCE(is_active, 1) = 1 rows; NULL sellers are 'Admin'
+        mask = self._values('is_active') != 0
+        keys = list(self._dictionaries[group_by])
+        codes = self._codes(group_by)[mask]
+        if group_by == 'seller_name':
+            if 'Admin' not in keys:
+                keys.append('Admin')
+            codes = np.where(codes < 0, keys.index('Admin'), codes)
+        if codes.size == 0:
+            return []
+
+        groups, first, inverse = np.unique(codes, return_index=True, return_inverse=True)
+        counts = np.bincount(inverse)
+        discount_sums = np.bincount(inverse, weights=self._discounts(mask))
+        # Rows are expiry-ordered, so a group's first row has its earliest expiry
+        min_expiry = self._values('expiry_date')[mask][first]
+
+        return group_stats_from_totals(group_by, [
+            (keys[code], int(count), float(total), int(expiry))
+            for code, count, total, expiry in zip(groups.tolist(), counts, discount_sums, min_expiry)
+        ])
+
+
+class CatalogSnapshotStore:
+    """
+    Keeps this process mapped to the current catalog snapshot.
+
+    Readers call the query methods, which answer from the mapped snapshot
+    when it matches the current write generation and date and from SQL
+    otherwise. A background thread rebuilds the file after writes (bursts
+    coalesced) under an exclusive file lock, so one worker builds and the
+    others simply remap the new file.
+    """
+
+    def __init__(self, db: Database, path: Optional[str], min_interval: float = DEFAULT_SNAPSHOT_MIN_INTERVAL):
+        """
+        Initialize the store.
+
+        Args:
+            db: Database instance
+            path: Snapshot file (None disables snapshots)
+            min_interval: Minimum seconds between background rebuilds
+        """
+        self.db = db
+        self.path = path
+        self.min_interval = max(min_interval, 0.0)
+        self._last_rebuild = float('-inf')
+        self._view: Optional[CatalogSnapshot] = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._pid = os.getpid()
+        self._stats = {
+            'snapshot_reads': 0,
+            'sql_fallbacks': 0,
+            'rebuilds': 0,
+            'remaps': 0,
+            'rebuild_errors': 0,
+        }
+        self.last_build_ms: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.path is not None
+
+    # ------------------------------------------------------------------
+    # Mapping and rebuilding
+    # ------------------------------------------------------------------
+
+    def _load(self) -> Optional[CatalogSnapshot]:
+        """Map the file on disk if it was replaced since the current mapping."""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+
+        with self._lock:
+            view = self._view
+            if view is not None and view.identity == (stat.st_ino, stat.st_mtime_ns, stat.st_size):
+                return view
+            try:
+                view = CatalogSnapshot(self.path)
+            except (OSError, ValueError, KeyError):
+                return self._view
+            # The previous mapping is released once no request still uses it
+            self._view = view
+            self._stats['remaps'] += 1
+            return view
+
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        """Exclusive lock serializing rebuilds across worker processes."""
+        if fcntl is None:
+            yield
+            return
+        with open(f'{self.path}.lock', 'a') as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def refresh(self) -> Optional[CatalogSnapshot]:
+        """
+        Bring the snapshot up to date, rebuilding the file if no other
+        worker already has.
+
+        Returns:
+            Current snapshot, or None if snapshots are disabled
+        """
+        if not self.enabled:
+            return None
+
+        today = date.today()
+        generation = self.db.get_write_generation()
+        view = self._load()
+        if view is not None and view.is_current(generation, today):
+            return view
+
+        with self._file_lock():
+            view = self._load()
+            if view is not None and view.is_current(generation, today):
+                return view
+
+            started = time.perf_counter()
+            # Rows and generation come from one read transaction
+            generation, rows = self.db.read_snapshot_rows(today)
+            write_snapshot(self.path, generation, today, rows)
+            self.last_build_ms = round((time.perf_counter() - started) * 1000, 2)
+            with self._lock:
+                self._stats['rebuilds'] += 1
+            return self._load()
+
+    def request_rebuild(self) -> None:
+        """Ask the background rebuilder to refresh the snapshot soon."""
+        if not self.enabled:
+            return
+        if self._pid != os.getpid():
+            # Forked worker: the parent's thread does not exist here
+            self._pid = os.getpid()
+            self._thread = None
+            self._view = None
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(
+                        target=self._rebuild_loop, name='catalog-snapshot', daemon=True
+                    )
+                    self._thread.start()
+        self._wake.set()
+
+    def _rebuild_loop(self) -> None:
+        while True:
+            self._wake.wait()
+            time.sleep(max(REBUILD_DELAY_SECONDS, self._last_rebuild + self.min_interval - time.monotonic()))
+            # Cleared before rebuilding: a write during the rebuild triggers another
+            self._wake.clear()
+            self._last_rebuild = time.monotonic()
+            try:
+                self.refresh()
+                self.last_error = None
+            except Exception as e:
+                with self._lock:
+                    self._stats['rebuild_errors'] += 1
+                self.last_error = str(e)
+
+    def current(self) -> Optional[CatalogSnapshot]:
+        """
+        Get the mapped snapshot if it reflects the current catalog.
+        A stale or missing snapshot schedules a rebuild.
+
+        Returns:
+            CatalogSnapshot, or None if reads must go to SQL
+        """
+        if not self.enabled:
+            return None
+
+        generation = self.db.get_write_generation()
+        today = date.today()
+        view = self._view
+        if view is None or not view.is_current(generation, today):
+            # Another worker may already have rebuilt the file
+            view = self._load()
+
+        if view is not None and view.is_current(generation, today):
+            with self._lock:
+                self._stats['snapshot_reads'] += 1
+            return view
+
+        with self._lock:
+            self._stats['sql_fallbacks'] += 1
+        self.request_rebuild()
+        return None
+
+    # ------------------------------------------------------------------
+    # Read API (same signatures and results as Database)
+    # ------------------------------------------------------------------
+
+    def query_public_items(self, **filters: Any) -> List[Dict[str, Any]]:
+        view = self.current()
+        if view is None:
+            return self.db.query_public_items(**filters)
+        return view.query_public_items(**filters)
+
+    def get_top_deals(self, limit: int = 10, **filters: Any) -> List[Dict[str, Any]]:
+        view = self.current()
+        if view is None:
+            return self.db.get_top_deals(limit, **filters)
+        return view.get_top_deals(limit, **filters)
+
+    def get_public_group_stats(self, group_by: str) -> List[Dict[str, Any]]:
+        view = self.current()
+        if view is None:
+            return self.db.get_public_group_stats(group_by)
+        return view.get_public_group_stats(group_by)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get snapshot metrics for monitoring.
+
+        Returns:
+            Dictionary of counters, the share of reads the snapshot answered
+            and the mapped snapshot's generation, day, rows and size
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        view = self._view
+        reads = stats['snapshot_reads'] + stats['sql_fallbacks']
+        stats.update({
+            'hit_ratio': round(stats['snapshot_reads'] / reads, 4) if reads else None,
+            'min_interval_seconds': self.min_interval,
+            'enabled': self.enabled,
+            'path': self.path,
+            'generation': view.generation if view else None,
+            'day': view.day.isoformat() if view else None,
+            'rows': view.rows if view else 0,
+            'size_bytes': view.size if view else 0,
+            'built_at': view.built_at if view else None,
+            'last_build_ms': self.last_build_ms,
+            'last_error': self.last_error
+        })
+        return stats
+
+    def install(self, app) -> None:
+        """
+        Request a rebuild after every successful write request of a Flask app.
+
+        Args:
+            app: Flask application
+        """
+        from flask import request
+
+        @app.after_request
+        def _refresh_catalog_snapshot(response):
+            if request.method in ('POST', 'PUT', 'PATCH', 'DELETE') and response.status_code < 400:
+                self.request_rebuild()
+            return response
+
+
+# Process-wide stores, keyed by absolute database path
+_stores: Dict[str, CatalogSnapshotStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_snapshot_store(db: Database) -> CatalogSnapshotStore:
+    """
+    Get the shared snapshot store of a database.
+
+    The file comes from BASKETBUDDY_SNAPSHOT (empty disables snapshots),
+    default catalog_snapshot.bin next to the database; the rebuild interval
+    from BASKETBUDDY_SNAPSHOT_MIN_INTERVAL.
+
+    Args:
+        db: Database instance
+
+    Returns:
+        CatalogSnapshotStore shared across the process
+    """
+    key = os.path.abspath(db.db_path)
+    with _stores_lock:
+        if key not in _stores:
+            path = os.environ.get(
+                SNAPSHOT_PATH_ENV, os.path.join(os.path.dirname(key), 'catalog_snapshot.bin')
+            )
+            interval = os.environ.get(SNAPSHOT_MIN_INTERVAL_ENV, '').strip()
+            try:
+                min_interval = float(interval) if interval else DEFAULT_SNAPSHOT_MIN_INTERVAL
+            except ValueError:
+                print(f"Warning: invalid {SNAPSHOT_MIN_INTERVAL_ENV}={interval!r}, "
+                      f"using {DEFAULT_SNAPSHOT_MIN_INTERVAL} s")
+                min_interval = DEFAULT_SNAPSHOT_MIN_INTERVAL
+            _stores[key] = CatalogSnapshotStore(db, path or None, min_interval)
+        return _stores[key]
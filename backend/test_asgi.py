@@ -0,0 +1,102 @@
+"""
+Tests that the ASGI public API answers like the Flask public routes
+"""
+
+import asyncio
+import importlib
+import json
+
+import pytest
+
+from conftest import days_from_today, make_item
+
+
+PREFIX = '/api/perishables/public'
+
+# (path, query string) for every public route, including client errors
+REQUESTS = [
+    (PREFIX, ''),
+    (PREFIX, 'category=Dairy'),
+    (PREFIX, 'sort_by=price&max_price=3'),
+    (PREFIX, 'sort_by=expiry&seller_name=Corner+Shop'),
+    (PREFIX, 'min_discount=40'),
+    (PREFIX, 'limit=2'),
+    (PREFIX, 'limit=0'),
+    (PREFIX, 'cursor=bogus'),
+    (PREFIX, 'sort_by=bogus'),
+    (PREFIX, 'stream=1&category=Bakery'),
+    (f'{PREFIX}/search', 'q=milk'),
+    (f'{PREFIX}/search', 'q=bre&limit=1'),
+    (f'{PREFIX}/search', ''),
+    (f'{PREFIX}/search', 'q=milk&limit=0'),
+    (f'{PREFIX}/autocomplete', 'q=Wh'),
+    (f'{PREFIX}/autocomplete', ''),
+    (f'{PREFIX}/categories', ''),
+    (f'{PREFIX}/sellers', ''),
+    (f'{PREFIX}/deals', ''),
+    (f'{PREFIX}/deals', 'limit=2&category=Dairy'),
+    (f'{PREFIX}/deals', 'limit=-1'),
+    (f'{PREFIX}/deals', 'limit=abc'),
+]
+
+
+def asgi_get(api, path, query='', headers=None):
+    """Run one GET through the ASGI app; returns (status, headers, body)."""
+    scope = {
+        'type': 'http',
+        'method': 'GET',
+        'path': path,
+        'query_string': query.encode('latin-1'),
+        'headers': [(name.lower().encode('latin-1'), value.encode('latin-1'))
+                    for name, value in (headers or {}).items()],
+    }
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(api(scope, receive, send))
+    start, body = messages[0], b''.join(message.get('body', b'') for message in messages[1:])
+    return start['status'], {name.decode('latin-1'): value.decode('latin-1') for name, value in start['headers']}, body
+
+
+@pytest.fixture
+def api(client, app_module):
+    """ASGI app over the same (emptied) database as the Flask client, with a small catalog."""
+    asgi = importlib.import_module('asgi')
+    items = [
+        make_item(item_name='Whole Milk', expiry_date=days_from_today(1), base_price=3.0),
+        make_item(item_name='Skim Milk', expiry_date=days_from_today(4), base_price=2.5, seller_name='Corner Shop'),
+        make_item(item_name='White Bread', category='Bakery', expiry_date=days_from_today(2), base_price=4.0),
+        make_item(item_name='Bagels', category='Bakery', expiry_date=days_from_today(6), seller_name='Corner Shop'),
+        make_item(item_name='Wheat Rolls', category='Bakery', expiry_date=days_from_today(3), base_price=1.5),
+    ]
+    for item in items:
+        app_module.db.create_item(item)
+    app_module.catalog_snapshot.refresh()
+    return asgi.app
+
+
+@pytest.mark.parametrize('path, query', REQUESTS)
+def test_asgi_matches_flask(api, client, app_module, path, query):
+    # Each side computes its own answer rather than reading the other's cache entry
+    app_module.response_cache.clear()
+    flask_response = client.get(f'{path}?{query}')
+    app_module.response_cache.clear()
+    status, headers, body = asgi_get(api, path, query)
+
+    assert status == flask_response.status_code
+    assert json.loads(body) == flask_response.get_json()
+    assert headers.get('etag') == flask_response.headers.get('ETag')
+
+
+def test_asgi_revalidates_a_flask_etag(api, client):
+    etag = client.get(f'{PREFIX}/deals').headers['ETag']
+
+    status, _, body = asgi_get(api, f'{PREFIX}/deals', headers={'If-None-Match': etag})
+
+    assert status == 304
+    assert body == b''
@@ -0,0 +1,45 @@
+"""
+Tests for conditional GETs and the response cache
+"""
+
+from datetime import date, datetime, timezone
+from email.utils import format_datetime
+
+import cache
+from cache import catalog_last_modified
+from conftest import make_item
+
+
+def test_last_modified_is_withheld_during_the_write_second():
+    day = date(2026, 3, 1)
+    written = int(datetime(2026, 3, 1, 12, 0, 0, tzinfo=timezone.utc).timestamp())
+
+    assert catalog_last_modified(written, day, now=written + 0.5) is None
+    assert catalog_last_modified(written, day, now=written + 1) == datetime.fromtimestamp(written, timezone.utc)
+
+
+def test_if_modified_since_is_ignored_within_the_write_second(client, app_module, monkeypatch):
+    app_module.db.create_item(make_item())
+    modified_at = app_module.db.get_catalog_version()[1]
+    monkeypatch.setattr(cache, 'unix_time', lambda: modified_at + 0.5)
+    # A validator taken earlier in the same second as the write
+    since = format_datetime(datetime.fromtimestamp(modified_at, timezone.utc), usegmt=True)
+
+    response = client.get('/api/perishables/public', headers={'If-Modified-Since': since})
+
+    assert response.status_code == 200
+    assert 'Last-Modified' not in response.headers
+    assert response.headers['ETag']
+
+
+def test_if_modified_since_revalidates_after_the_write_second(client, app_module, monkeypatch):
+    app_module.db.create_item(make_item())
+    modified_at = app_module.db.get_catalog_version()[1]
+    monkeypatch.setattr(cache, 'unix_time', lambda: modified_at + 2)
+
+    first = client.get('/api/perishables/public')
+    second = client.get(
+        '/api/perishables/public', headers={'If-Modified-Since': first.headers['Last-Modified']}
+    )
+
+    assert second.status_code == 304
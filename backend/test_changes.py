@@ -0,0 +1,61 @@
+"""
+Tests for the change log and change feed
+"""
+
+from changes import ChangeFeed, build_delta
+from conftest import make_item
+from models import serialize_db_items
+
+
+def test_seller_move_leaves_a_tombstone_for_the_old_seller(db):
+    since = db.get_change_log_bounds()[1]
+    item_id = db.create_item(make_item(seller_name='Old Seller'))
+
+    db.update_item(item_id, {'seller_name': 'New Seller'})
+
+    old = build_delta(db, since, serialize_db_items, seller_name='Old Seller')['changes']
+    new = build_delta(db, since, serialize_db_items, seller_name='New Seller')['changes']
+    everyone = build_delta(db, since, serialize_db_items)['changes']
+    assert [(change['item_id'], change['op']) for change in old] == [(item_id, 'delete')]
+    assert [(change['op'], change['item']['seller_name']) for change in new] == [('update', 'New Seller')]
+    assert [(change['op'], change['item']['seller_name']) for change in everyone] == [('update', 'New Seller')]
+
+
+def test_update_without_seller_change_logs_no_tombstone(db):
+    item_id = db.create_item(make_item())
+    since = db.get_change_log_bounds()[1]
+
+    db.update_item(item_id, {'quantity': 3, 'seller_name': 'Test Seller'})
+
+    assert [entry['op'] for entry in db.get_changes(since)] == ['update']
+
+
+def test_stream_slots_are_limited(db):
+    feed = ChangeFeed(db, max_streams=2)
+
+    assert feed.acquire_stream() and feed.acquire_stream()
+    assert not feed.acquire_stream()
+    feed.release_stream()
+    assert feed.acquire_stream()
+
+
+def test_stream_endpoint_rejects_beyond_the_limit(client, app_module, monkeypatch):
+    monkeypatch.setattr(app_module.change_feed, 'max_streams', 0)
+
+    response = client.get('/api/changes/stream')
+
+    assert response.status_code == 503
+    assert response.headers['Retry-After']
+    assert response.get_json()['success'] is False
+
+
+def test_stream_endpoint_releases_its_slot_on_close(client, app_module, monkeypatch):
+    monkeypatch.setattr(app_module.change_feed, 'max_streams', 1)
+
+    response = client.get('/api/changes/stream', buffered=False)
+    assert response.status_code == 200
+    assert not app_module.change_feed.acquire_stream()
+    response.close()
+
+    assert app_module.change_feed.acquire_stream()
+    app_module.change_feed.release_stream()
@@ -0,0 +1,74 @@
+"""
+Tests for the Database write paths
+"""
+
+from conftest import days_from_today, make_item
+from pricing import price_one
+
+
+def test_update_item_reprices_when_expiry_leaves_the_window(db):
+    item_id = db.create_item(make_item(expiry_date=days_from_today(1), discounted_price=1.0))
+
+    db.update_item(item_id, {'expiry_date': days_from_today(30)})
+
+    assert db.get_item_by_id(item_id)['discounted_price'] == 4.0
+
+
+def test_update_item_reprices_from_stored_columns(db):
+    item_id = db.create_item(make_item(expiry_date=days_from_today(10), discounted_price=4.0))
+
+    db.update_item(item_id, {'expiry_date': days_from_today(2), 'discounted_price': 99.0})
+
+    expected = price_one(days_from_today(2), 10, 4.0, 'Dairy')[1]
+    assert db.get_item_by_id(item_id)['discounted_price'] == expected
+
+
+def test_update_item_keeps_price_when_pricing_inputs_unchanged(db):
+    item_id = db.create_item(make_item(discounted_price=3.33))
+
+    db.update_item(item_id, {'item_name': 'Renamed'})
+
+    assert db.get_item_by_id(item_id)['discounted_price'] == 3.33
+
+
+def test_write_generation_bumps_once_per_transaction(db):
+    generation = db.get_write_generation()
+
+    db.bulk_insert([make_item(item_name=f'Milk {n}') for n in range(50)])
+    assert db.get_write_generation() == generation + 1
+
+    ids = [row['id'] for row in db.get_all_items()[:3]]
+    with db.transaction():
+        db.update_item(ids[0], {'quantity': 1})
+        db.toggle_item_active(ids[1])
+        db.delete_item(ids[2])
+    assert db.get_write_generation() == generation + 2
+
+
+def test_write_generation_ignores_rollbacks_and_no_ops(db):
+    generation = db.get_write_generation()
+
+    try:
+        with db.transaction():
+            db.create_item(make_item())
+            raise RuntimeError('abort')
+    except RuntimeError:
+        pass
+    db.update_item(12345, {'quantity': 1})
+    db.delete_item(12345)
+
+    assert db.get_write_generation() == generation
+    assert db.get_all_items() == []
+
+
+def test_top_deals_follow_expiry_not_stored_price(db):
+    soon = db.create_item(make_item(expiry_date=days_from_today(1), discounted_price=3.0))
+    later = db.create_item(make_item(expiry_date=days_from_today(3), discounted_price=3.0))
+    # A stale price (as left by an old expiry) must not promote the item
+    stale = db.create_item(make_item(expiry_date=days_from_today(20), discounted_price=0.5))
+    db.create_item(make_item(expiry_date=days_from_today(-1)))
+    db.create_item(make_item(expiry_date=days_from_today(1), is_active=0))
+
+    assert [row['id'] for row in db.get_top_deals(10)] == [soon, later, stale]
+    assert [row['id'] for row in db.get_top_deals(1)] == [soon]
+    assert db.get_top_deals(10, category='Bakery') == []
@@ -0,0 +1,65 @@
+"""
+Tests for the expiry index
+"""
+
+from datetime import date, timedelta
+
+import expiry_index
+from conftest import days_from_today, make_item
+from expiry_index import ExpiryWheel, ShardedExpiryIndex, get_expiry_index
+from sharding import ShardedDatabase
+
+
+def _ids(items):
+    return [item['id'] for item in sorted(items, key=lambda item: (item['expiry_date'], item['id']))]
+
+
+def test_items_past_the_horizon_are_served_from_the_database(db):
+    for offset in (-20, -3, 0, 2, 9):
+        db.create_item(make_item(expiry_date=days_from_today(offset)))
+    db.create_item(make_item(expiry_date=days_from_today(-30), is_active=0))
+    wheel = ExpiryWheel(db, overdue_days=7)
+
+    assert _ids(wheel.get_expiring_items(2)) == _ids(db.get_expiring_items(2))
+    assert _ids(wheel.get_expiring_items(-10)) == _ids(db.get_expiring_items(-10))
+    assert wheel.stats()['items'] == 4
+    counts = wheel.breakdown()
+    assert (counts['total'], counts['expired']) == (6, 4)
+    assert wheel.breakdown(active_only=True)['expired'] == 3
+
+
+def test_overdue_buckets_are_evicted_as_days_pass(db, monkeypatch):
+    db.create_item(make_item(expiry_date=days_from_today(-3)))
+    wheel = ExpiryWheel(db, overdue_days=7)
+    wheel.refresh()
+    assert wheel.stats()['items'] == 1
+
+    class Later(date):
+        @classmethod
+        def today(cls):
+            return date.today() + timedelta(days=10)
+
+    monkeypatch.setattr(expiry_index, 'date', Later)
+    counts = wheel.breakdown()
+
+    stats = wheel.stats()
+    assert (stats['items'], stats['evicted'], stats['reloads']) == (0, 1, 1)
+    assert (counts['total'], counts['expired']) == (1, 1)
+
+
+def test_sharded_index_syncs_each_shard_without_reloading(tmp_path):
+    db = ShardedDatabase(str(tmp_path / 'test.db'), shard_count=2)
+    for seller in ('Seller A', 'Seller B', 'Seller C', 'Seller D'):
+        db.create_item(make_item(seller_name=seller, expiry_date=days_from_today(1)))
+    index = get_expiry_index(db)
+    assert isinstance(index, ShardedExpiryIndex)
+    assert _ids(index.get_expiring_items(2)) == _ids(db.get_expiring_items(2))
+    reloads = index.stats()['reloads']
+
+    item_id = db.create_item(make_item(seller_name='Seller B', expiry_date=days_from_today(2)))
+    db.update_item(db.get_expiring_items(1)[0]['id'], {'expiry_date': days_from_today(6)})
+
+    assert _ids(index.get_expiring_items(2)) == _ids(db.get_expiring_items(2))
+    assert item_id in index.expiring_ids(2)
+    assert index.breakdown()['total'] == 5
+    assert index.stats()['reloads'] == reloads
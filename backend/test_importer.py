@@ -0,0 +1,53 @@
+"""
+Tests for the streaming CSV importer
+"""
+
+import time
+
+from conftest import days_from_today
+from importer import CSVImporter
+
+
+def write_csv(path, rows):
+    lines = ['item_name,category,quantity,base_price,expiry_date']
+    lines += [f'Bread {n},Bakery,3,2.5,{days_from_today(5)}' for n in range(rows)]
+    lines.append('Broken,Bakery,three,2.5,2030-01-01')
+    path.write_text('\n'.join(lines) + '\n')
+    return str(path)
+
+
+def test_job_progress_is_visible_to_other_workers(db, tmp_path, app_module):
+    validate_item_data = app_module.validate_item_data
+    importer = CSVImporter(db, validate_item_data, chunk_size=4)
+    job = importer.create_job('feed.csv')
+    importer.run(write_csv(tmp_path / 'feed.csv', 10), job)
+
+    # A second importer on the same database stands in for another worker
+    other = CSVImporter(db, validate_item_data).get_job(job.id)
+
+    assert other is not job
+    assert other.to_dict()['status'] == 'completed'
+    assert (other.rows_parsed, other.rows_inserted, other.rows_rejected) == (11, 10, 1)
+    assert other.errors == job.errors
+    assert [listed.id for listed in CSVImporter(db, validate_item_data).list_jobs()] == [job.id]
+
+
+def test_unknown_job_is_none(db, app_module):
+    assert CSVImporter(db, app_module.validate_item_data).get_job('missing') is None
+
+
+def test_async_import_can_be_polled_from_a_fresh_importer(client, app_module, tmp_path):
+    with open(write_csv(tmp_path / 'feed.csv', 3), 'rb') as upload:
+        response = client.post(
+            '/api/import/csv?async=1', data={'file': (upload, 'feed.csv')},
+            content_type='multipart/form-data'
+        )
+    assert response.status_code == 202
+    job_id = response.get_json()['job_id']
+
+    other = CSVImporter(app_module.db, app_module.validate_item_data)
+    deadline = time.monotonic() + 10
+    while other.get_job(job_id).status not in ('completed', 'failed') and time.monotonic() < deadline:
+        time.sleep(0.05)
+
+    assert other.get_job(job_id).rows_inserted == 3
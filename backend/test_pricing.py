@@ -0,0 +1,101 @@
+"""
+Tests for the pricing engine
+"""
+
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+import pricing
+from conftest import days_from_today, make_item
+from pricing import LinearExpiryPolicy, price_batch, price_one, register_policy
+
+
+class HalfOffPolicy(pricing.PricingPolicy):
+    """50% off within the window."""
+
+    window_days = 6
+
+    def discounts(self, days, quantities, base_prices):
+        return np.where(days <= self.window_days, 50.0, 0.0)
+
+    def discount_sql(self, days_column):
+        return f'CASE WHEN {days_column} <= {self.window_days} THEN 50.0 ELSE 0.0 END'
+
+
+@pytest.fixture
+def custom_policy():
+    register_policy('Bakery', HalfOffPolicy())
+    yield
+    pricing._category_policies.pop('Bakery', None)
+
+
+def test_scalar_path_matches_batch_path():
+    today = date(2026, 1, 15)
+    expiry = [(today + timedelta(days=offset)).isoformat() for offset in range(-3, 12)]
+    base_prices = [0.01, 0.05, 0.99, 1.0, 1.15, 2.675, 3.5, 4.99, 9.995, 19.99, 123.45]
+
+    for window in (1, 3, 4, 7):
+        policy = LinearExpiryPolicy(window)
+        for base_price in base_prices:
+            days = pricing.days_to_expiry(expiry, today)
+            batch_discounts = policy.discounts(days, np.ones(len(days), dtype=np.int64), np.full(len(days), base_price))
+            batch_prices = pricing.apply_discounts(np.full(len(days), base_price), batch_discounts)
+            for day, discount, price in zip(days.tolist(), batch_discounts.tolist(), batch_prices.tolist()):
+                scalar = policy.discount(day, 1, base_price)
+                assert scalar == discount
+                assert pricing.discounted_price(base_price, scalar) == price
+
+
+def test_price_one_matches_price_batch():
+    today = date(2026, 1, 15)
+    expiry = [(today + timedelta(days=offset)).isoformat() for offset in range(-2, 8)]
+    discounts, prices = price_batch(expiry, [3] * len(expiry), [2.49] * len(expiry), ['Dairy'] * len(expiry), today)
+
+    for expiry_date, discount, price in zip(expiry, discounts.tolist(), prices.tolist()):
+        assert price_one(expiry_date, 3, 2.49, 'Dairy', today) == (discount, price)
+
+
+def test_price_one_uses_category_policy(custom_policy):
+    today = date(2026, 1, 15)
+
+    assert price_one('2026-01-20', 1, 4.0, 'Bakery', today) == (50.0, 2.0)
+    assert price_one('2026-01-20', 1, 4.0, 'Dairy', today) == (0.0, 4.0)
+
+
+def test_price_one_accepts_dates_and_datetimes():
+    from datetime import datetime
+
+    today = date(2026, 1, 15)
+    assert price_one(date(2026, 1, 17), 1, 4.0, None, today) == (50.0, 2.0)
+    assert price_one(datetime(2026, 1, 17, 9, 30), 1, 4.0, None, today) == (50.0, 2.0)
+
+
+def test_register_policy_requires_sql_form():
+    class BatchOnlyPolicy(pricing.PricingPolicy):
+        def discounts(self, days, quantities, base_prices):
+            return np.zeros(len(days))
+
+    with pytest.raises(ValueError):
+        register_policy('Bakery', BatchOnlyPolicy())
+    assert not pricing.category_policies_registered()
+
+
+@pytest.mark.parametrize('snapshot_current', [False, True])
+def test_public_endpoints_apply_custom_policy(client, app_module, custom_policy, snapshot_current):
+    for category, days in [('Bakery', 3), ('Bakery', 10), ('Dairy', 3), ('Dairy', 1)]:
+        app_module.db.create_item(make_item(category=category, expiry_date=days_from_today(days)))
+    if snapshot_current:
+        app_module.catalog_snapshot.refresh()
+
+    items = client.get('/api/perishables/public').get_json()['data']
+    assert sorted(item['discount_percentage'] for item in items) == [0.0, 25.0, 50.0, 75.0]
+
+    response = client.get('/api/perishables/public?min_discount=40')
+    assert response.status_code == 200
+    assert sorted(item['discount_percentage'] for item in response.get_json()['data']) == [50.0, 75.0]
+
+    response = client.get('/api/perishables/public/categories')
+    assert response.status_code == 200
+    assert {row['category']: row['avg_discount'] for row in response.get_json()['data']} == {'Bakery': 25.0, 'Dairy': 50.0}
@@ -0,0 +1,41 @@
+"""
+Tests for the public endpoint handlers shared by Flask and ASGI
+"""
+
+import pytest
+
+import pricing
+from conftest import days_from_today, make_item
+from pricing import LinearExpiryPolicy
+
+
+@pytest.mark.parametrize('limit', ['0', '-1', 'abc'])
+def test_deals_reject_an_invalid_limit(client, app_module, limit):
+    app_module.db.create_item(make_item())
+
+    response = client.get(f'/api/perishables/public/deals?limit={limit}')
+
+    assert response.status_code == 400
+    assert response.get_json() == {'success': False, 'error': 'limit must be a positive integer'}
+
+
+def test_deals_clamp_the_limit(client):
+    response = client.get('/api/perishables/public/deals?limit=5000')
+
+    assert response.get_json()['filters_applied']['limit'] == 1000
+
+
+@pytest.mark.parametrize('snapshot_current', [False, True])
+def test_deals_rank_by_discount_across_policies(client, app_module, monkeypatch, snapshot_current):
+    monkeypatch.setitem(pricing._category_policies, 'Dairy', LinearExpiryPolicy(window_days=8))
+    for category, days in [('Bakery', 3), ('Bakery', 4), ('Dairy', 5)]:
+        app_module.db.create_item(make_item(category=category, expiry_date=days_from_today(days)))
+    if snapshot_current:
+        app_module.catalog_snapshot.refresh()
+
+    for path in ('/api/perishables/public/deals', '/api/perishables/public?sort_by=discount'):
+        app_module.response_cache.clear()
+        items = client.get(path).get_json()['data']
+        assert [(item['category'], item['discount_percentage']) for item in items] == [
+            ('Dairy', 37.5), ('Bakery', 25.0), ('Bakery', 0.0)
+        ]
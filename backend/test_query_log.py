@@ -0,0 +1,31 @@
+"""
+Tests for the slow-query log
+"""
+
+import json
+import os
+
+from database import Database, SLOW_QUERY_MS_ENV
+from query_log import DEFAULT_SLOW_QUERY_MS, SlowQueryLog
+
+
+def test_invalid_threshold_falls_back_to_default(tmp_path, monkeypatch):
+    monkeypatch.setenv(SLOW_QUERY_MS_ENV, 'fast')
+
+    db = Database(str(tmp_path / 'test.db'))
+
+    assert db.slow_queries.threshold_ms == DEFAULT_SLOW_QUERY_MS
+
+
+def test_log_file_is_reopened_after_external_rotation(tmp_path):
+    log_path = str(tmp_path / 'slow.log')
+    first = SlowQueryLog(str(tmp_path / 'test.db'), threshold_ms=0.0, log_path=log_path)
+    second = SlowQueryLog(str(tmp_path / 'test.db'), threshold_ms=0.0, log_path=log_path)
+
+    first.observe('SELECT 1', None, 0.5, 1)
+    os.rename(log_path, log_path + '.1')
+    second.observe('SELECT 2', None, 0.5, 1)
+
+    with open(log_path + '.1') as rotated, open(log_path) as current:
+        assert [json.loads(line)['sql'] for line in rotated] == ['SELECT 1']
+        assert [json.loads(line)['sql'] for line in current] == ['SELECT 2']
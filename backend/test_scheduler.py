@@ -0,0 +1,53 @@
+"""
+Tests for starting the nightly scheduler
+"""
+
+import os
+import subprocess
+import sys
+
+from archiver import ARCHIVE_AFTER_DAYS_ENV
+from conftest import days_from_today, make_item
+from scheduler import NightlyScheduler, SCHEDULER_ENV
+
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def test_importing_the_app_does_not_start_the_scheduler(tmp_path):
+    env = dict(os.environ, PYTHONPATH=BACKEND_DIR)
+    env[SCHEDULER_ENV] = '1'
+    script = 'import app, threading; print(app.scheduler.running, any(t.name == "nightly-scheduler" for t in threading.enumerate()))'
+
+    result = subprocess.run(
+        [sys.executable, '-c', script], cwd=str(tmp_path), env=env,
+        capture_output=True, text=True, timeout=120
+    )
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.split()[-2:] == ['False', 'False']
+
+
+def test_start_scheduler_honours_the_switch(app_module, monkeypatch):
+    starts = []
+    monkeypatch.setattr(app_module.scheduler, 'start', lambda: starts.append(True))
+
+    monkeypatch.setenv(SCHEDULER_ENV, '0')
+    assert not app_module.start_scheduler()
+    monkeypatch.setenv(SCHEDULER_ENV, '1')
+    assert app_module.start_scheduler()
+
+    assert starts == [True]
+
+
+def test_nightly_archival_is_opt_in(db, monkeypatch):
+    item_id = db.create_item(make_item(expiry_date=days_from_today(-40)))
+    scheduler = NightlyScheduler(db)
+
+    monkeypatch.delenv(ARCHIVE_AFTER_DAYS_ENV, raising=False)
+    scheduler._run_archival(days_from_today(0))
+    assert db.get_item_by_id(item_id) is not None
+
+    monkeypatch.setenv(ARCHIVE_AFTER_DAYS_ENV, '30')
+    scheduler._run_archival(days_from_today(0))
+    assert db.get_item_by_id(item_id) is None
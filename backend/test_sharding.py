@@ -0,0 +1,167 @@
+"""
+Tests for sharded storage: the same flows on one file and on two shards
+"""
+
+import pytest
+
+import pricing
+from conftest import days_from_today, make_item
+from database import Database
+from pricing import LinearExpiryPolicy, price_one
+from sharding import CrossShardTransactionError, ShardedDatabase
+
+
+SELLERS = ['Seller A', 'Seller B', 'Seller C', 'Seller D', 'Seller E']
+CATEGORIES = ['Dairy', 'Bakery', 'Produce']
+
+# Public Database methods a ShardedDatabase deliberately lacks
+UNSHARDED_METHODS = {'get_connection', 'init_database', 'stream_rows', 'get_changes', 'get_change_log_bounds'}
+
+
+def _public_methods(cls):
+    return {name for name in dir(cls) if not name.startswith('_') and callable(getattr(cls, name))}
+
+
+def _names(rows):
+    return [row['item_name'] for row in rows]
+
+
+def _catalog():
+    """Priced items with distinct expiry dates and base prices."""
+    items = []
+    for number in range(16):
+        item = make_item(
+            item_name=f'Item {number:02d}',
+            seller_name=SELLERS[number % len(SELLERS)],
+            category=CATEGORIES[number % len(CATEGORIES)],
+            base_price=2.0 + number * 0.5,
+            quantity=1 + number,
+            expiry_date=days_from_today(number - 3)
+        )
+        item['discounted_price'] = price_one(
+            item['expiry_date'], item['quantity'], item['base_price'], item['category']
+        )[1]
+        items.append(item)
+    return items
+
+
+def _run_flows(db):
+    """Apply writes through the public methods and collect what reads return."""
+    ids = {}
+    for item in _catalog()[:10]:
+        ids[item['item_name']] = db.create_item(item)
+    db.bulk_insert(_catalog()[10:])
+    ids.update({row['item_name']: row['id'] for row in db.get_all_items()})
+
+    db.update_item(ids['Item 05'], {'expiry_date': days_from_today(1), 'quantity': 40})
+    db.toggle_item_active(ids['Item 06'])
+    db.delete_item(ids['Item 07'])
+    with db.transaction():
+        db.update_item(ids['Item 08'], {'base_price': 9.25})
+        db.update_item(ids['Item 13'], {'quantity': 2})
+
+    pages, after = [], None
+    while True:
+        page = db.get_items_page(4, after)
+        pages.append(_names(page))
+        if len(page) < 4:
+            break
+        after = (page[-1]['expiry_date'], page[-1]['id'])
+
+    return {
+        'all': sorted(_names(db.get_all_items())),
+        'by_id': db.get_item_by_id(ids['Item 05'])['quantity'],
+        'pages': pages,
+        'iter': _names(db.iter_items()),
+        'seller_iter': _names(db.iter_items('Seller B')),
+        'category': _names(db.get_items_by_category('Dairy')),
+        'expiring': _names(db.get_expiring_items(2)),
+        'public': {
+            sort_by: _names(db.query_public_items(sort_by=sort_by))
+            for sort_by in ('discount', 'price', 'expiry')
+        },
+        'filtered': _names(db.query_public_items(category='Bakery', max_price=6.0)),
+        'seller_public': _names(db.query_public_items(seller_name='Seller C', limit=2)),
+        'top_deals': _names(db.get_top_deals(5)),
+        'group_stats': db.get_public_group_stats('category'),
+        'category_stats': db.get_category_stats(),
+        'seller_summary': db.get_seller_summary('Seller A'),
+        'repricing': len(db.get_repricing_candidates()),
+        'autocomplete': _names(db.autocomplete_item_names('Item 1', limit=20)),
+    }
+
+
+def test_sharded_database_has_every_database_method():
+    missing = _public_methods(Database) - _public_methods(ShardedDatabase) - UNSHARDED_METHODS
+    assert missing == set()
+
+
+def test_flows_match_a_single_file(tmp_path):
+    single = Database(str(tmp_path / 'single.db'))
+    sharded = ShardedDatabase(str(tmp_path / 'sharded.db'), shard_count=2)
+
+    expected = _run_flows(single)
+    actual = _run_flows(sharded)
+
+    assert {sharded.seller_shard(seller) for seller in SELLERS} == {0, 1}
+    assert actual == expected
+
+
+def test_single_shard_transaction_rejects_a_second_shard(tmp_path):
+    db = ShardedDatabase(str(tmp_path / 'test.db'), shard_count=2)
+    by_shard = {}
+    for seller in SELLERS:
+        by_shard.setdefault(db.seller_shard(seller, assign=True), seller)
+
+    with pytest.raises(CrossShardTransactionError):
+        with db.transaction(single_shard=True):
+            db.create_item(make_item(seller_name=by_shard[0]))
+            db.create_item(make_item(seller_name=by_shard[1]))
+
+    assert db.get_all_items() == []
+
+
+def test_atomic_batch_across_shards_is_rejected(client, tmp_path, monkeypatch):
+    from routes import seller_routes
+
+    db = ShardedDatabase(str(tmp_path / 'test.db'), shard_count=2)
+    monkeypatch.setattr(seller_routes, 'db', db)
+    by_shard = {}
+    for seller in SELLERS:
+        by_shard.setdefault(db.seller_shard(seller, assign=True), seller)
+
+    def batch(sellers, atomic):
+        operations = [
+            {'op': 'create', 'data': {
+                'item_name': 'Milk', 'category': 'Dairy', 'quantity': 1, 'base_price': 3.0,
+                'seller_name': seller, 'expiry_date': days_from_today(3)
+            }}
+            for seller in sellers
+        ]
+        return client.post('/api/seller/items/batch', json={'operations': operations, 'atomic': atomic})
+
+    response = batch([by_shard[0], by_shard[1]], atomic=True)
+    assert response.status_code == 400
+    assert response.get_json()['rolled_back'] is True
+    assert db.get_all_items() == []
+
+    assert batch([by_shard[0], by_shard[0]], atomic=True).status_code == 200
+    assert batch([by_shard[0], by_shard[1]], atomic=False).status_code == 200
+    assert len(db.get_all_items()) == 4
+
+
+def test_discount_merge_mixes_policies(tmp_path, monkeypatch):
+    monkeypatch.setitem(pricing._category_policies, 'Dairy', LinearExpiryPolicy(window_days=8))
+    single = Database(str(tmp_path / 'single.db'))
+    sharded = ShardedDatabase(str(tmp_path / 'sharded.db'), 2)
+    for db in (single, sharded):
+        db.bulk_insert(_catalog())
+
+    deals = sharded.get_top_deals(4)
+    discounts = [
+        price_one(row['expiry_date'], row['quantity'], row['base_price'], row['category'])[0] for row in deals
+    ]
+    assert discounts == sorted(discounts, reverse=True)
+    assert _names(deals) == _names(single.get_top_deals(4))
+    assert _names(sharded.query_public_items()) == _names(single.query_public_items())
+    assert _names(list(sharded.iter_public_items())) == _names(single.query_public_items())
@@ -0,0 +1,117 @@
+"""
+Tests for the catalog snapshot: it must answer exactly like SQL
+"""
+
+import pytest
+
+import pricing
+from conftest import days_from_today, make_item
+from pricing import LinearExpiryPolicy, price_one
+from snapshot import CatalogSnapshotStore
+
+
+FILTERS = [
+    {},
+    {'sort_by': 'price'},
+    {'sort_by': 'expiry', 'limit': 5},
+    {'category': 'Dairy'},
+    {'category': 'Unknown'},
+    {'seller_name': 'Seller B', 'sort_by': 'price'},
+    {'min_discount': 25},
+    {'min_discount': 50, 'category': 'Dairy'},
+    {'min_discount': 80, 'sort_by': 'price'},
+    {'max_price': 3.0},
+    {'min_discount': 10, 'max_price': 4.0, 'limit': 3},
+    {'after': (days_from_today(3), 0), 'sort_by': 'expiry'},
+]
+
+
+@pytest.fixture(params=[False, True], ids=['default-policy', 'dairy-policy'])
+def policies(request, monkeypatch):
+    """Run once with the default policy only and once with a Dairy policy."""
+    if request.param:
+        monkeypatch.setitem(pricing._category_policies, 'Dairy', LinearExpiryPolicy(window_days=8))
+    return request.param
+
+
+@pytest.fixture
+def catalog(db):
+    categories = ['Dairy', 'Bakery', 'Produce']
+    sellers = ['Seller A', 'Seller B', None]
+    for number in range(24):
+        item = make_item(
+            item_name=f'Item {number}',
+            category=categories[number % 3],
+            seller_name=sellers[number % 2 + (number % 5 == 0)],
+            quantity=number + 1,
+            base_price=1.0 + number * 0.25,
+            expiry_date=days_from_today(number % 12 - 2),
+            is_active=0 if number % 7 == 3 else 1
+        )
+        item['discounted_price'] = price_one(item['expiry_date'], item['quantity'], item['base_price'], item['category'])[1]
+        db.create_item(item)
+    return db
+
+
+@pytest.fixture
+def snapshot(catalog, tmp_path):
+    return CatalogSnapshotStore(catalog, str(tmp_path / 'snapshot.bin')).refresh()
+
+
+@pytest.mark.parametrize('filters', FILTERS)
+def test_public_queries_match_sql(policies, catalog, snapshot, filters):
+    assert snapshot.query_public_items(**filters) == catalog.query_public_items(**filters)
+
+
+@pytest.mark.parametrize('group_by', ['category', 'seller_name'])
+def test_group_stats_match_sql(policies, catalog, snapshot, group_by):
+    assert snapshot.get_public_group_stats(group_by) == catalog.get_public_group_stats(group_by)
+
+
+def test_discount_filter_follows_a_registered_policy(catalog, monkeypatch):
+    monkeypatch.setitem(pricing._category_policies, 'Dairy', LinearExpiryPolicy(window_days=8))
+
+    served = {
+        item['id'] for item in catalog.query_public_items()
+        if price_one(item['expiry_date'], item['quantity'], item['base_price'], item['category'])[0] >= 50
+    }
+
+    assert {item['id'] for item in catalog.query_public_items(min_discount=50)} == served
+    assert any(item['category'] == 'Dairy' for item in catalog.get_items_by_ids(list(served)).values())
+
+
+def test_stats_report_the_hit_ratio(catalog, tmp_path):
+    store = CatalogSnapshotStore(catalog, str(tmp_path / 'snapshot.bin'), min_interval=60)
+    store.refresh()
+    assert store.current() is not None and store.current() is not None
+
+    catalog.create_item(make_item())
+
+    assert store.current() is None
+    stats = store.stats()
+    assert (stats['snapshot_reads'], stats['sql_fallbacks'], stats['hit_ratio']) == (2, 1, 0.6667)
+
+
+def _discount_order(items):
+    """(discount DESC, expiry_date, id) sort keys of served items."""
+    return [
+        (-price_one(item['expiry_date'], item['quantity'], item['base_price'], item['category'])[0],
+         item['expiry_date'], item['id'])
+        for item in items
+    ]
+
+
+def test_discount_sort_mixes_policies(catalog, tmp_path, monkeypatch):
+    monkeypatch.setitem(pricing._category_policies, 'Dairy', LinearExpiryPolicy(window_days=8))
+    monkeypatch.setitem(pricing._category_policies, 'Produce', LinearExpiryPolicy(window_days=2))
+    snapshot = CatalogSnapshotStore(catalog, str(tmp_path / 'snapshot.bin')).refresh()
+
+    expected = sorted(_discount_order(catalog.query_public_items(sort_by='expiry')))
+    # A later-expiring item outranks an earlier one, so expiry order would be wrong
+    assert expected != sorted(expected, key=lambda key: key[1:])
+    dairy = sorted(_discount_order(catalog.query_public_items(category='Dairy', sort_by='expiry')))
+
+    for source in (catalog, snapshot):
+        assert _discount_order(source.query_public_items()) == expected
+        assert _discount_order(source.get_top_deals(5)) == expected[:5]
+        assert _discount_order(source.get_top_deals(3, category='Dairy')) == dairy[:3]
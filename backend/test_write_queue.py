@@ -0,0 +1,43 @@
+"""
+Tests for group commit
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from conftest import make_item
+from database import Database
+from write_queue import GROUP_COMMIT_MS_ENV, GroupCommitQueue, create_write_queue
+
+
+def _create_then_fail(db, item_data):
+    db.create_item(item_data)
+    raise ValueError('rejected')
+
+
+def test_group_commit_is_off_by_default(db, monkeypatch):
+    monkeypatch.delenv(GROUP_COMMIT_MS_ENV, raising=False)
+
+    assert create_write_queue(db) is None
+
+
+def test_failing_write_is_rolled_back_alone(db):
+    write_queue = GroupCommitQueue(db, window_ms=200, max_batch=3)
+    writes = [
+        (Database.create_item, make_item(item_name='First')),
+        (_create_then_fail, make_item(item_name='Doomed')),
+        (Database.create_item, make_item(item_name='Second')),
+    ]
+
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        futures = [pool.submit(write_queue.submit, method, item) for method, item in writes]
+        first, second = futures[0].result(), futures[2].result()
+        with pytest.raises(ValueError, match='rejected'):
+            futures[1].result()
+
+    assert db.get_item_by_id(first)['item_name'] == 'First'
+    assert db.get_item_by_id(second)['item_name'] == 'Second'
+    assert sorted(item['item_name'] for item in db.get_all_items()) == ['First', 'Second']
+    stats = write_queue.stats()
+    assert (stats['transactions'], stats['operations'], stats['failed_operations']) == (1, 3, 1)
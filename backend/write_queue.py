@@ -0,0 +1,198 @@
+"""
+Group Commit for Basket Buddy 2.0
+Coalesces concurrent single-item writes into shared transactions
+
+Batching Foundation:
+- Writes w₁, w₂, ..., wₖ arriving within a window Δ (or until k = N) are
+  applied by one writer thread in a single transaction: one write lock
+  and one WAL commit instead of k of each
+- Each wᵢ runs inside its own savepoint, so a failing write is rolled back
+  alone and every caller still gets exactly its own result or error
+- Callers block until the shared commit succeeds, so a returned result is
+  as durable as a direct commit
+- Single-item writes of one process take the SQLite lock from one thread
+  only; other worker processes, CSV imports, batches and repricing still
+  take it directly, so lock waits shrink but do not disappear
+- Off by default: the window delays every write by up to Δ, which only
+  pays off under concurrent writers
+"""
+
+from concurrent.futures import Future
+from functools import wraps
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import os
+import queue
+import threading
+import time
+
+
+# Coalescing window in milliseconds (unset, empty or 0 disables group
+# commit); DEFAULT_GROUP_COMMIT_MS is the window of a queue built directly
+GROUP_COMMIT_MS_ENV = 'BASKETBUDDY_GROUP_COMMIT_MS'
+DEFAULT_GROUP_COMMIT_MS = 2.0
+
+# Operations per transaction at most
+GROUP_COMMIT_MAX_ENV = 'BASKETBUDDY_GROUP_COMMIT_MAX'
+DEFAULT_GROUP_COMMIT_MAX = 64
+
+
+class GroupCommitQueue:
+    """
+    Queue of pending writes drained by a dedicated writer thread.
+
+    The writer takes the first pending write, collects more for up to
+    window_ms or until max_batch writes are pending, and applies the batch
+    in one Database.transaction(). The thread starts on the first write
+    and is restarted in a forked child.
+    """
+
+    def __init__(self, db, window_ms: float = DEFAULT_GROUP_COMMIT_MS, max_batch: int = DEFAULT_GROUP_COMMIT_MAX):
+        """
+        Initialize the queue.
+
+        Args:
+            db: Database instance the writes are applied to
+            window_ms: How long to wait for more writes after the first
+            max_batch: Maximum number of writes per transaction
+        """
+        self.db = db
+        self.window = max(window_ms, 0.0) / 1000.0
+        self.max_batch = max(max_batch, 1)
+        self._queue: "queue.Queue[Tuple[Future, Callable, tuple, dict]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._writer: Optional[threading.Thread] = None
+        self._pid = os.getpid()
+        self._stats = {
+            'operations': 0,
+            'transactions': 0,
+            'failed_operations': 0,
+            'failed_transactions': 0,
+            'largest_batch': 0,
+        }
+
+    def submit(self, method: Callable, *args: Any, **kwargs: Any) -> Any:
+        """
+        Apply a write on the writer thread and wait for its commit.
+
+        Args:
+            method: Unbound Database method, called as method(db, *args, **kwargs)
+
+        Returns:
+            The method's return value once its transaction has committed
+
+        Raises:
+            Whatever the method raised, or the error that failed the commit
+        """
+        future: Future = Future()
+        self._ensure_writer()
+        self._queue.put((future, method, args, kwargs))
+        return future.result()
+
+    def _ensure_writer(self) -> None:
+        with self._lock:
+            if self._pid != os.getpid():
+                # The writer thread does not survive a fork
+                self._queue = queue.Queue()
+                self._writer = None
+                self._pid = os.getpid()
+            if self._writer is None or not self._writer.is_alive():
+                self._writer = threading.Thread(target=self._run, name='group-commit-writer', daemon=True)
+                self._writer.start()
+
+    def _collect(self) -> List[Tuple[Future, Callable, tuple, dict]]:
+        """Block for the next write, then gather more until the window closes."""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            outcomes: List[Tuple[Future, bool, Any]] = []
+            try:
+                with self.db.transaction() as conn:
+                    for future, method, args, kwargs in batch:
+                        conn.execute('SAVEPOINT group_commit')
+                        try:
+                            result = method(self.db, *args, **kwargs)
+                        except Exception as e:
+                            conn.execute('ROLLBACK TO group_commit')
+                            outcomes.append((future, False, e))
+                        else:
+                            outcomes.append((future, True, result))
+                        finally:
+                            conn.execute('RELEASE group_commit')
+            except Exception as e:
+                # The shared transaction did not commit: every write failed
+                with self._lock:
+                    self._stats['failed_transactions'] += 1
+                    self._stats['failed_operations'] += len(batch)
+                for future, *_ in batch:
+                    future.set_exception(e)
+                continue
+
+            with self._lock:
+                self._stats['transactions'] += 1
+                self._stats['operations'] += len(batch)
+                self._stats['failed_operations'] += sum(1 for _, ok, _ in outcomes if not ok)
+                self._stats['largest_batch'] = max(self._stats['largest_batch'], len(batch))
+            for future, ok, value in outcomes:
+                if ok:
+                    future.set_result(value)
+                else:
+                    future.set_exception(value)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get group commit metrics.
+
+        Returns:
+            Dictionary of operation and transaction counters, average batch
+            size and settings
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        stats['pending'] = self._queue.qsize()
+        stats['avg_batch'] = round(stats['operations'] / stats['transactions'], 2) if stats['transactions'] else 0.0
+        stats['window_ms'] = self.window * 1000.0
+        stats['max_batch'] = self.max_batch
+        return stats
+
+
+def create_write_queue(db) -> Optional[GroupCommitQueue]:
+    """
+    Create the group commit queue of a Database from BASKETBUDDY_GROUP_COMMIT_MS
+    and BASKETBUDDY_GROUP_COMMIT_MAX.
+
+    Args:
+        db: Database instance
+
+    Returns:
+        GroupCommitQueue, or None if group commit is disabled
+    """
+    window = os.environ.get(GROUP_COMMIT_MS_ENV, '').strip()
+    if not window or float(window) <= 0:
+        return None
+    max_batch = os.environ.get(GROUP_COMMIT_MAX_ENV, '').strip()
+    return GroupCommitQueue(db, float(window), int(max_batch) if max_batch else DEFAULT_GROUP_COMMIT_MAX)
+
+
+def group_committed(method: Callable) -> Callable:
+    """
+    Decorator routing a Database write method through its group commit queue.
+
+    Calls made inside an open connection or transaction block (including the
+    writer thread's own batch) run directly and join that transaction.
+    """
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self.write_queue is None or getattr(self._local, 'depth', 0) > 0:
+            return method(self, *args, **kwargs)
+        return self.write_queue.submit(method, *args, **kwargs)
+    return wrapper
@@ -0,0 +1,34 @@
+"""
+Gunicorn settings for the Basket Buddy API
+
+Usage:
+    gunicorn -c gunicorn.conf.py backend.app:app
+
+Concurrency:
+- /api/changes/stream keeps a request open for up to five minutes, so
+  workers are threaded (gthread): a sync worker would serve nothing else
+  while one client is subscribed
+- Streams may take at most BASKETBUDDY_MAX_STREAMS threads per worker
+  (default: half of them); further subscribers get 503 and fall back to
+  polling /api/changes, so the API always has threads left
+- Worker count follows WEB_CONCURRENCY and the port follows PORT, as with
+  gunicorn's defaults
+- Each worker starts its nightly scheduler once it has loaded the app;
+  importing the app never starts one
+"""
+
+import os
+import sys
+
+
+worker_class = 'gthread'
+
+# Threads per worker process
+threads = int(os.environ.get('BASKETBUDDY_THREADS', '16'))
+
+os.environ.setdefault('BASKETBUDDY_MAX_STREAMS', str(max(threads // 2, 1)))
+
+
+def post_worker_init(worker):
+    """Start the nightly scheduler of a worker that has loaded the app."""
+    sys.modules[worker.wsgi.import_name].start_scheduler()